@@ -0,0 +1,218 @@
+from typing import Dict, Iterator, List, Optional
+from datetime import datetime
+import numpy as np
+from models import Mission, Conflict
+from trajectory import Trajectory
+from flight_path_simulator import FlightPathSimulator
+from conflict_detector import ConflictDetector
+from analytic_detector import AnalyticConflictDetector, MissionSegments, segment_pair_separation
+from broad_phase import BroadPhaseIndex, BroadPhaseStats, BatchCandidates
+from occupancy import OccupancyGrid
+
+
+class Airspace:
+    def __init__(self, safety_buffer: float = 2.0, time_buffer: float = 2.0,
+                 cell_size: float = 25.0, time_cell: float = 10.0,
+                 simulator: Optional[FlightPathSimulator] = None, epoch: Optional[datetime] = None,
+                 occupancy: Optional[OccupancyGrid] = None):
+        """
+        Committed airspace that new missions are validated against.
+
+        Approved missions are kept in memory together with their precomputed
+        narrow-phase data and a persistent broad-phase index, so checking one
+        new mission only touches the residents it could conflict with.
+
+        Args:
+            safety_buffer: Minimum separation distance in meters
+            time_buffer: Temporal tolerance in seconds
+            cell_size: Spatial grid cell edge of the broad-phase index in meters
+            time_cell: Temporal grid cell length of the broad-phase index in seconds
+            simulator: If given, residents are stored as simulated trajectories and
+                checked with the sampled ConflictDetector; otherwise the exact
+                AnalyticConflictDetector is used
+            epoch: Reference time for the shared time axis (defaults to the first mission's start)
+            occupancy: Occupancy grid kept in step with the resident missions
+        """
+        self.simulator = simulator
+        self.occupancy = occupancy
+        self.epoch = epoch
+        self.index = BroadPhaseIndex(safety_buffer=safety_buffer, time_buffer=time_buffer,
+                                     cell_size=cell_size, time_cell=time_cell, epoch=epoch)
+        if simulator is None:
+            self.detector = AnalyticConflictDetector(safety_buffer=safety_buffer, time_buffer=time_buffer)
+        else:
+            self.detector = ConflictDetector(safety_buffer=safety_buffer, time_buffer=time_buffer,
+                                             time_step=simulator.time_step)
+        self.missions: Dict[str, Mission] = {}
+        self._segments: Dict[str, MissionSegments] = {}
+        self._trajectories: Dict[str, Trajectory] = {}
+
+    def __len__(self) -> int:
+        return len(self.missions)
+
+    def __contains__(self, drone_id: str) -> bool:
+        return drone_id in self.missions
+
+    @property
+    def stats(self) -> BroadPhaseStats:
+        """Broad-phase statistics of the last check."""
+        return self.index.stats
+
+    def _ensure_epoch(self, mission: Mission) -> None:
+        if self.epoch is None:
+            self.epoch = mission.start_time
+            self.index.epoch = self.epoch
+
+    def commit(self, mission: Mission) -> None:
+        """Add an approved mission, replacing any resident mission with the same drone id."""
+        self._ensure_epoch(mission)
+        self.missions[mission.drone_id] = mission
+        self.index.insert(mission)
+        if self.occupancy is not None:
+            self.occupancy.insert(mission)
+        # Segments are kept in both modes: batched checks prefilter on them
+        self._segments[mission.drone_id] = MissionSegments.from_mission(mission, self.epoch)
+        if self.simulator is not None:
+            self._trajectories[mission.drone_id] = self.simulator.simulate_flight_path(mission)
+
+    def commit_all(self, missions: List[Mission]) -> None:
+        """Add several approved missions."""
+        if self.epoch is None and missions:
+            self._ensure_epoch(min(missions, key=lambda m: m.start_time))
+        for mission in missions:
+            self.commit(mission)
+
+    def remove(self, drone_id: str) -> Mission:
+        """
+        Remove a resident mission from the airspace.
+
+        Raises:
+            KeyError: If no mission with this drone id is resident
+        """
+        mission = self.missions.pop(drone_id)
+        self.index.remove(drone_id)
+        if self.occupancy is not None:
+            self.occupancy.remove(drone_id)
+        self._segments.pop(drone_id, None)
+        self._trajectories.pop(drone_id, None)
+        return mission
+
+    def iter_check(self, mission: Mission) -> Iterator[Conflict]:
+        """
+        Yield the conflicts of a candidate mission with each resident as soon as it is checked.
+
+        A resident with the same drone id is ignored, so a re-plan can be
+        checked before it replaces the committed version.
+        """
+        self._ensure_epoch(mission)
+        candidates = self.index.query(mission)
+        if not candidates:
+            return
+        if self.simulator is None:
+            segments = MissionSegments.from_mission(mission, self.epoch)
+            for drone_id, segment_pairs in candidates.items():
+                yield from self.detector.check_pair(segments, self._segments[drone_id], segment_pairs)
+            return
+        path = self.simulator.simulate_flight_path(mission)
+        for drone_id in candidates:
+            raw_conflicts = self.detector.check_pair(mission.drone_id, path, drone_id,
+                                                     self._trajectories[drone_id], self.epoch)
+            yield from self.detector.group_conflict_intervals(raw_conflicts, self.detector.group_step(path))
+
+    def check(self, mission: Mission) -> List[Conflict]:
+        """
+        Check a candidate mission against the resident missions only.
+
+        Returns:
+            Conflict events with the candidate as drone1, sorted by resident and time
+        """
+        conflicts = list(self.iter_check(mission))
+        conflicts.sort(key=lambda c: (tuple(sorted([c.drone1_id, c.drone2_id])), c.time))
+        return conflicts
+
+    def check_many(self, missions: List[Mission]) -> List[List[Conflict]]:
+        """
+        Check several independent candidate missions in one pass.
+
+        The broad phase of the whole batch runs as one array query, and every
+        candidate segment pair is then solved by a single vectorized call to
+        segment_pair_separation. Only (candidate, resident) pairs with a segment
+        pair inside the safety buffer go on to the exact per-pair check, so the
+        results equal calling check on each mission.
+
+        Returns:
+            Conflicts of each mission, in the order and form that check returns them
+        """
+        if not missions:
+            return []
+        self._ensure_epoch(missions[0])
+        results: List[List[Conflict]] = [[] for _ in missions]
+        candidates = self.index.query_many(missions)
+        if len(candidates):
+            segments = MissionSegments.from_missions(missions, self.epoch)
+            hit = self._segment_pair_hits(segments, candidates)
+            groups = candidates.mission[hit] * len(candidates.drone_ids) + candidates.resident[hit]
+            bounds = np.flatnonzero(np.diff(groups)) + 1
+            paths = {}
+            for rows in np.split(np.flatnonzero(hit), bounds):
+                if not len(rows):
+                    continue
+                k = int(candidates.mission[rows[0]])
+                drone_id = candidates.drone_ids[candidates.resident[rows[0]]]
+                if self.simulator is None:
+                    pairs = list(zip(candidates.mission_segment[rows].tolist(),
+                                     candidates.resident_segment[rows].tolist()))
+                    results[k].extend(self.detector.check_pair(segments[k], self._segments[drone_id], pairs))
+                    continue
+                if k not in paths:
+                    paths[k] = self.simulator.simulate_flight_path(missions[k])
+                raw_conflicts = self.detector.check_pair(missions[k].drone_id, paths[k], drone_id,
+                                                         self._trajectories[drone_id], self.epoch)
+                results[k].extend(self.detector.group_conflict_intervals(raw_conflicts,
+                                                                         self.detector.group_step(paths[k])))
+        for conflicts in results:
+            conflicts.sort(key=lambda c: (tuple(sorted([c.drone1_id, c.drone2_id])), c.time))
+        return results
+
+    def _segment_pair_hits(self, segments: List[MissionSegments], candidates: BatchCandidates) -> np.ndarray:
+        """Mask of the candidate segment pairs whose continuous separation is within the safety buffer."""
+        residents = np.unique(candidates.resident)
+        tables = [self._segments[candidates.drone_ids[r]] for r in residents]
+        offsets = np.zeros(len(candidates.drone_ids), dtype=np.int64)
+        offsets[residents] = np.cumsum([0] + [len(t) for t in tables[:-1]])
+        starts = np.cumsum([0] + [len(s) for s in segments[:-1]])
+        a = starts[candidates.mission] + candidates.mission_segment
+        b = offsets[candidates.resident] + candidates.resident_segment
+
+        def stack(tables: List[MissionSegments], field: str) -> np.ndarray:
+            return np.concatenate([getattr(t, field) for t in tables])
+
+        t0a, t1a, pa, va = (stack(segments, f) for f in ('t0', 't1', 'p0', 'velocity'))
+        t0b, t1b, pb, vb = (stack(tables, f) for f in ('t0', 't1', 'p0', 'velocity'))
+        time_buffer = self.detector.time_buffer
+        if self.simulator is not None:
+            # Samples lie on the segments, but the sampled detector pads the time window slightly
+            time_buffer += 1e-3
+        aligned = np.maximum(t0a[a], t0b[b] - time_buffer) <= np.minimum(t1a[a], t1b[b] + time_buffer)
+        hit = np.zeros(len(a), dtype=bool)
+        a, b = a[aligned], b[aligned]
+        distances, _ = segment_pair_separation(t0a[a], t1a[a], pa[a], va[a], t0b[b], t1b[b], pb[b], vb[b],
+                                               time_buffer)
+        safety_buffer = self.detector.safety_buffer
+        hit[aligned] = distances <= safety_buffer * (1 + 1e-9) + 1e-6
+        return hit
+
+    def first_conflict(self, mission: Mission) -> Optional[Conflict]:
+        """Return the first conflict of a candidate mission, or None if it is clear."""
+        return next(self.iter_check(mission), None)
+
+    def is_clear(self, mission: Mission) -> bool:
+        """Approve/reject decision: True if the candidate conflicts with no resident."""
+        return self.first_conflict(mission) is None
+
+    def check_and_commit(self, mission: Mission) -> List[Conflict]:
+        """Commit the mission if it is conflict-free and return the conflicts found."""
+        conflicts = self.check(mission)
+        if not conflicts:
+            self.commit(mission)
+        return conflicts
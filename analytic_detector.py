@@ -0,0 +1,374 @@
+from dataclasses import dataclass
+from typing import Iterator, List, Optional, Tuple
+from datetime import datetime, timedelta
+import math
+import numpy as np
+from models import Mission, Conflict
+from broad_phase import BroadPhaseIndex, BroadPhaseStats
+
+# Intervals closer than this (in seconds) are treated as one continuous conflict
+MERGE_TOLERANCE = 1e-9
+
+# Segment pairs handed to segment_pair_separation per vectorized block
+PAIR_BLOCK = 1 << 17
+
+
+@dataclass(eq=False)
+class MissionSegments:
+    """
+    Piecewise-linear representation of a mission.
+
+    Attributes:
+        drone_id: Identifier for the drone
+        epoch: Reference time that the segment times are measured from
+        t0: Segment start offsets in seconds, shape (S,)
+        t1: Segment end offsets in seconds, shape (S,)
+        p0: Segment start positions, shape (S, 3)
+        velocity: Constant velocity along each segment in m/s, shape (S, 3)
+    """
+    drone_id: str
+    epoch: datetime
+    t0: np.ndarray
+    t1: np.ndarray
+    p0: np.ndarray
+    velocity: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.t0)
+
+    @classmethod
+    def from_mission(cls, mission: Mission, epoch: datetime) -> 'MissionSegments':
+        """Build the segment table of a mission relative to a shared epoch."""
+        times = np.array([(wp.timestamp - epoch).total_seconds() for wp in mission.waypoints])
+        positions = np.array([(wp.x, wp.y, wp.z) for wp in mission.waypoints], dtype=np.float64)
+        if len(times) == 1:
+            # A single waypoint is a stationary point in time
+            times = np.repeat(times, 2)
+            positions = np.repeat(positions, 2, axis=0)
+        durations = np.diff(times)
+        displacement = np.diff(positions, axis=0)
+        # Zero-duration segments carry no motion
+        safe = np.where(durations > 0, durations, 1.0)
+        velocity = np.where((durations > 0)[:, None], displacement / safe[:, None], 0.0)
+        return cls(drone_id=mission.drone_id, epoch=epoch, t0=times[:-1], t1=times[1:],
+                   p0=positions[:-1], velocity=velocity)
+
+    @classmethod
+    def from_missions(cls, missions: List[Mission], epoch: datetime) -> List['MissionSegments']:
+        """Build the segment tables of several missions in one array pass; each table is a view into shared arrays."""
+        waypoint_lists = [m.waypoints * 2 if len(m.waypoints) == 1 else m.waypoints for m in missions]
+        counts = np.array([len(w) for w in waypoint_lists])
+        times = np.array([(wp.timestamp - epoch).total_seconds() for w in waypoint_lists for wp in w])
+        positions = np.array([(wp.x, wp.y, wp.z) for w in waypoint_lists for wp in w], dtype=np.float64)
+        durations = np.diff(times)
+        displacement = np.diff(positions, axis=0)
+        safe = np.where(durations > 0, durations, 1.0)
+        velocity = np.where((durations > 0)[:, None], displacement / safe[:, None], 0.0)
+        ends = np.cumsum(counts)
+        # Differences across a mission boundary are computed but left out of every view
+        return [cls(drone_id=m.drone_id, epoch=epoch, t0=times[end - count:end - 1], t1=times[end - count + 1:end],
+                    p0=positions[end - count:end - 1], velocity=velocity[end - count:end - 1])
+                for m, count, end in zip(missions, counts.tolist(), ends.tolist())]
+
+    def position_at(self, index: int, t: float) -> Tuple[float, float, float]:
+        """Position on segment ``index`` at offset ``t``."""
+        return tuple((self.p0[index] + self.velocity[index] * (t - self.t0[index])).tolist())
+
+    def overlapping(self, start: float, end: float) -> range:
+        """Indices of segments whose time span intersects [start, end]."""
+        first = int(np.searchsorted(self.t1, start, side='left'))
+        last = int(np.searchsorted(self.t0, end, side='right'))
+        return range(first, max(first, last))
+
+
+def _dot(a, b) -> float:
+    return a[0] * b[0] + a[1] * b[1] + a[2] * b[2]
+
+
+def segment_pair_separation(t0a: np.ndarray, t1a: np.ndarray, pa: np.ndarray, va: np.ndarray,
+                            t0b: np.ndarray, t1b: np.ndarray, pb: np.ndarray, vb: np.ndarray,
+                            time_buffer: float) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Smallest time-buffered separation of many segment pairs, in closed form.
+
+    Vectorized form of AnalyticConflictDetector.segment_pair_conflict: the
+    first drone at time t is compared with the second at any time u with
+    |t - u| <= ``time_buffer``, and the time axis is split where the active
+    constraint on u changes. Every pair must overlap in time, i.e.
+    max(t0a, t0b - time_buffer) <= min(t1a, t1b + time_buffer).
+
+    Args:
+        t0a, t1a: Start and end offsets of the first segments, shape (P,)
+        pa, va: Start positions and velocities of the first segments, shape (P, 3)
+        t0b, t1b: Start and end offsets of the second segments, shape (P,)
+        pb, vb: Start positions and velocities of the second segments, shape (P, 3)
+        time_buffer: Temporal tolerance in seconds
+
+    Returns:
+        Minimum distances, shape (P,), and the first segments' time offsets of
+        the minimum, shape (P,)
+    """
+    tb = time_buffer
+    # Local time axis starting at the first segment's start
+    A1 = t1a - t0a
+    B0 = t0b - t0a
+    B1 = t1b - t0a
+    lo_t = np.maximum(0.0, B0 - tb)
+    hi_t = np.minimum(A1, B1 + tb)
+    # d(t, u) = c + va * t - vb * u
+    c = pa - pb + vb * B0[:, None]
+    vv = np.einsum('ij,ij->i', vb, vb)
+    cvb = np.einsum('ij,ij->i', c, vb)
+    vavb = np.einsum('ij,ij->i', va, vb)
+    cva = np.einsum('ij,ij->i', c, va)
+    cc = np.einsum('ij,ij->i', c, c)
+    vava = np.einsum('ij,ij->i', va, va)
+
+    # Unconstrained closest u for a given t is alpha + beta * t
+    moving = vv > 0
+    safe_vv = np.where(moving, vv, 1.0)
+    alpha = np.where(moving, cvb / safe_vv, B0)
+    beta = np.where(moving, vavb / safe_vv, 0.0)
+
+    # Times where the active constraint on u changes; undefined ones collapse onto lo_t
+    with np.errstate(divide='ignore', invalid='ignore'):
+        breaks = np.stack((B0 + tb, B1 - tb, (B0 - alpha) / beta, (B1 - alpha) / beta,
+                           (-tb - alpha) / (beta - 1), (tb - alpha) / (beta - 1)), axis=1)
+    breaks = np.where(np.isfinite(breaks), breaks, lo_t[:, None])
+    knots = np.sort(np.concatenate((lo_t[:, None], np.clip(breaks, lo_t[:, None], hi_t[:, None]),
+                                    hi_t[:, None]), axis=1), axis=1)
+    left, right = knots[:, :-1], knots[:, 1:]
+
+    # u(t) = k + m * t on each piece
+    mid = 0.5 * (left + right)
+    B0c, B1c = B0[:, None], B1[:, None]
+    at_start = B0c >= mid - tb
+    lo_k, lo_m = np.where(at_start, B0c, -tb), np.where(at_start, 0.0, 1.0)
+    at_end = B1c <= mid + tb
+    hi_k, hi_m = np.where(at_end, B1c, tb), np.where(at_end, 0.0, 1.0)
+    u_mid = alpha[:, None] + beta[:, None] * mid
+    below = u_mid < lo_k + lo_m * mid
+    above = ~below & (u_mid > hi_k + hi_m * mid)
+    k = np.where(below, lo_k, np.where(above, hi_k, alpha[:, None]))
+    m = np.where(below, lo_m, np.where(above, hi_m, beta[:, None]))
+
+    # d(t) = e + f * t with e = c - vb * k and f = va - vb * m, so |d|^2 is a quadratic in t
+    vv, cvb, vavb = vv[:, None], cvb[:, None], vavb[:, None]
+    ee = cc[:, None] - 2 * k * cvb + k * k * vv
+    ef = cva[:, None] - m * cvb - k * vavb + k * m * vv
+    ff = vava[:, None] - 2 * m * vavb + m * m * vv
+    curved = ff > 0
+    t_min = np.where(curved, np.clip(-ef / np.where(curved, ff, 1.0), left, right), left)
+    dist2 = ee + 2 * ef * t_min + ff * t_min * t_min
+    best = np.argmin(dist2, axis=1)
+    rows = np.arange(len(best))
+    return np.sqrt(np.maximum(dist2[rows, best], 0.0)), t_min[rows, best] + t0a
+
+
+class AnalyticConflictDetector:
+    def __init__(self, safety_buffer: float = 2.0, time_buffer: float = 2.0,
+                 cell_size: Optional[float] = None, time_cell: float = 10.0):
+        """
+        Initialize the analytic conflict detector.
+
+        Missions are treated as exactly piecewise linear between waypoints, so
+        no sampling time step is involved. Two drones conflict at time t (of
+        the first drone) when the first drone's position at t is within
+        ``safety_buffer`` of the second drone's position at some time u with
+        |t - u| <= ``time_buffer``, which is the same rule as ConflictDetector.
+
+        Args:
+            safety_buffer: Minimum separation distance in meters
+            time_buffer: Temporal tolerance in seconds
+            cell_size: Spatial grid cell edge in meters; enables the broad phase when set
+            time_cell: Temporal grid cell length in seconds for the broad phase
+        """
+        self.safety_buffer = safety_buffer  # meters
+        self.time_buffer = time_buffer  # seconds
+        self.cell_size = cell_size
+        self.time_cell = time_cell
+        self.broad_phase_stats: Optional[BroadPhaseStats] = None
+
+    def detect_conflicts(self, missions: List[Mission]) -> List[Conflict]:
+        """Detect conflicts between all missions as exact conflict intervals."""
+        conflicts = list(self.iter_conflicts(missions))
+        conflicts.sort(key=lambda c: (tuple(sorted([c.drone1_id, c.drone2_id])), c.time))
+        return conflicts
+
+    def iter_conflicts(self, missions: List[Mission]) -> Iterator[Conflict]:
+        """
+        Yield conflict events as soon as each drone pair is done.
+
+        Events come out in pair order and, within a pair, in time order.
+        """
+        if not missions:
+            return
+        epoch = min(m.start_time for m in missions)
+        segments = [MissionSegments.from_mission(m, epoch) for m in missions]
+        if self.cell_size is None:
+            # Compare each pair of missions
+            for i, seg1 in enumerate(segments):
+                for seg2 in segments[i+1:]:
+                    yield from self.check_pair(seg1, seg2)
+        else:
+            index = BroadPhaseIndex.from_missions(missions, safety_buffer=self.safety_buffer,
+                                                  time_buffer=self.time_buffer, cell_size=self.cell_size,
+                                                  time_cell=self.time_cell, epoch=epoch)
+            candidates = index.candidate_pairs()
+            self.broad_phase_stats = index.stats
+            by_id = {s.drone_id: s for s in segments}
+            for (id1, id2), pairs in candidates.items():
+                yield from self.check_pair(by_id[id1], by_id[id2], pairs)
+
+    def first_conflict(self, missions: List[Mission]) -> Optional[Conflict]:
+        """Return the first conflict event found, or None if the missions are clear."""
+        return next(self.iter_conflicts(missions), None)
+
+    def any_conflict(self, missions: List[Mission]) -> bool:
+        """Return True as soon as any conflict is found."""
+        return self.first_conflict(missions) is not None
+
+    def check_pair(self, seg1: MissionSegments, seg2: MissionSegments,
+                   segment_pairs: Optional[List[Tuple[int, int]]] = None) -> List[Conflict]:
+        """
+        Return the merged conflict intervals between two missions.
+
+        Args:
+            seg1: Segments of the first mission
+            seg2: Segments of the second mission
+            segment_pairs: Candidate (seg1, seg2) index pairs from a broad phase;
+                all time-aligned pairs are walked when omitted
+        """
+        if segment_pairs is None:
+            segment_pairs = [(a, b) for a in range(len(seg1))
+                             for b in seg2.overlapping(seg1.t0[a] - self.time_buffer, seg1.t1[a] + self.time_buffer)]
+        intervals = []
+        for a, b in segment_pairs:
+            hit = self.segment_pair_conflict(seg1, a, seg2, b)
+            if hit is not None:
+                intervals.append(hit + (a,))
+        return self._merge_intervals(seg1, seg2, intervals)
+
+    def segment_pair_conflict(self, seg1: MissionSegments, a: int,
+                              seg2: MissionSegments, b: int) -> Optional[Tuple[float, float, float, float]]:
+        """
+        Solve one segment pair in closed form.
+
+        Returns:
+            (start, end, minimum_distance, time_of_minimum) as offsets of the
+            first drone's time axis, or None if the segments never conflict
+        """
+        tb = self.time_buffer
+        # Local time axis starting at the first segment's start
+        a0 = float(seg1.t0[a])
+        A1 = float(seg1.t1[a]) - a0
+        B0 = float(seg2.t0[b]) - a0
+        B1 = float(seg2.t1[b]) - a0
+        lo_t = max(0.0, B0 - tb)
+        hi_t = min(A1, B1 + tb)
+        if lo_t > hi_t:
+            return None
+
+        va = seg1.velocity[a].tolist()
+        vb = seg2.velocity[b].tolist()
+        pa = seg1.p0[a].tolist()
+        pb = seg2.p0[b].tolist()
+        # d(t, u) = c + va * t - vb * u
+        c = [pa[k] - pb[k] + vb[k] * B0 for k in range(3)]
+
+        # Unconstrained closest u for a given t is alpha + beta * t
+        vv = _dot(vb, vb)
+        if vv > 0:
+            alpha = _dot(c, vb) / vv
+            beta = _dot(va, vb) / vv
+        else:
+            alpha, beta = B0, 0.0
+
+        # Times where the active constraint on u changes
+        breaks = [B0 + tb, B1 - tb]
+        if beta != 0:
+            breaks += [(B0 - alpha) / beta, (B1 - alpha) / beta]
+        if beta != 1:
+            breaks += [(-tb - alpha) / (beta - 1), (tb - alpha) / (beta - 1)]
+        knots = [lo_t] + sorted(x for x in breaks if lo_t < x < hi_t) + [hi_t]
+
+        limit = self.safety_buffer ** 2
+        start = end = None
+        best_dist2, best_t = math.inf, lo_t
+        for left, right in zip(knots[:-1], knots[1:]):
+            # u(t) = k + m * t on this piece
+            mid = 0.5 * (left + right)
+            if B0 >= mid - tb:
+                lo_k, lo_m = B0, 0.0
+            else:
+                lo_k, lo_m = -tb, 1.0
+            if B1 <= mid + tb:
+                hi_k, hi_m = B1, 0.0
+            else:
+                hi_k, hi_m = tb, 1.0
+            u_mid = alpha + beta * mid
+            if u_mid < lo_k + lo_m * mid:
+                k, m = lo_k, lo_m
+            elif u_mid > hi_k + hi_m * mid:
+                k, m = hi_k, hi_m
+            else:
+                k, m = alpha, beta
+
+            # d(t) = e + f * t, so |d|^2 is a quadratic in t
+            e = [c[i] - vb[i] * k for i in range(3)]
+            f = [va[i] - vb[i] * m for i in range(3)]
+            ff = _dot(f, f)
+            ef = _dot(e, f)
+            ee = _dot(e, e)
+
+            t_min = min(max(-ef / ff, left), right) if ff > 0 else left
+            dist2 = ee + 2 * ef * t_min + ff * t_min * t_min
+            if dist2 < best_dist2:
+                best_dist2, best_t = dist2, t_min
+
+            if ff > 0:
+                disc = ef * ef - ff * (ee - limit)
+                if disc < 0:
+                    continue
+                root = math.sqrt(disc)
+                r1 = max((-ef - root) / ff, left)
+                r2 = min((-ef + root) / ff, right)
+                if r1 > r2:
+                    continue
+            elif ee <= limit:
+                r1, r2 = left, right
+            else:
+                continue
+            start = r1 if start is None else min(start, r1)
+            end = r2 if end is None else max(end, r2)
+
+        if start is None:
+            return None
+        return start + a0, end + a0, math.sqrt(max(best_dist2, 0.0)), best_t + a0
+
+    def _merge_intervals(self, seg1: MissionSegments, seg2: MissionSegments,
+                         intervals: List[Tuple[float, float, float, float, int]]) -> List[Conflict]:
+        """Merge touching segment-pair intervals into single conflict events."""
+        if not intervals:
+            return []
+        intervals.sort(key=lambda x: x[0])
+        merged = []
+        current = list(intervals[0])
+        for start, end, dist, t_min, a in intervals[1:]:
+            if start <= current[1] + MERGE_TOLERANCE:
+                current[1] = max(current[1], end)
+                if dist < current[2]:
+                    current[2], current[3], current[4] = dist, t_min, a
+            else:
+                merged.append(current)
+                current = [start, end, dist, t_min, a]
+        merged.append(current)
+
+        return [Conflict(
+            drone1_id=seg1.drone_id,
+            drone2_id=seg2.drone_id,
+            time=seg1.epoch + timedelta(seconds=start),  # Start of conflict interval
+            location=seg1.position_at(a, t_min),  # Closest approach
+            distance=dist,
+            time_diff=end - start  # Duration of conflict
+        ) for start, end, dist, t_min, a in merged]
@@ -0,0 +1,131 @@
+"""
+Local load generator for the deconfliction service.
+
+Sends concurrent /check requests built from a seeded synthetic scenario and
+reports latency percentiles and throughput. With --spawn the service runs in
+the same process, so no external setup is needed.
+
+Usage (from the repository root):
+    python -m benchmarks.load_generator --spawn --concurrency 200 --requests 5000
+    python -m benchmarks.load_generator --port 8080 --concurrency 100
+"""
+from typing import Dict, List
+from datetime import datetime
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+import numpy as np
+from benchmarks.scenarios import ScenarioConfig, generate_scenario
+from service import build_service, serve
+
+
+async def _request(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, host: str,
+                   path: str, body: bytes) -> Dict:
+    writer.write(f"POST {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+                 f"Content-Length: {len(body)}\r\n\r\n".encode() + body)
+    await writer.drain()
+    status_line = await reader.readline()
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+    payload = await reader.readexactly(int(headers.get('content-length', 0)))
+    if b' 200 ' not in status_line:
+        raise RuntimeError(f"{status_line.decode().strip()}: {payload.decode()}")
+    return json.loads(payload)
+
+
+async def _client(host: str, port: int, bodies: List[bytes], latencies: List[float]) -> None:
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for body in bodies:
+            start = time.perf_counter()
+            await _request(reader, writer, host, '/check', body)
+            latencies.append((time.perf_counter() - start) * 1000)
+    finally:
+        writer.close()
+
+
+async def run_load(host: str, port: int, concurrency: int, requests: int, config: ScenarioConfig) -> Dict:
+    """Send ``requests`` checks over ``concurrency`` keep-alive connections."""
+    candidates = generate_scenario(config)['drones']
+    for k, drone in enumerate(candidates):
+        drone['drone_id'] = f'candidate{k}'
+    bodies = [json.dumps(candidates[k % len(candidates)]).encode() for k in range(requests)]
+    latencies: List[float] = []
+    start = time.perf_counter()
+    await asyncio.gather(*(_client(host, port, bodies[c::concurrency], latencies) for c in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    values = np.array(latencies)
+    return {
+        'requests': len(latencies),
+        'concurrency': concurrency,
+        'wall_time_s': elapsed,
+        'throughput_rps': len(latencies) / elapsed,
+        'latency_ms': {'p50': float(np.percentile(values, 50)), 'p90': float(np.percentile(values, 90)),
+                       'p99': float(np.percentile(values, 99)), 'max': float(values.max())},
+    }
+
+
+async def _spawn_and_run(args) -> Dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        filename = os.path.join(tmp, 'waypoints.json')
+        resident = ScenarioConfig(drones=args.residents, waypoints=args.waypoints, seed=args.seed)
+        with open(filename, 'w') as f:
+            json.dump(generate_scenario(resident), f)
+        service = build_service(filename, args.safety_buffer, args.time_buffer,
+                                global_start_time=datetime(2025, 1, 1), max_batch=args.max_batch,
+                                batch_window=args.batch_window_ms / 1000)
+    server = await serve(service, args.host, 0)
+    port = server.sockets[0].getsockname()[1]
+    candidates = ScenarioConfig(drones=min(args.requests, 1000), waypoints=args.waypoints,
+                                density=resident.drones / resident.side ** 2 * 1e6, seed=args.seed + 1)
+    # Candidates share the residents' airspace extent
+    candidates.density = resident.density * candidates.drones / resident.drones
+    try:
+        report = await run_load(args.host, port, args.concurrency, args.requests, candidates)
+    finally:
+        server.close()
+        await server.wait_closed()
+        await service.stop()
+    report['service'] = service.stats.to_dict()
+    report['residents'] = len(service.airspace)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load-test the deconfliction service')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--spawn', action='store_true', help='run the service in this process')
+    parser.add_argument('--residents', type=int, default=500, help='approved missions when spawning')
+    parser.add_argument('--waypoints', type=int, default=6)
+    parser.add_argument('--concurrency', type=int, default=100)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--safety-buffer', type=float, default=1.0)
+    parser.add_argument('--time-buffer', type=float, default=15.1)
+    parser.add_argument('--max-batch', type=int, default=64)
+    parser.add_argument('--batch-window-ms', type=float, default=1.0)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='write the JSON report to this file')
+    args = parser.parse_args()
+
+    if args.spawn:
+        report = asyncio.run(_spawn_and_run(args))
+    else:
+        config = ScenarioConfig(drones=min(args.requests, 1000), waypoints=args.waypoints, seed=args.seed + 1)
+        report = asyncio.run(run_load(args.host, args.port, args.concurrency, args.requests, config))
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
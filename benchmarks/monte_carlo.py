@@ -0,0 +1,72 @@
+"""
+Runtime of Monte Carlo conflict probabilities over timing jitter.
+
+Usage (from the repository root):
+    python -m benchmarks.monte_carlo --drones 500 --max-seconds 30
+"""
+from collections import Counter
+from datetime import datetime
+import argparse
+import json
+import time
+from flight_path_simulator import FlightPathSimulator
+from monte_carlo import MonteCarloConflictDetector, TimingJitter
+from benchmarks.scenarios import ScenarioConfig, build_missions
+
+START_TIME = datetime(2025, 1, 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark Monte Carlo conflict probabilities')
+    parser.add_argument('--drones', type=int, default=500)
+    parser.add_argument('--waypoints', type=int, default=8)
+    parser.add_argument('--density', type=float, default=50.0, help='drones per square kilometre')
+    parser.add_argument('--start-window', type=float, default=600.0)
+    parser.add_argument('--safety-buffer', type=float, default=5.0)
+    parser.add_argument('--time-buffer', type=float, default=2.0)
+    parser.add_argument('--delay-sigma', type=float, default=10.0, help='departure delay deviation in seconds')
+    parser.add_argument('--speed-sigma', type=float, default=0.05, help='relative speed deviation')
+    parser.add_argument('--realizations', type=int, default=10000, help='largest number of realizations')
+    parser.add_argument('--tolerance', type=float, default=0.02, help='confidence interval half-width to stop at')
+    parser.add_argument('--max-seconds', type=float, default=None, help='runtime budget')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--cell-size', type=float, default=50.0)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    config = ScenarioConfig(drones=args.drones, waypoints=args.waypoints, density=args.density,
+                            start_window=args.start_window, seed=args.seed)
+    missions = build_missions(config, START_TIME, FlightPathSimulator())
+    detector = MonteCarloConflictDetector(safety_buffer=args.safety_buffer, time_buffer=args.time_buffer,
+                                          jitter=TimingJitter(delay_sigma=args.delay_sigma,
+                                                              speed_sigma=args.speed_sigma),
+                                          cell_size=args.cell_size, time_cell=30.0, workers=args.workers)
+    started = time.perf_counter()
+    results = detector.conflict_probabilities(missions, max_realizations=args.realizations,
+                                              tolerance=args.tolerance, max_seconds=args.max_seconds,
+                                              seed=args.seed)
+    wall = time.perf_counter() - started
+    stats = detector.stats
+    report = {
+        'drones': args.drones,
+        'workers': detector.workers,
+        'wall_time_s': wall,
+        'realizations': stats.realizations,
+        'realizations_per_s': stats.realizations_per_second,
+        'stop_reason': stats.stop_reason,
+        'converged': stats.converged,
+        'drone_pairs_candidate': stats.drone_pairs,
+        'segment_pairs_candidate': stats.segment_pairs,
+        'pairs_with_conflicts': len(results),
+        'severity': dict(Counter(r.severity.value for r in results)),
+        'most_probable': [
+            {'pair': [r.drone1_id, r.drone2_id], 'probability': r.probability, 'half_width': r.half_width,
+             'min_distance': r.min_distance, 'severity': r.severity.value}
+            for r in results[:5]
+        ],
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+"""
+Sector query latency of the occupancy grid against scanning simulated flight paths.
+
+Usage (from the repository root):
+    python -m benchmarks.occupancy --drones 500 --queries 1000
+"""
+from datetime import datetime, timedelta
+import argparse
+import json
+import time
+import numpy as np
+from flight_path_simulator import FlightPathSimulator
+from occupancy import OccupancyGrid
+from resolver import shift_mission
+from trajectory import as_trajectory
+from benchmarks.scenarios import ScenarioConfig, build_missions
+
+START_TIME = datetime(2025, 1, 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark occupancy grid sector queries')
+    parser.add_argument('--drones', type=int, default=500)
+    parser.add_argument('--waypoints', type=int, default=8)
+    parser.add_argument('--density', type=float, default=50.0, help='drones per square kilometre')
+    parser.add_argument('--cell-size', type=float, default=50.0)
+    parser.add_argument('--time-bucket', type=float, default=10.0)
+    parser.add_argument('--queries', type=int, default=1000)
+    parser.add_argument('--updates', type=int, default=100, help='missions replaced incrementally')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    config = ScenarioConfig(drones=args.drones, waypoints=args.waypoints, density=args.density, seed=args.seed)
+    simulator = FlightPathSimulator()
+    missions = build_missions(config, START_TIME, simulator)
+
+    started = time.perf_counter()
+    grid = OccupancyGrid.from_missions(missions, cell_size=args.cell_size, time_bucket=args.time_bucket)
+    build = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for mission in missions[:args.updates]:
+        grid.insert(shift_mission(mission, delay=30.0))
+    update = (time.perf_counter() - started) / max(args.updates, 1)
+    for mission in missions[:args.updates]:
+        grid.insert(mission)
+
+    # Sectors of one cell per side and two time buckets, placed at random drone positions
+    rng = np.random.default_rng(args.seed + 1)
+    trajectories = [as_trajectory(simulator.simulate_flight_path(m)) for m in missions]
+    size, span = args.cell_size, timedelta(seconds=2 * args.time_bucket)
+    sectors = []
+    for k in rng.integers(0, len(trajectories), args.queries):
+        trajectory = trajectories[k]
+        row = int(rng.integers(0, len(trajectory)))
+        corner = np.floor(trajectory.positions[row] / size) * size
+        start = trajectory.epoch + timedelta(seconds=float(trajectory.times[row]))
+        sectors.append((tuple(corner + 1e-6), tuple(corner + size - 1e-6), start, start + span))
+
+    started = time.perf_counter()
+    grid_hits = [grid.query(lo, hi, start, end) for lo, hi, start, end in sectors]
+    query = (time.perf_counter() - started) / len(sectors)
+
+    def scan(lo, hi, start, end):
+        found = set()
+        for mission, trajectory in zip(missions, trajectories):
+            offset_lo = (start - trajectory.epoch).total_seconds()
+            offset_hi = (end - trajectory.epoch).total_seconds()
+            rows = slice(np.searchsorted(trajectory.times, offset_lo), np.searchsorted(trajectory.times, offset_hi,
+                                                                                        side='right'))
+            points = trajectory.positions[rows]
+            if np.any(np.all((points >= lo) & (points <= hi), axis=1)):
+                found.add(mission.drone_id)
+        return found
+
+    samples = sectors[:min(100, len(sectors))]
+    started = time.perf_counter()
+    scan_hits = [scan(*sector) for sector in samples]
+    scanned = (time.perf_counter() - started) / len(samples)
+
+    stats = grid.stats
+    report = {
+        'drones': args.drones,
+        'cells': stats.cells,
+        'cell_entries': stats.cell_entries,
+        'max_cell_occupancy': stats.max_cell_occupancy,
+        'build_s': build,
+        'update_ms_per_mission': update * 1e3,
+        'query_us': query * 1e6,
+        'scan_us': scanned * 1e6,
+        'speedup_vs_scan': scanned / query,
+        # The grid reports at cell and bucket resolution, so it finds every drone the scan finds
+        'scan_hits_covered': all(s <= g for s, g in zip(scan_hits, grid_hits)),
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
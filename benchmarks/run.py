@@ -0,0 +1,213 @@
+"""
+Benchmark the simulator, mission loader and conflict detectors on synthetic airspaces.
+
+Usage (from the repository root):
+    python -m benchmarks.run --preset medium --output bench_medium.json
+    python -m benchmarks.run --drones 100 --waypoints 8 --density 50 --compare bench_medium.json
+"""
+from typing import Callable, Dict, List, Optional
+from datetime import datetime
+import argparse
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+from flight_path_simulator import FlightPathSimulator
+from conflict_detector import ConflictDetector
+from windowed_detector import WindowedConflictDetector
+from analytic_detector import AnalyticConflictDetector
+from mission_store import MissionStore
+from trajectory_cache import TrajectoryCache
+from instrumentation import Metrics
+from benchmarks.scenarios import ScenarioConfig, PRESETS, build_missions, generate_scenario, write_scenario
+
+START_TIME = datetime(2025, 1, 1)
+
+
+def measure(func: Callable[[], object], repeat: int = 3) -> Dict:
+    """Best-of-``repeat`` wall time plus peak traced memory of one extra run."""
+    times = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - start)
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {'wall_time_s': min(times), 'wall_times_s': times, 'peak_memory_bytes': peak, 'result': result}
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'],
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(config: ScenarioConfig, time_step: float = 0.05, safety_buffer: float = 1.0,
+                   time_buffer: float = 15.1, repeat: int = 3, benchmarks: Optional[List[str]] = None,
+                   metrics: Optional[Metrics] = None, window: float = 300.0) -> Dict:
+    """
+    Run the selected benchmarks on one scenario and return a JSON-serializable report.
+
+    With ``metrics``, the simulate and detect benchmarks also record per-phase
+    timings and counters into it. ``detect_windowed`` simulates and detects
+    in ``window``-second windows, so its peak memory includes the simulation.
+    """
+    benchmarks = benchmarks or ['load', 'load_store', 'simulate', 'simulate_cached', 'detect', 'detect_windowed',
+                                'detect_analytic']
+    simulator = FlightPathSimulator(time_step=time_step, metrics=metrics)
+    missions = build_missions(config, START_TIME, simulator)
+    pairs = len(missions) * (len(missions) - 1) // 2
+    results = {}
+
+    if 'load' in benchmarks:
+        with tempfile.TemporaryDirectory() as tmp:
+            filename = os.path.join(tmp, 'waypoints.json')
+            write_scenario(config, filename)
+            m = measure(lambda: simulator.load_missions_from_file(filename, START_TIME), repeat)
+        results['load'] = {'wall_time_s': m['wall_time_s'], 'wall_times_s': m['wall_times_s'],
+                           'peak_memory_bytes': m['peak_memory_bytes'],
+                           'throughput': len(missions) / m['wall_time_s'], 'unit': 'missions/s'}
+
+    if 'load_store' in benchmarks:
+        with tempfile.TemporaryDirectory() as tmp:
+            MissionStore.write(tmp, generate_scenario(config))
+            # Open the store and touch every mission, the worst case for lazy loading
+            m = measure(lambda: list(simulator.load_missions_from_file(tmp, START_TIME)), repeat)
+        results['load_store'] = {'wall_time_s': m['wall_time_s'], 'wall_times_s': m['wall_times_s'],
+                                 'peak_memory_bytes': m['peak_memory_bytes'],
+                                 'throughput': len(missions) / m['wall_time_s'], 'unit': 'missions/s'}
+
+    flight_paths = {mission.drone_id: simulator.simulate_flight_path(mission) for mission in missions}
+    samples = sum(len(path) for path in flight_paths.values())
+    if 'simulate' in benchmarks:
+        m = measure(lambda: [simulator.simulate_flight_path(mission) for mission in missions], repeat)
+        results['simulate'] = {'wall_time_s': m['wall_time_s'], 'wall_times_s': m['wall_times_s'],
+                               'peak_memory_bytes': m['peak_memory_bytes'], 'samples': samples,
+                               'throughput': samples / m['wall_time_s'], 'unit': 'samples/s'}
+
+    if 'simulate_cached' in benchmarks:
+        # Warm cache: every mission is unchanged since the previous validation
+        cached = FlightPathSimulator(time_step=time_step, cache=TrajectoryCache())
+        for mission in missions:
+            cached.simulate_flight_path(mission)
+        m = measure(lambda: [cached.simulate_flight_path(mission) for mission in missions], repeat)
+        results['simulate_cached'] = {'wall_time_s': m['wall_time_s'], 'wall_times_s': m['wall_times_s'],
+                                      'peak_memory_bytes': m['peak_memory_bytes'], 'samples': samples,
+                                      'cache': cached.cache.stats.to_dict(),
+                                      'throughput': samples / m['wall_time_s'], 'unit': 'samples/s'}
+
+    if 'detect' in benchmarks:
+        detector = ConflictDetector(safety_buffer=safety_buffer, time_buffer=time_buffer, time_step=time_step,
+                                    metrics=metrics)
+        m = measure(lambda: detector.detect_conflicts(missions, flight_paths), repeat)
+        results['detect'] = {'wall_time_s': m['wall_time_s'], 'wall_times_s': m['wall_times_s'],
+                             'peak_memory_bytes': m['peak_memory_bytes'], 'pairs': pairs,
+                             'conflicts': len(m['result']),
+                             'throughput': pairs / m['wall_time_s'], 'unit': 'pairs/s'}
+
+    if 'detect_windowed' in benchmarks:
+        detector = ConflictDetector(safety_buffer=safety_buffer, time_buffer=time_buffer, time_step=time_step,
+                                    metrics=metrics)
+        windowed = WindowedConflictDetector(simulator, detector, window=window)
+        m = measure(lambda: windowed.detect_conflicts(missions), repeat)
+        results['detect_windowed'] = {'wall_time_s': m['wall_time_s'], 'wall_times_s': m['wall_times_s'],
+                                      'peak_memory_bytes': m['peak_memory_bytes'], 'pairs': pairs,
+                                      'conflicts': len(m['result']), 'window_s': window,
+                                      'windows': windowed.stats.windows,
+                                      'peak_samples': windowed.stats.peak_samples, 'total_samples': samples,
+                                      'throughput': pairs / m['wall_time_s'], 'unit': 'pairs/s'}
+
+    if 'detect_analytic' in benchmarks:
+        detector = AnalyticConflictDetector(safety_buffer=safety_buffer, time_buffer=time_buffer)
+        m = measure(lambda: detector.detect_conflicts(missions), repeat)
+        results['detect_analytic'] = {'wall_time_s': m['wall_time_s'], 'wall_times_s': m['wall_times_s'],
+                                      'peak_memory_bytes': m['peak_memory_bytes'], 'pairs': pairs,
+                                      'conflicts': len(m['result']),
+                                      'throughput': pairs / m['wall_time_s'], 'unit': 'pairs/s'}
+
+    return {
+        'revision': git_revision(),
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'scenario': config.to_dict(),
+        'parameters': {'time_step': time_step, 'safety_buffer': safety_buffer,
+                       'time_buffer': time_buffer, 'repeat': repeat, 'window': window},
+        'results': results
+    }
+
+
+def compare(report: Dict, baseline: Dict, threshold: float = 0.1) -> List[str]:
+    """Describe per-benchmark wall time changes against a baseline report."""
+    lines = []
+    for name, result in report['results'].items():
+        old = baseline.get('results', {}).get(name)
+        if old is None:
+            continue
+        ratio = result['wall_time_s'] / old['wall_time_s']
+        flag = 'REGRESSION' if ratio > 1 + threshold else ('improved' if ratio < 1 - threshold else 'same')
+        lines.append(f"{name:16s} {old['wall_time_s']:.4f}s -> {result['wall_time_s']:.4f}s "
+                     f"({ratio:.2f}x) {flag}")
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the UAV deconfliction pipeline')
+    parser.add_argument('--preset', choices=sorted(PRESETS), default='small')
+    parser.add_argument('--drones', type=int)
+    parser.add_argument('--waypoints', type=int)
+    parser.add_argument('--density', type=float, help='drones per square kilometre')
+    parser.add_argument('--start-window', type=float, help='departure spread in seconds')
+    parser.add_argument('--duration-spread', type=float, help='log-normal sigma of mission leg scale')
+    parser.add_argument('--seed', type=int)
+    parser.add_argument('--time-step', type=float, default=0.05)
+    parser.add_argument('--safety-buffer', type=float, default=1.0)
+    parser.add_argument('--time-buffer', type=float, default=15.1)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--only', nargs='+', choices=['load', 'load_store', 'simulate', 'simulate_cached', 'detect',
+                                                      'detect_windowed', 'detect_analytic'])
+    parser.add_argument('--window', type=float, default=300.0, help='window length in seconds for detect_windowed')
+    parser.add_argument('--output', help='write the JSON report to this file')
+    parser.add_argument('--compare', help='baseline JSON report to compare against')
+    parser.add_argument('--metrics', help='write per-phase metrics to this file (.json, otherwise Prometheus text)')
+    args = parser.parse_args()
+
+    config = ScenarioConfig(**PRESETS[args.preset].to_dict())
+    overrides = {'drones': args.drones, 'waypoints': args.waypoints, 'density': args.density,
+                 'start_window': args.start_window, 'duration_spread': args.duration_spread, 'seed': args.seed}
+    for key, value in overrides.items():
+        if value is not None:
+            setattr(config, key, value)
+
+    # Peak memory is already measured per benchmark; phase tracing would reset tracemalloc's peak
+    metrics = Metrics() if args.metrics else None
+    report = run_benchmarks(config, time_step=args.time_step, safety_buffer=args.safety_buffer,
+                            time_buffer=args.time_buffer, repeat=args.repeat, benchmarks=args.only, metrics=metrics,
+                            window=args.window)
+    for name, result in report['results'].items():
+        print(f"{name:16s} {result['wall_time_s']:.4f}s  peak {result['peak_memory_bytes'] / 1e6:.1f} MB  "
+              f"{result['throughput']:.1f} {result['unit']}")
+    if metrics is not None:
+        metrics.write(args.metrics)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print(f"\nCompared with {args.compare} (revision {baseline.get('revision')}):")
+        for line in compare(report, baseline):
+            print(line)
+
+
+if __name__ == '__main__':
+    main()
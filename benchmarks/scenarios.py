@@ -0,0 +1,103 @@
+from dataclasses import dataclass, asdict
+from typing import Dict, List
+from datetime import datetime
+import json
+import math
+import numpy as np
+from models import Mission
+from flight_path_simulator import FlightPathSimulator
+
+
+@dataclass
+class ScenarioConfig:
+    """
+    Parameters of a reproducible synthetic airspace.
+
+    Attributes:
+        drones: Number of missions
+        waypoints: Waypoints per mission
+        density: Drones per square kilometre; sets the side of the square airspace
+        altitude: (min, max) altitude in meters
+        speed: Nominal cruise speed in m/s
+        start_window: Missions depart uniformly within this many seconds
+        leg_length: Median distance between consecutive waypoints in meters
+        duration_spread: Log-normal sigma of the per-mission leg scale, which spreads mission durations
+        seed: Random seed
+    """
+    drones: int = 20
+    waypoints: int = 6
+    density: float = 20.0
+    altitude: tuple = (10.0, 120.0)
+    speed: float = 10.0
+    start_window: float = 300.0
+    leg_length: float = 150.0
+    duration_spread: float = 0.5
+    seed: int = 0
+
+    @property
+    def side(self) -> float:
+        """Side of the square airspace in meters."""
+        return math.sqrt(self.drones / self.density) * 1000.0
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+
+PRESETS = {
+    'small': ScenarioConfig(drones=10, waypoints=6),
+    'medium': ScenarioConfig(drones=50, waypoints=8, start_window=600.0),
+    'large': ScenarioConfig(drones=200, waypoints=10, start_window=1800.0),
+    'dense': ScenarioConfig(drones=100, waypoints=6, density=200.0, start_window=120.0),
+    # About two hours of flight per drone, for the windowed pipeline
+    'long': ScenarioConfig(drones=10, waypoints=500, density=200.0, start_window=600.0),
+}
+
+
+def generate_scenario(config: ScenarioConfig) -> Dict:
+    """Generate a scenario in the waypoints.json schema."""
+    rng = np.random.default_rng(config.seed)
+    side = config.side
+    drones = []
+    for i in range(config.drones):
+        scale = float(np.exp(rng.normal(0.0, config.duration_spread)))
+        position = np.array([rng.uniform(0, side), rng.uniform(0, side), rng.uniform(*config.altitude)])
+        waypoints = [position]
+        for _ in range(config.waypoints - 1):
+            heading = rng.uniform(0, 2 * math.pi)
+            step = config.leg_length * scale * rng.uniform(0.5, 1.5)
+            position = position + np.array([step * math.cos(heading), step * math.sin(heading), 0.0])
+            position[:2] = np.clip(position[:2], 0, side)
+            position[2] = rng.uniform(*config.altitude)
+            waypoints.append(position)
+        drones.append({
+            'drone_id': f'drone{i + 1}',
+            'start_time': round(float(rng.uniform(0, config.start_window)), 3),
+            'end_time': 0,
+            'speed': config.speed,
+            'waypoints': [{'x': round(float(p[0]), 3), 'y': round(float(p[1]), 3), 'z': round(float(p[2]), 3)}
+                          for p in waypoints]
+        })
+    return {'drones': drones}
+
+
+def write_scenario(config: ScenarioConfig, filename: str) -> None:
+    """Write a generated scenario to a JSON file."""
+    with open(filename, 'w') as f:
+        json.dump(generate_scenario(config), f)
+
+
+def build_missions(config: ScenarioConfig, start_time: datetime,
+                   simulator: FlightPathSimulator = None) -> List[Mission]:
+    """Generate a scenario and build its missions directly, without a file."""
+    simulator = simulator or FlightPathSimulator()
+    missions = []
+    for drone in generate_scenario(config)['drones']:
+        missions.append(simulator.create_mission_from_waypoints(
+            drone_id=drone['drone_id'],
+            waypoints=[(wp['x'], wp['y'], wp['z']) for wp in drone['waypoints']],
+            start_offset=drone['start_time'],
+            end_offset=drone['end_time'],
+            speed=drone['speed'],
+            global_start_time=start_time
+        ))
+    return missions
@@ -0,0 +1,90 @@
+"""
+Cold-start time of the detection core, the CLI and the visualization extra.
+
+Each target is imported in a fresh interpreter, and the median wall time
+over several runs is reported. The run fails (exit status 1) when the core
+pulls in matplotlib or another optional dependency, or when its median
+exceeds ``--max-core-ms``, so it can guard against startup regressions.
+
+Usage (from the repository root):
+    python -m benchmarks.startup --runs 10 --max-core-ms 300
+"""
+from typing import Dict, List, Optional
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CORE = 'import models, flight_path_simulator, conflict_detector, analytic_detector, airspace'
+TARGETS = {
+    'python': 'pass',
+    'numpy': 'import numpy',
+    'core': CORE,
+    'cli': 'import cli',
+    'example': 'import example',
+    'visualization': 'import visualization_4d',
+}
+# Modules that only the visualization extra may load
+OPTIONAL_MODULES = ('matplotlib', 'PIL', 'mpl_toolkits', 'scipy', 'pandas', 'PyQt5')
+
+
+def cold_start(code: str, runs: int) -> Optional[List[float]]:
+    """Wall times in milliseconds of running ``code`` in fresh interpreters, or None if it fails."""
+    times = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True)
+        times.append((time.perf_counter() - started) * 1e3)
+        if result.returncode != 0:
+            return None
+    return times
+
+
+def leaked_modules(code: str) -> List[str]:
+    """Optional dependencies loaded by ``code``."""
+    probe = f"{code}\nimport sys\nprint(' '.join(m for m in {OPTIONAL_MODULES!r} if m in sys.modules))"
+    result = subprocess.run([sys.executable, '-c', probe], cwd=ROOT, capture_output=True, text=True, check=True)
+    return result.stdout.split()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark cold-start import time')
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--max-core-ms', type=float, default=None,
+                        help='fail when the median cold start of the core exceeds this')
+    parser.add_argument('--output', help='also write the report to this JSON file')
+    args = parser.parse_args()
+
+    medians: Dict[str, Optional[float]] = {}
+    for name, code in TARGETS.items():
+        times = cold_start(code, args.runs)
+        medians[name] = statistics.median(times) if times else None
+    leaks = {name: leaked_modules(TARGETS[name]) for name in ('core', 'cli', 'example')}
+    report = {
+        'runs': args.runs,
+        'median_ms': medians,
+        # Time spent importing, without interpreter startup
+        'import_ms': {name: value - medians['python'] for name, value in medians.items()
+                      if value is not None and name != 'python'},
+        'optional_modules_loaded': leaks,
+    }
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    failures = [f"{name} loads {', '.join(modules)}" for name, modules in leaks.items() if modules]
+    if args.max_core_ms is not None and medians['core'] > args.max_core_ms:
+        failures.append(f"core cold start {medians['core']:.0f} ms exceeds {args.max_core_ms:.0f} ms")
+    for failure in failures:
+        print(f"FAIL: {failure}", file=sys.stderr)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
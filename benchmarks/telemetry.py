@@ -0,0 +1,83 @@
+"""
+Throughput and per-update latency of the live StreamMonitor.
+
+Telemetry is replayed from a seeded synthetic airspace: every mission is
+simulated and sampled at a fixed rate, and the states are fed to the monitor
+in time order.
+
+Usage (from the repository root):
+    python -m benchmarks.telemetry --drones 1000 --rate 10 --duration 30
+"""
+from typing import Dict, List
+from datetime import datetime, timedelta
+import argparse
+import json
+import time
+import numpy as np
+from models import DroneState
+from flight_path_simulator import FlightPathSimulator
+from live_monitor import StreamMonitor
+from benchmarks.scenarios import ScenarioConfig, build_missions
+
+START_TIME = datetime(2025, 1, 1)
+
+
+def generate_telemetry(config: ScenarioConfig, rate: float, duration: float, offset: float) -> List[DroneState]:
+    """Sample every airborne drone ``rate`` times per second for ``duration`` seconds, in time order."""
+    simulator = FlightPathSimulator(time_step=0.1)
+    missions = build_missions(config, START_TIME, simulator)
+    flight_paths = {m.drone_id: simulator.simulate_flight_path(m) for m in missions}
+    drone_ids = [m.drone_id for m in missions]
+    times = [START_TIME + timedelta(seconds=offset + k / rate) for k in range(int(duration * rate))]
+    positions, velocities = simulator.get_states_at_times(flight_paths, drone_ids, times)
+    states = []
+    for t, timestamp in enumerate(times):
+        for d in np.flatnonzero(~np.isnan(positions[:, t, 0])).tolist():
+            states.append(DroneState(drone_id=drone_ids[d], timestamp=timestamp,
+                                     position=tuple(positions[d, t].tolist()),
+                                     velocity=tuple(velocities[d, t].tolist())))
+    return states
+
+
+def run(states: List[DroneState], monitor: StreamMonitor) -> Dict:
+    latencies = np.empty(len(states))
+    reports = 0
+    clock = time.perf_counter
+    started = clock()
+    for k, state in enumerate(states):
+        t0 = clock()
+        reports += len(monitor.update(state))
+        latencies[k] = clock() - t0
+    wall = clock() - started
+    latencies_us = latencies * 1e6
+    return {
+        'updates': len(states),
+        'drones': len(monitor),
+        'reports': reports,
+        'wall_time_s': wall,
+        'throughput_ups': len(states) / wall,
+        'latency_us': {'p50': float(np.percentile(latencies_us, 50)), 'p99': float(np.percentile(latencies_us, 99)),
+                       'p999': float(np.percentile(latencies_us, 99.9)), 'max': float(latencies_us.max())},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the live telemetry monitor')
+    parser.add_argument('--drones', type=int, default=1000)
+    parser.add_argument('--density', type=float, default=20.0, help='drones per square kilometre')
+    parser.add_argument('--rate', type=float, default=10.0, help='updates per drone per second')
+    parser.add_argument('--duration', type=float, default=30.0, help='seconds of telemetry to replay')
+    parser.add_argument('--safety-buffer', type=float, default=5.0)
+    parser.add_argument('--horizon', type=float, default=10.0)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    # Short departure window so nearly every drone is airborne during the replay
+    config = ScenarioConfig(drones=args.drones, density=args.density, waypoints=8, start_window=20.0, seed=args.seed)
+    states = generate_telemetry(config, args.rate, args.duration, offset=config.start_window)
+    monitor = StreamMonitor(safety_buffer=args.safety_buffer, horizon=args.horizon, max_speed=config.speed * 1.5)
+    print(json.dumps(run(states, monitor), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+"""
+Throughput of batch what-if evaluation against looping over the per-mission API.
+
+Candidates are random variants (lateral/vertical jitter and departure time)
+of one base route, checked against a seeded synthetic airspace of residents.
+
+Usage (from the repository root):
+    python -m benchmarks.what_if --candidates 2000 --residents 200
+"""
+from typing import Callable, Dict, List, Tuple
+from datetime import datetime
+import argparse
+import json
+import time
+import numpy as np
+from flight_path_simulator import FlightPathSimulator
+from conflict_detector import ConflictDetector
+from airspace import Airspace
+from what_if import WhatIfEvaluator
+from benchmarks.scenarios import ScenarioConfig, build_missions
+
+START_TIME = datetime(2025, 1, 1)
+
+
+def generate_candidates(count: int, side: float, waypoints: int, seed: int) -> Tuple[List, np.ndarray]:
+    """Waypoint lists jittered around one base route, and their departure offsets."""
+    rng = np.random.default_rng(seed)
+    base = np.column_stack((rng.uniform(0, side, waypoints), rng.uniform(0, side, waypoints),
+                            np.full(waypoints, 60.0)))
+    jitter = np.concatenate((rng.normal(0.0, side / 20, (count, waypoints, 2)),
+                             rng.uniform(-40.0, 40.0, (count, waypoints, 1))), axis=2)
+    lists = [[tuple(p) for p in route.tolist()] for route in base + jitter]
+    return lists, rng.uniform(0.0, 300.0, count)
+
+
+def per_candidate(func: Callable[[int], object], count: int) -> float:
+    """Mean seconds per candidate over the first ``count`` candidates."""
+    started = time.perf_counter()
+    for k in range(count):
+        func(k)
+    return (time.perf_counter() - started) / count
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark batch what-if evaluation')
+    parser.add_argument('--candidates', type=int, default=2000)
+    parser.add_argument('--residents', type=int, default=200)
+    parser.add_argument('--waypoints', type=int, default=8, help='waypoints per candidate')
+    parser.add_argument('--density', type=float, default=50.0, help='resident drones per square kilometre')
+    parser.add_argument('--safety-buffer', type=float, default=5.0)
+    parser.add_argument('--time-buffer', type=float, default=2.0)
+    parser.add_argument('--loop-samples', type=int, default=3,
+                        help='candidates timed with the per-mission detect_conflicts loop')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    config = ScenarioConfig(drones=args.residents, density=args.density, waypoints=8, seed=args.seed)
+    simulator = FlightPathSimulator()
+    residents = build_missions(config, START_TIME, simulator)
+    lists, offsets = generate_candidates(args.candidates, config.side, args.waypoints, args.seed + 1)
+    sb, tb = args.safety_buffer, args.time_buffer
+
+    evaluator = WhatIfEvaluator(residents, safety_buffer=sb, time_buffer=tb, simulator=simulator)
+    started = time.perf_counter()
+    result = evaluator.evaluate_waypoints(lists, offsets, 0, config.speed, START_TIME)
+    batch = time.perf_counter() - started
+
+    # Current API: build each variant and run detect_conflicts over it and the residents
+    detector = ConflictDetector(safety_buffer=sb, time_buffer=tb, time_step=simulator.time_step)
+    flight_paths = {m.drone_id: simulator.simulate_flight_path(m) for m in residents}
+
+    def detect_loop(k: int):
+        candidate = simulator.create_mission_from_waypoints('candidate', lists[k], float(offsets[k]), 0,
+                                                            config.speed, START_TIME)
+        paths = dict(flight_paths, candidate=simulator.simulate_flight_path(candidate))
+        return detector.detect_conflicts([candidate] + residents, paths)
+
+    # Persistent airspace: only the candidate is checked, with the exact analytic detector
+    airspace = Airspace(safety_buffer=sb, time_buffer=tb, cell_size=100.0, time_cell=30.0)
+    airspace.commit_all(residents)
+
+    def airspace_loop(k: int):
+        candidate = simulator.create_mission_from_waypoints('candidate', lists[k], float(offsets[k]), 0,
+                                                            config.speed, START_TIME)
+        return airspace.check(candidate)
+
+    detect_seconds = per_candidate(detect_loop, min(args.loop_samples, args.candidates))
+    airspace_seconds = per_candidate(airspace_loop, min(200, args.candidates))
+    batch_seconds = batch / args.candidates
+    report: Dict = {
+        'candidates': args.candidates,
+        'residents': args.residents,
+        'clear': int(result.clear.sum()),
+        'batch_wall_time_s': batch,
+        'batch_candidates_per_s': 1 / batch_seconds,
+        'detect_loop_candidates_per_s': 1 / detect_seconds,
+        'airspace_loop_candidates_per_s': 1 / airspace_seconds,
+        'speedup_vs_detect_loop': detect_seconds / batch_seconds,
+        'speedup_vs_airspace_loop': airspace_seconds / batch_seconds,
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
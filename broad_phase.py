@@ -0,0 +1,396 @@
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Set, Tuple
+from datetime import datetime
+import math
+import numpy as np
+from models import Mission
+
+Box = Tuple[float, float, float, float, float, float, float, float]  # x, y, z, t minima then maxima
+Cell = Tuple[int, int, int, int]
+SegmentPairs = Dict[Tuple[str, str], List[Tuple[int, int]]]
+
+
+@dataclass
+class BroadPhaseStats:
+    """Pruning statistics of the last broad-phase pass, for tuning the grid cell size."""
+    drones: int = 0
+    segments: int = 0
+    boxes: int = 0
+    cells: int = 0
+    cell_entries: int = 0
+    max_cell_occupancy: int = 0
+    box_tests: int = 0
+    drone_pairs_total: int = 0
+    drone_pairs_candidate: int = 0
+    segment_pairs_total: int = 0
+    segment_pairs_candidate: int = 0
+
+    @property
+    def drone_pair_pruning(self) -> float:
+        """Fraction of drone pairs discarded by the broad phase."""
+        if self.drone_pairs_total == 0:
+            return 0.0
+        return 1.0 - self.drone_pairs_candidate / self.drone_pairs_total
+
+    @property
+    def segment_pair_pruning(self) -> float:
+        """Fraction of segment pairs discarded by the broad phase."""
+        if self.segment_pairs_total == 0:
+            return 0.0
+        return 1.0 - self.segment_pairs_candidate / self.segment_pairs_total
+
+
+@dataclass(eq=False)
+class BatchCandidates:
+    """
+    Candidate segment pairs of a batch of missions against the indexed missions.
+
+    Pairs are sorted by mission, then resident, then segment indices.
+
+    Attributes:
+        drone_ids: Indexed drone ids that ``resident`` refers to
+        mission: Position of each pair's mission in the batch, shape (P,)
+        resident: Position of each pair's resident in ``drone_ids``, shape (P,)
+        mission_segment: Segment index in the batch mission, shape (P,)
+        resident_segment: Segment index in the resident mission, shape (P,)
+    """
+    drone_ids: List[str]
+    mission: np.ndarray
+    resident: np.ndarray
+    mission_segment: np.ndarray
+    resident_segment: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.mission)
+
+
+@dataclass(eq=False)
+class _GridSnapshot:
+    """Array copy of the grid: box rows of every indexed mission and their cell keys in sorted order."""
+    drone_ids: List[str]
+    owner: np.ndarray
+    segment: np.ndarray
+    boxes: np.ndarray
+    keys: np.ndarray
+    entries: np.ndarray
+    origin: np.ndarray
+    shape: np.ndarray
+
+
+class BroadPhaseIndex:
+    def __init__(self, safety_buffer: float = 2.0, time_buffer: float = 2.0,
+                 cell_size: float = 25.0, time_cell: float = 10.0, epoch: Optional[datetime] = None):
+        """
+        Uniform 4D grid over per-segment bounding boxes of missions.
+
+        Each waypoint segment is cut into slices of at most ``time_cell``
+        seconds, and every slice's (x, y, z, t) bounding box is grown by half
+        of ``safety_buffer`` and ``time_buffer`` on each side. Two slices can
+        only hold a conflict when their grown boxes overlap, so the index
+        never discards a pair that the narrow phase would report.
+
+        Args:
+            safety_buffer: Minimum separation distance in meters
+            time_buffer: Temporal tolerance in seconds
+            cell_size: Spatial grid cell edge in meters
+            time_cell: Temporal grid cell length in seconds
+            epoch: Reference time for the time axis (defaults to the first mission's start)
+        """
+        self.safety_buffer = safety_buffer
+        self.time_buffer = time_buffer
+        self.cell_size = cell_size
+        self.time_cell = time_cell
+        self.epoch = epoch
+        self.stats = BroadPhaseStats()
+        self._grid: Dict[Cell, List[Tuple[str, int, Box]]] = {}
+        self._cells: Dict[str, Set[Cell]] = {}
+        self._segment_counts: Dict[str, int] = {}
+        self._box_counts: Dict[str, int] = {}
+        self._box_arrays: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        self._entry_count = 0
+        self._snapshot: Optional[_GridSnapshot] = None
+
+    def __len__(self) -> int:
+        return len(self._cells)
+
+    def __contains__(self, drone_id: str) -> bool:
+        return drone_id in self._cells
+
+    @property
+    def drone_ids(self) -> List[str]:
+        return list(self._cells.keys())
+
+    def mission_boxes(self, mission: Mission) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Grown bounding boxes of the time slices of each waypoint segment, as arrays.
+
+        Returns:
+            Segment index of each box, shape (B,), and the boxes as x, y, z, t
+            minima then maxima, shape (B, 8)
+        """
+        _, segment, boxes = self.batch_boxes([mission])
+        return segment, boxes
+
+    def batch_boxes(self, missions: List[Mission]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Grown slice boxes of several missions at once.
+
+        Returns:
+            Batch position of each box's mission, its segment index, shape (B,),
+            and the boxes, shape (B, 8)
+        """
+        if self.epoch is None:
+            self.epoch = min(m.start_time for m in missions)
+        # A single waypoint is a stationary point in time
+        waypoint_lists = [m.waypoints * 2 if len(m.waypoints) == 1 else m.waypoints for m in missions]
+        counts = np.array([len(w) for w in waypoint_lists])
+        times = np.array([(wp.timestamp - self.epoch).total_seconds() for w in waypoint_lists for wp in w])
+        positions = np.array([(wp.x, wp.y, wp.z) for w in waypoint_lists for wp in w], dtype=np.float64)
+        # Consecutive waypoints of the same mission form a segment
+        first = np.cumsum(counts) - counts
+        rows = np.delete(np.arange(len(times) - 1), (first + counts - 1)[:-1])
+        owner = np.repeat(np.arange(len(missions)), counts - 1)
+        index = rows - first[owner]
+
+        t1, t2 = times[rows], times[rows + 1]
+        slices = np.maximum(1, np.ceil((t2 - t1) / self.time_cell)).astype(np.int64)
+        segment = np.repeat(np.arange(len(rows)), slices)
+        k = np.arange(len(segment)) - np.repeat(np.cumsum(slices) - slices, slices)
+        r0 = k / slices[segment]
+        r1 = (k + 1) / slices[segment]
+        p1 = positions[rows][segment]
+        delta = (positions[rows + 1] - positions[rows])[segment]
+        start = p1 + delta * r0[:, None]
+        end = p1 + delta * r1[:, None]
+        span = (t2 - t1)[segment]
+        boxes = np.column_stack((np.minimum(start, end) - self.safety_buffer / 2,
+                                 t1[segment] + span * r0 - self.time_buffer / 2,
+                                 np.maximum(start, end) + self.safety_buffer / 2,
+                                 t1[segment] + span * r1 + self.time_buffer / 2))
+        return owner[segment], index[segment], boxes
+
+    def segment_boxes(self, mission: Mission) -> List[Tuple[int, Box]]:
+        """Grown bounding boxes of the time slices of each waypoint segment."""
+        segment, boxes = self.mission_boxes(mission)
+        return list(zip(segment.tolist(), map(tuple, boxes.tolist())))
+
+    def _cell_rows(self, boxes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Expand boxes of shape (B, 8) into a box index and (i, j, k, l) cell row per cell they touch."""
+        sizes = np.array([self.cell_size, self.cell_size, self.cell_size, self.time_cell])
+        lo = np.floor(boxes[:, :4] / sizes).astype(np.int64)
+        counts = np.floor(boxes[:, 4:] / sizes).astype(np.int64) - lo + 1
+        totals = counts.prod(axis=1)
+        owner = np.repeat(np.arange(len(boxes)), totals)
+        rest = np.arange(len(owner)) - np.repeat(np.cumsum(totals) - totals, totals)
+        cells = lo[owner]
+        for d in range(3, -1, -1):
+            cells[:, d] += rest % counts[owner, d]
+            rest //= counts[owner, d]
+        return owner, cells
+
+    def _box_cells(self, box: Box) -> List[Cell]:
+        sizes = (self.cell_size, self.cell_size, self.cell_size, self.time_cell)
+        ranges = [range(math.floor(box[d] / sizes[d]), math.floor(box[d + 4] / sizes[d]) + 1) for d in range(4)]
+        return [(i, j, k, l) for i in ranges[0] for j in ranges[1] for k in ranges[2] for l in ranges[3]]
+
+    def insert(self, mission: Mission) -> None:
+        """Add a mission to the index, replacing any mission with the same drone id."""
+        if mission.drone_id in self._cells:
+            self.remove(mission.drone_id)
+        cells = set()
+        segment, box_array = self.mission_boxes(mission)
+        boxes = list(zip(segment.tolist(), map(tuple, box_array.tolist())))
+        for index, box in boxes:
+            for cell in self._box_cells(box):
+                self._grid.setdefault(cell, []).append((mission.drone_id, index, box))
+                cells.add(cell)
+                self._entry_count += 1
+        self._cells[mission.drone_id] = cells
+        self._segment_counts[mission.drone_id] = max(len(mission.waypoints) - 1, 1)
+        self._box_counts[mission.drone_id] = len(boxes)
+        self._box_arrays[mission.drone_id] = (segment, box_array)
+        self._snapshot = None
+
+    def remove(self, drone_id: str) -> None:
+        """Remove a mission from the index."""
+        for cell in self._cells.pop(drone_id, ()):
+            entries = [e for e in self._grid[cell] if e[0] != drone_id]
+            self._entry_count -= len(self._grid[cell]) - len(entries)
+            if entries:
+                self._grid[cell] = entries
+            else:
+                del self._grid[cell]
+        self._segment_counts.pop(drone_id, None)
+        self._box_counts.pop(drone_id, None)
+        self._box_arrays.pop(drone_id, None)
+        self._snapshot = None
+
+    @staticmethod
+    def _overlap(a: Box, b: Box) -> bool:
+        return (a[0] <= b[4] and b[0] <= a[4] and a[1] <= b[5] and b[1] <= a[5] and
+                a[2] <= b[6] and b[2] <= a[6] and a[3] <= b[7] and b[3] <= a[7])
+
+    def query(self, mission: Mission) -> Dict[str, List[Tuple[int, int]]]:
+        """
+        Find resident missions that could conflict with a mission that is not in the index.
+
+        Returns:
+            Mapping of resident drone id to sorted (mission segment, resident segment) pairs
+        """
+        candidates: Dict[str, Set[Tuple[int, int]]] = {}
+        tests = 0
+        occupancy = 0
+        grid = self._grid
+        for index, box in self.segment_boxes(mission):
+            for cell in self._box_cells(box):
+                entries = grid.get(cell)
+                if not entries:
+                    continue
+                if len(entries) > occupancy:
+                    occupancy = len(entries)
+                for drone_id, other_index, other_box in entries:
+                    if drone_id == mission.drone_id:
+                        continue
+                    found = candidates.get(drone_id)
+                    if found is not None and (index, other_index) in found:
+                        continue
+                    tests += 1
+                    if self._overlap(box, other_box):
+                        candidates.setdefault(drone_id, set()).add((index, other_index))
+
+        own_segments = max(len(mission.waypoints) - 1, 1)
+        resident_segments = sum(self._segment_counts.values()) - self._segment_counts.get(mission.drone_id, 0)
+        self.stats = BroadPhaseStats(
+            drones=len(self._cells) - (mission.drone_id in self._cells),
+            segments=resident_segments,
+            boxes=sum(self._box_counts.values()) - self._box_counts.get(mission.drone_id, 0),
+            cells=len(self._grid),
+            cell_entries=self._entry_count,
+            max_cell_occupancy=occupancy,
+            box_tests=tests,
+            drone_pairs_total=len(self._cells) - (mission.drone_id in self._cells),
+            drone_pairs_candidate=len(candidates),
+            segment_pairs_total=own_segments * resident_segments,
+            segment_pairs_candidate=sum(len(v) for v in candidates.values())
+        )
+        return {d: sorted(pairs) for d, pairs in candidates.items()}
+
+    def _build_snapshot(self) -> _GridSnapshot:
+        drone_ids = list(self._box_arrays)
+        segments = [self._box_arrays[drone_id][0] for drone_id in drone_ids]
+        boxes = np.concatenate([self._box_arrays[drone_id][1] for drone_id in drone_ids])
+        owner = np.repeat(np.arange(len(drone_ids)), [len(s) for s in segments])
+        box, cells = self._cell_rows(boxes)
+        origin = cells.min(axis=0)
+        shape = cells.max(axis=0) - origin + 1
+        keys = np.ravel_multi_index(tuple((cells - origin).T), tuple(shape))
+        order = np.argsort(keys, kind='stable')
+        return _GridSnapshot(drone_ids=drone_ids, owner=owner, segment=np.concatenate(segments), boxes=boxes,
+                             keys=keys[order], entries=box[order], origin=origin, shape=shape)
+
+    def query_many(self, missions: List[Mission]) -> BatchCandidates:
+        """
+        Find the candidate segment pairs of several missions that are not in the index in one pass.
+
+        Gives the same pairs as calling query for each mission, but the cell
+        lookups and box tests of the whole batch run as array operations on a
+        snapshot of the grid, which is rebuilt after the index changes.
+        """
+        empty = np.zeros(0, dtype=np.int64)
+        if not missions or not self._cells:
+            self.stats = BroadPhaseStats(drones=len(self._cells))
+            return BatchCandidates(self.drone_ids, empty, empty, empty, empty)
+        if self._snapshot is None:
+            self._snapshot = self._build_snapshot()
+        grid = self._snapshot
+        mission, segment, boxes = self.batch_boxes(missions)
+
+        # Look up every cell of every batch box; cells outside the grid's extent are empty
+        box, cells = self._cell_rows(boxes)
+        cells -= grid.origin
+        inside = np.all((cells >= 0) & (cells < grid.shape), axis=1)
+        box = box[inside]
+        keys = np.ravel_multi_index(tuple(cells[inside].T), tuple(grid.shape))
+        first = np.searchsorted(grid.keys, keys, side='left')
+        counts = np.searchsorted(grid.keys, keys, side='right') - first
+        probe = np.repeat(box, counts)
+        other = grid.entries[np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - first - counts, counts)]
+
+        # A resident with the mission's own drone id is ignored, as in query
+        position = {drone_id: i for i, drone_id in enumerate(grid.drone_ids)}
+        own = np.array([position.get(m.drone_id, -1) for m in missions])
+        keep = grid.owner[other] != own[mission[probe]]
+        probe, other = probe[keep], other[keep]
+        a, b = boxes[probe], grid.boxes[other]
+        hit = np.all(a[:, :4] <= b[:, 4:], axis=1) & np.all(b[:, :4] <= a[:, 4:], axis=1)
+        pairs = np.unique(np.column_stack((mission[probe[hit]], grid.owner[other[hit]],
+                                           segment[probe[hit]], grid.segment[other[hit]])), axis=0)
+        pairs = pairs.reshape(-1, 4)
+
+        resident_segments = sum(self._segment_counts.values())
+        segment_pairs_total = sum(max(len(m.waypoints) - 1, 1) *
+                                  (resident_segments - self._segment_counts.get(m.drone_id, 0)) for m in missions)
+        self.stats = BroadPhaseStats(
+            drones=len(self._cells),
+            segments=resident_segments,
+            boxes=len(grid.boxes),
+            cells=len(self._grid),
+            cell_entries=self._entry_count,
+            max_cell_occupancy=int(counts.max(initial=0)),
+            box_tests=len(probe),
+            drone_pairs_total=len(missions) * len(self._cells) - int((own >= 0).sum()),
+            drone_pairs_candidate=len(np.unique(pairs[:, :2], axis=0)),
+            segment_pairs_total=segment_pairs_total,
+            segment_pairs_candidate=len(pairs)
+        )
+        return BatchCandidates(grid.drone_ids, pairs[:, 0], pairs[:, 1], pairs[:, 2], pairs[:, 3])
+
+    def candidate_pairs(self) -> SegmentPairs:
+        """
+        Find all pairs of indexed missions that could conflict.
+
+        Returns:
+            Mapping of (drone id, drone id) in insertion order to sorted segment index pairs
+        """
+        order = {drone_id: i for i, drone_id in enumerate(self._cells)}
+        candidates: Dict[Tuple[str, str], Set[Tuple[int, int]]] = {}
+        tests = 0
+        for cell_entries in self._grid.values():
+            for i, (id1, seg1, box1) in enumerate(cell_entries):
+                for id2, seg2, box2 in cell_entries[i+1:]:
+                    if id1 == id2:
+                        continue
+                    tests += 1
+                    if not self._overlap(box1, box2):
+                        continue
+                    if order[id1] < order[id2]:
+                        candidates.setdefault((id1, id2), set()).add((seg1, seg2))
+                    else:
+                        candidates.setdefault((id2, id1), set()).add((seg2, seg1))
+
+        counts = list(self._segment_counts.values())
+        total_segments = sum(counts)
+        self.stats = BroadPhaseStats(
+            drones=len(self._cells),
+            segments=total_segments,
+            boxes=sum(self._box_counts.values()),
+            cells=len(self._grid),
+            cell_entries=self._entry_count,
+            max_cell_occupancy=max((len(v) for v in self._grid.values()), default=0),
+            box_tests=tests,
+            drone_pairs_total=len(counts) * (len(counts) - 1) // 2,
+            drone_pairs_candidate=len(candidates),
+            segment_pairs_total=(total_segments ** 2 - sum(c * c for c in counts)) // 2,
+            segment_pairs_candidate=sum(len(v) for v in candidates.values())
+        )
+        return {pair: sorted(segs) for pair, segs in candidates.items()}
+
+    @classmethod
+    def from_missions(cls, missions: List[Mission], **kwargs) -> 'BroadPhaseIndex':
+        """Build an index over a list of missions."""
+        index = cls(**kwargs)
+        if index.epoch is None and missions:
+            index.epoch = min(m.start_time for m in missions)
+        for mission in missions:
+            index.insert(mission)
+        return index
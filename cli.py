@@ -0,0 +1,93 @@
+"""
+Headless conflict checks from the command line.
+
+Only the NumPy core is imported; matplotlib is loaded just for --render.
+The exit status is 0 when no conflicts are found and 1 otherwise, so the
+command can gate validation jobs directly.
+
+Usage:
+    python cli.py waypoints.json                           # all missions against each other
+    python cli.py waypoints.json --check candidate.json    # candidates against the approved missions
+    python cli.py waypoints.store --check candidate.json --json
+"""
+from datetime import datetime
+from typing import List, Optional, Sequence
+import argparse
+import json
+import sys
+from models import Mission, Conflict, conflict_to_dict
+from flight_path_simulator import FlightPathSimulator
+from analytic_detector import AnalyticConflictDetector
+from airspace import Airspace
+
+
+def check_all(missions: List[Mission], args: argparse.Namespace) -> List[Conflict]:
+    """Conflicts between all missions."""
+    detector = AnalyticConflictDetector(safety_buffer=args.safety_buffer, time_buffer=args.time_buffer,
+                                        cell_size=args.cell_size, time_cell=args.time_cell)
+    return detector.detect_conflicts(missions)
+
+
+def check_candidates(missions: Sequence[Mission], candidates: Sequence[Mission], args: argparse.Namespace,
+                     start_time: datetime) -> List[Conflict]:
+    """Conflicts of each candidate with the approved missions; candidates are not checked against each other."""
+    airspace = Airspace(safety_buffer=args.safety_buffer, time_buffer=args.time_buffer, cell_size=args.cell_size,
+                        time_cell=args.time_cell, epoch=start_time)
+    airspace.commit_all(list(missions))
+    return [conflict for candidate in candidates for conflict in airspace.check(candidate)]
+
+
+def render(filename: str, missions: Sequence[Mission], conflicts: List[Conflict],
+           simulator: FlightPathSimulator) -> None:
+    """Render the missions and conflicts offscreen; needs the visualization extra."""
+    from visualization_4d import render_mission_4d
+    flight_paths = {mission.drone_id: simulator.simulate_flight_path(mission) for mission in missions}
+    render_mission_4d(flight_paths, conflicts, filename)
+
+
+def print_report(conflicts: List[Conflict], checked: int) -> None:
+    print(f"Checked {checked} missions: {len(conflicts)} conflicts")
+    for conflict in conflicts:
+        x, y, z = conflict.location
+        print(f"  {conflict.drone1_id} & {conflict.drone2_id} at {conflict.time.isoformat()} "
+              f"({x:.1f}, {y:.1f}, {z:.1f}): {conflict.distance:.2f}m for {conflict.time_diff:.2f}s")
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Check missions for conflicts without a display')
+    parser.add_argument('missions', help='approved missions (waypoints.json schema or mission store)')
+    parser.add_argument('--check', help='candidate missions to check against the approved ones (JSON file)')
+    parser.add_argument('--start-time', type=datetime.fromisoformat, default=None,
+                        help='ISO time that mission offsets count from (defaults to now)')
+    parser.add_argument('--safety-buffer', type=float, default=1.0)
+    parser.add_argument('--time-buffer', type=float, default=15.1)
+    parser.add_argument('--cell-size', type=float, default=100.0, help='broad-phase cell edge in meters')
+    parser.add_argument('--time-cell', type=float, default=30.0, help='broad-phase cell length in seconds')
+    parser.add_argument('--json', action='store_true', help='print the conflicts as JSON')
+    parser.add_argument('--render', metavar='FILE', help='also render an image (needs requirements-viz.txt)')
+    args = parser.parse_args(argv)
+
+    start_time = args.start_time or datetime.now()
+    simulator = FlightPathSimulator()
+    missions = simulator.load_missions_from_file(args.missions, start_time)
+    if args.check:
+        candidates = simulator.load_missions_from_file(args.check, start_time)
+        conflicts = check_candidates(missions, candidates, args, start_time)
+        checked = len(candidates)
+        missions = list(missions) + list(candidates)
+    else:
+        conflicts = check_all(list(missions), args)
+        checked = len(missions)
+
+    if args.json:
+        print(json.dumps({'checked': checked, 'clear': not conflicts,
+                          'conflicts': [conflict_to_dict(c) for c in conflicts]}, indent=2))
+    else:
+        print_report(conflicts, checked)
+    if args.render:
+        render(args.render, missions, conflicts, simulator)
+    return 1 if conflicts else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,229 @@
+"""
+Struct-of-arrays containers for many missions and conflicts.
+
+Times are float64 second offsets from a per-container epoch instead of one
+datetime per row, and drone ids of a ConflictTable are stored once, with
+int32 codes per row. Both convert to and from the dataclasses in models.py.
+"""
+from dataclasses import dataclass
+from typing import Iterable, List, Optional, Sequence
+from datetime import datetime, timedelta
+import numpy as np
+from models import Waypoint, Mission, Conflict
+
+MICROSECOND = timedelta(microseconds=1)
+
+
+def to_microseconds(offsets: np.ndarray) -> np.ndarray:
+    """Round second offsets to integer microseconds, as datetime arithmetic does."""
+    return np.rint(np.asarray(offsets, dtype=np.float64) * 1e6).astype(np.int64)
+
+
+@dataclass(eq=False)
+class MissionBatch:
+    """
+    Many missions in contiguous arrays.
+
+    Attributes:
+        epoch: Reference time of the waypoint time offsets
+        drone_ids: Drone identifiers, shape (D,)
+        offsets: Row offsets of each mission's waypoints, shape (D+1,)
+        positions: Waypoint positions, shape (W, 3)
+        times: Waypoint time offsets in seconds from ``epoch``, shape (W,)
+        speeds: Waypoint speeds in m/s, shape (W,)
+    """
+    epoch: datetime
+    drone_ids: np.ndarray
+    offsets: np.ndarray
+    positions: np.ndarray
+    times: np.ndarray
+    speeds: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.drone_ids)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(a.nbytes for a in (self.drone_ids, self.offsets, self.positions, self.times, self.speeds))
+
+    @property
+    def start_offsets(self) -> np.ndarray:
+        """Start of each mission in seconds from ``epoch``."""
+        return self.times[self.offsets[:-1]]
+
+    @property
+    def end_offsets(self) -> np.ndarray:
+        """End of each mission in seconds from ``epoch``."""
+        return self.times[self.offsets[1:] - 1]
+
+    def index_of(self, drone_id: str) -> int:
+        """
+        Row of a drone in the batch.
+
+        Raises:
+            KeyError: If the drone is not in the batch
+        """
+        rows = np.flatnonzero(self.drone_ids == drone_id)
+        if len(rows) == 0:
+            raise KeyError(drone_id)
+        return int(rows[0])
+
+    @classmethod
+    def from_missions(cls, missions: Sequence[Mission], epoch: Optional[datetime] = None) -> 'MissionBatch':
+        """Pack missions into a batch (the epoch defaults to the earliest start)."""
+        if epoch is None:
+            epoch = min((m.start_time for m in missions), default=datetime(1970, 1, 1))
+        counts = [len(m.waypoints) for m in missions]
+        waypoints = [wp for m in missions for wp in m.waypoints]
+        return cls(
+            epoch=epoch,
+            drone_ids=np.array([m.drone_id for m in missions], dtype=str),
+            offsets=np.concatenate(([0], np.cumsum(counts))).astype(np.int64),
+            positions=np.array([(wp.x, wp.y, wp.z) for wp in waypoints], dtype=np.float64).reshape(-1, 3),
+            # Integer microseconds first, so offsets round-trip to the exact same datetimes
+            times=np.array([(wp.timestamp - epoch) // MICROSECOND for wp in waypoints], dtype=np.int64) / 1e6,
+            speeds=np.array([wp.speed for wp in waypoints], dtype=np.float64)
+        )
+
+    def mission(self, i: int) -> Mission:
+        """Build the i-th Mission."""
+        lo, hi = int(self.offsets[i]), int(self.offsets[i + 1])
+        epoch = self.epoch
+        micros = to_microseconds(self.times[lo:hi]).tolist()
+        waypoints = [Waypoint(x=x, y=y, z=z, timestamp=epoch + timedelta(microseconds=us), speed=speed)
+                     for (x, y, z), us, speed in zip(self.positions[lo:hi].tolist(), micros,
+                                                     self.speeds[lo:hi].tolist())]
+        return Mission(drone_id=str(self.drone_ids[i]), waypoints=waypoints,
+                       start_time=waypoints[0].timestamp, end_time=waypoints[-1].timestamp)
+
+    def to_missions(self) -> List[Mission]:
+        return [self.mission(i) for i in range(len(self))]
+
+
+@dataclass(eq=False)
+class ConflictTable:
+    """
+    Many conflicts in contiguous arrays.
+
+    Attributes:
+        epoch: Reference time of the conflict time offsets
+        drone_ids: Sorted unique drone identifiers that the codes index into
+        drone1: Code of each conflict's first drone, shape (N,)
+        drone2: Code of each conflict's second drone, shape (N,)
+        times: Conflict time offsets in seconds from ``epoch``, shape (N,)
+        locations: Conflict locations, shape (N, 3)
+        distances: Separation distances in meters, shape (N,)
+        time_diffs: Time differences (raw conflicts) or durations (grouped events) in seconds, shape (N,)
+    """
+    epoch: datetime
+    drone_ids: np.ndarray
+    drone1: np.ndarray
+    drone2: np.ndarray
+    times: np.ndarray
+    locations: np.ndarray
+    distances: np.ndarray
+    time_diffs: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(a.nbytes for a in (self.drone_ids, self.drone1, self.drone2, self.times, self.locations,
+                                      self.distances, self.time_diffs))
+
+    @classmethod
+    def empty(cls, epoch: datetime, drone_ids: Iterable[str] = ()) -> 'ConflictTable':
+        return cls(epoch=epoch, drone_ids=np.array(sorted(drone_ids), dtype=str),
+                   drone1=np.zeros(0, dtype=np.int32), drone2=np.zeros(0, dtype=np.int32),
+                   times=np.zeros(0), locations=np.zeros((0, 3)), distances=np.zeros(0), time_diffs=np.zeros(0))
+
+    @classmethod
+    def for_pair(cls, drone1_id: str, drone2_id: str, epoch: datetime, times: np.ndarray, locations: np.ndarray,
+                 distances: np.ndarray, time_diffs: np.ndarray) -> 'ConflictTable':
+        """Build a table whose rows all belong to one drone pair."""
+        drone_ids = np.array(sorted({drone1_id, drone2_id}), dtype=str)
+        code1 = int(np.searchsorted(drone_ids, drone1_id))
+        code2 = int(np.searchsorted(drone_ids, drone2_id))
+        n = len(times)
+        return cls(epoch=epoch, drone_ids=drone_ids, drone1=np.full(n, code1, dtype=np.int32),
+                   drone2=np.full(n, code2, dtype=np.int32), times=np.asarray(times, dtype=np.float64),
+                   locations=np.asarray(locations, dtype=np.float64).reshape(-1, 3),
+                   distances=np.asarray(distances, dtype=np.float64),
+                   time_diffs=np.asarray(time_diffs, dtype=np.float64))
+
+    @classmethod
+    def from_conflicts(cls, conflicts: Sequence[Conflict], epoch: Optional[datetime] = None) -> 'ConflictTable':
+        """Pack conflicts into a table (the epoch defaults to the earliest conflict time)."""
+        if epoch is None:
+            epoch = min((c.time for c in conflicts), default=datetime(1970, 1, 1))
+        drone_ids = np.array(sorted({c.drone1_id for c in conflicts} | {c.drone2_id for c in conflicts}), dtype=str)
+        codes = {drone_id: k for k, drone_id in enumerate(drone_ids.tolist())}
+        return cls(
+            epoch=epoch,
+            drone_ids=drone_ids,
+            drone1=np.array([codes[c.drone1_id] for c in conflicts], dtype=np.int32),
+            drone2=np.array([codes[c.drone2_id] for c in conflicts], dtype=np.int32),
+            times=np.array([(c.time - epoch) // MICROSECOND for c in conflicts], dtype=np.int64) / 1e6,
+            locations=np.array([c.location for c in conflicts], dtype=np.float64).reshape(-1, 3),
+            distances=np.array([c.distance for c in conflicts], dtype=np.float64),
+            time_diffs=np.array([c.time_diff for c in conflicts], dtype=np.float64)
+        )
+
+    def to_conflicts(self) -> List[Conflict]:
+        """Unpack the rows into Conflict objects."""
+        ids = self.drone_ids.tolist()
+        epoch = self.epoch
+        return [Conflict(drone1_id=ids[a], drone2_id=ids[b], time=epoch + timedelta(seconds=t), location=tuple(loc),
+                         distance=d, time_diff=dt)
+                for a, b, t, loc, d, dt in zip(self.drone1.tolist(), self.drone2.tolist(), self.times.tolist(),
+                                               self.locations.tolist(), self.distances.tolist(),
+                                               self.time_diffs.tolist())]
+
+    def take(self, rows: np.ndarray) -> 'ConflictTable':
+        """Table of the selected rows (an index array or boolean mask)."""
+        return ConflictTable(epoch=self.epoch, drone_ids=self.drone_ids, drone1=self.drone1[rows],
+                             drone2=self.drone2[rows], times=self.times[rows], locations=self.locations[rows],
+                             distances=self.distances[rows], time_diffs=self.time_diffs[rows])
+
+    def sort_order(self) -> np.ndarray:
+        """
+        Stable order by (sorted drone pair, time), the order conflicts are reported in.
+
+        Codes follow the sorted drone ids, so comparing codes compares ids.
+        """
+        low = np.minimum(self.drone1, self.drone2)
+        high = np.maximum(self.drone1, self.drone2)
+        return np.lexsort((to_microseconds(self.times), high, low))
+
+    def sorted(self) -> 'ConflictTable':
+        return self.take(self.sort_order())
+
+    def group_intervals(self, time_step: float) -> 'ConflictTable':
+        """
+        Group raw conflicts into one event per run of consecutive samples.
+
+        Mirrors ConflictDetector.group_conflict_intervals: within a drone pair,
+        a gap of more than 1.5 sampling steps starts a new event. Each event
+        keeps the start time and drone order of its first conflict, the
+        location and distance of its closest approach, and its duration as
+        ``time_diffs``.
+        """
+        if len(self) == 0:
+            return self
+        table = self.sorted()
+        micros = to_microseconds(table.times)
+        low = np.minimum(table.drone1, table.drone2)
+        high = np.maximum(table.drone1, table.drone2)
+        gap = timedelta(seconds=time_step * 1.5) // MICROSECOND
+        starts = np.concatenate(([True], (np.diff(micros) > gap) | (np.diff(low) != 0) | (np.diff(high) != 0)))
+        first = np.flatnonzero(starts)
+        last = np.concatenate((first[1:], [len(table)])) - 1
+        group = np.cumsum(starts) - 1
+        # First row of minimum distance in each group (lexsort is stable)
+        by_distance = np.lexsort((table.distances, group))
+        closest = by_distance[np.concatenate(([True], np.diff(group[by_distance]) != 0))]
+        return ConflictTable(epoch=table.epoch, drone_ids=table.drone_ids, drone1=table.drone1[first],
+                             drone2=table.drone2[first], times=table.times[first],
+                             locations=table.locations[closest], distances=table.distances[closest],
+                             time_diffs=(micros[last] - micros[first]) / 1e6)
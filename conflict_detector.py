@@ -1,46 +1,235 @@
-from typing import List, Dict, Tuple
+from typing import Iterator, List, Dict, Optional, Tuple, Union
 from datetime import datetime, timedelta
 import numpy as np
 from models import Mission, Conflict
+from trajectory import Trajectory, FlightPath, as_trajectory, common_epoch
+from broad_phase import BroadPhaseIndex, BroadPhaseStats
+from instrumentation import Metrics, NULL_METRICS
+from columnar import ConflictTable
+
+# Number of sample pairs compared per vectorized block of the sliding-window scan
+WINDOW_BLOCK = 1 << 18
+
 
 class ConflictDetector:
-    def __init__(self, safety_buffer: float = 2.0, time_buffer: float = 2.0, time_step: float = 0.05):
+    def __init__(self, safety_buffer: float = 2.0, time_buffer: float = 2.0, time_step: float = 0.05,
+                 cell_size: Optional[float] = None, time_cell: float = 10.0, metrics: Optional[Metrics] = None):
+        """
+        Initialize the conflict detector.
+
+        Args:
+            safety_buffer: Minimum separation distance in meters
+            time_buffer: Temporal tolerance in seconds
+            time_step: Sampling time step of the flight paths in seconds
+            cell_size: Spatial grid cell edge in meters; enables broad-phase pair pruning when set
+            time_cell: Temporal grid cell length in seconds for the broad phase
+            metrics: Optional instrumentation collector for phase timings and pair/sample counts
+        """
         self.safety_buffer = safety_buffer  # meters
         self.time_buffer = time_buffer  # seconds
         self.time_step = time_step  # seconds
+        self.cell_size = cell_size
+        self.time_cell = time_cell
+        self.broad_phase_stats: Optional[BroadPhaseStats] = None
+        self.metrics = metrics if metrics is not None else NULL_METRICS
+        # Sample pairs inside the time windows of the last pair scanned by check_pair or check_pair_table
+        self.last_pairs_compared = 0
+
+    def candidate_pairs(self, missions: List[Mission]) -> List[Tuple[Mission, Mission]]:
+        """Mission pairs that could conflict, in the order the pair loop visits them."""
+        if self.cell_size is None:
+            return [(m1, m2) for i, m1 in enumerate(missions) for m2 in missions[i+1:]]
+        index = BroadPhaseIndex.from_missions(missions, safety_buffer=self.safety_buffer,
+                                              time_buffer=self.time_buffer, cell_size=self.cell_size,
+                                              time_cell=self.time_cell)
+        candidates = index.candidate_pairs()
+        self.broad_phase_stats = index.stats
+        return [(m1, m2) for i, m1 in enumerate(missions) for m2 in missions[i+1:]
+                if (m1.drone_id, m2.drone_id) in candidates]
 
     def calculate_distance(self, pos1: Tuple[float, float, float], pos2: Tuple[float, float, float]) -> float:
         """Calculate Euclidean distance between two positions."""
         return np.sqrt(sum((a - b) ** 2 for a, b in zip(pos1, pos2)))
 
-    def detect_conflicts(self, missions: List[Mission], flight_paths: Dict[str, Dict[datetime, Tuple[float, float, float]]]) -> List[Conflict]:
+    def detect_conflicts(self, missions: List[Mission],
+                         flight_paths: Dict[str, Union[Trajectory, FlightPath]]) -> List[Conflict]:
         """Detect conflicts between all missions and group them into unique conflict intervals."""
+        # Grouping never spans drone pairs, so sorting the per-pair events gives the same
+        # result as grouping every raw conflict at once
+        return self._sort_events(list(self.iter_conflicts(missions, flight_paths)))
+
+    def _sort_events(self, conflicts: List[Conflict]) -> List[Conflict]:
+        with self.metrics.phase('detect.sort'):
+            conflicts.sort(key=lambda c: (tuple(sorted([c.drone1_id, c.drone2_id])), c.time))
+        return conflicts
+
+    def _candidates(self, missions: List[Mission]) -> List[Tuple[Mission, Mission]]:
+        """candidate_pairs with broad-phase timing and pair counters."""
+        metrics = self.metrics
+        with metrics.phase('detect.broad_phase'):
+            pairs = self.candidate_pairs(missions)
+        if metrics.enabled:
+            metrics.count('pairs_examined', len(pairs))
+            metrics.count('pairs_pruned', len(missions) * (len(missions) - 1) // 2 - len(pairs))
+        return pairs
+
+    def iter_conflicts(self, missions: List[Mission],
+                       flight_paths: Dict[str, Union[Trajectory, FlightPath]]) -> Iterator[Conflict]:
+        """
+        Yield grouped conflict events as soon as each drone pair is done.
+
+        Only the raw conflicts of one pair are held in memory at a time. Events
+        come out in pair order and, within a pair, in time order.
+        """
+        trajectories, epoch = self._prepare(missions, flight_paths)
+        yield from self._iter_pairs(self._candidates(missions), trajectories, epoch)
+
+    def _prepare(self, missions: List[Mission], flight_paths: Dict[str, Union[Trajectory, FlightPath]]
+                 ) -> Tuple[Dict[str, Trajectory], Optional[datetime]]:
+        """Trajectories of the missions by drone id and their shared epoch."""
+        with self.metrics.phase('detect.prepare'):
+            trajectories = {m.drone_id: as_trajectory(flight_paths[m.drone_id]) for m in missions}
+            epoch = common_epoch(list(trajectories.values())) if trajectories else None
+        return trajectories, epoch
+
+    def _iter_pairs(self, candidates: List[Tuple[Mission, Mission]], trajectories: Dict[str, Trajectory],
+                    epoch: Optional[datetime]) -> Iterator[Conflict]:
+        """Narrow phase and grouping of candidate pairs that a broad phase already produced, in pair order."""
+        metrics = self.metrics
+        for mission1, mission2 in candidates:
+            path1, path2 = trajectories[mission1.drone_id], trajectories[mission2.drone_id]
+            # Raw conflicts stay in arrays; only the grouped events become Conflict objects
+            with metrics.phase('detect.narrow_phase'):
+                raw_conflicts = self.check_pair_table(mission1.drone_id, path1, mission2.drone_id, path2, epoch)
+            # Group raw conflicts into intervals
+            with metrics.phase('detect.grouping'):
+                grouped = raw_conflicts.group_intervals(self.group_step(path1)).to_conflicts()
+            if metrics.enabled:
+                metrics.count('sample_pairs_compared', self.last_pairs_compared)
+                metrics.count('raw_conflicts', len(raw_conflicts))
+                metrics.count('conflict_events', len(grouped))
+            yield from grouped
+
+    def first_conflict(self, missions: List[Mission],
+                       flight_paths: Dict[str, Union[Trajectory, FlightPath]]) -> Optional[Conflict]:
+        """
+        Return the first conflicting sample pair found, or None if the missions are clear.
+
+        Scanning stops at the first violation, so the returned conflict is a raw
+        sample pair (time_diff is the sample time difference), not a grouped event.
+        """
+        metrics = self.metrics
+        trajectories = {m.drone_id: as_trajectory(flight_paths[m.drone_id]) for m in missions}
+        epoch = common_epoch(list(trajectories.values())) if trajectories else None
+        for mission1, mission2 in self._candidates(missions):
+            with metrics.phase('detect.narrow_phase'):
+                raw_conflicts = self.check_pair(mission1.drone_id, trajectories[mission1.drone_id],
+                                                mission2.drone_id, trajectories[mission2.drone_id], epoch,
+                                                first_only=True)
+            if raw_conflicts:
+                return raw_conflicts[0]
+        return None
+
+    def any_conflict(self, missions: List[Mission],
+                     flight_paths: Dict[str, Union[Trajectory, FlightPath]]) -> bool:
+        """Return True as soon as any conflict is found."""
+        return self.first_conflict(missions, flight_paths) is not None
+
+    def check_pair(self, drone1_id: str, path1: Trajectory, drone2_id: str, path2: Trajectory,
+                   epoch: datetime, first_only: bool = False) -> List[Conflict]:
+        """
+        Return the raw conflicting sample pairs between two trajectories aligned on a shared epoch.
+
+        With ``first_only`` the scan stops at the first conflicting sample pair.
+        """
+        rows, _, distances, time_diffs, self.last_pairs_compared = self._scan_pair(path1, path2, epoch, first_only)
         raw_conflicts = []
-        # Compare each pair of missions
-        for i, mission1 in enumerate(missions):
-            for mission2 in missions[i+1:]:
-                path1 = flight_paths[mission1.drone_id]
-                path2 = flight_paths[mission2.drone_id]
-                for t1, pos1 in path1.items():
-                    for t2, pos2 in path2.items():
-                        time_diff = (t1 - t2).total_seconds()
-                        if abs(time_diff) <= self.time_buffer:
-                            distance = self.calculate_distance(pos1, pos2)
-                            if distance <= self.safety_buffer:
-                                raw_conflicts.append(Conflict(
-                                    drone1_id=mission1.drone_id,
-                                    drone2_id=mission2.drone_id,
-                                    time=t1,
-                                    location=pos1,
-                                    distance=distance,
-                                    time_diff=time_diff
-                                ))
-        # Group raw conflicts into intervals
-        grouped_conflicts = self.group_conflict_intervals(raw_conflicts)
-        return grouped_conflicts
-
-    def group_conflict_intervals(self, conflicts: List[Conflict]) -> List[Conflict]:
-        """Group consecutive/conflicting points into single conflict events per drone pair."""
+        times = {}
+        for k, distance, time_diff in zip(rows.tolist(), distances.tolist(), time_diffs.tolist()):
+            if k not in times:
+                times[k] = (path1.to_datetime(path1.times[k]), tuple(path1.positions[k].tolist()))
+            t1, pos1 = times[k]
+            raw_conflicts.append(Conflict(
+                drone1_id=drone1_id,
+                drone2_id=drone2_id,
+                time=t1,
+                location=pos1,
+                distance=distance,
+                time_diff=time_diff
+            ))
+        return raw_conflicts
+
+    def check_pair_table(self, drone1_id: str, path1: Trajectory, drone2_id: str, path2: Trajectory,
+                         epoch: datetime) -> ConflictTable:
+        """
+        Same raw conflicts as check_pair, in a ConflictTable instead of one Conflict per sample pair.
+
+        Times are offsets from ``path1.epoch``, so the rows convert to exactly the
+        Conflicts check_pair would build.
+        """
+        rows, _, distances, time_diffs, self.last_pairs_compared = self._scan_pair(path1, path2, epoch)
+        return ConflictTable.for_pair(drone1_id, drone2_id, path1.epoch, path1.times[rows], path1.positions[rows],
+                                      distances, time_diffs)
+
+    def _scan_pair(self, path1: Trajectory, path2: Trajectory, epoch: datetime,
+                   first_only: bool = False) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, int]:
+        """
+        Find the conflicting sample pairs of two trajectories with a sliding time window.
+
+        Only samples of path2 within ``time_buffer`` of a path1 sample can
+        conflict with it, and both time arrays are sorted, so each path1 sample
+        is compared against one contiguous window of path2 found by binary
+        search: O(n * w) work instead of O(n * m). Windows are widened by a hair
+        and the exact ``|t1 - t2| <= time_buffer`` test is still applied inside
+        them, so the result is identical to comparing every sample pair.
+
+        Returns:
+            rows of path1, rows of path2, distances and time differences of the
+            conflicting sample pairs, ordered by path1 row, then path2 row, and
+            the number of sample pairs inside the windows
+        """
+        times1 = path1.offsets_from(epoch)
+        times2 = path2.offsets_from(epoch)
+        margin = 1e-6 * (1.0 + self.time_buffer)
+        lo = np.searchsorted(times2, times1 - (self.time_buffer + margin), side='left')
+        hi = np.searchsorted(times2, times1 + (self.time_buffer + margin), side='right')
+        active = np.flatnonzero(hi > lo)
+        empty = np.zeros(0, dtype=np.int64)
+        found = ([empty], [empty], [np.zeros(0)], [np.zeros(0)])
+        # Rows are processed in chunks of about WINDOW_BLOCK sample pairs
+        width = int((hi - lo)[active].max()) if len(active) else 0
+        chunk = max(1, WINDOW_BLOCK // max(width, 1))
+        offsets = np.arange(width)
+        for begin in range(0, len(active), chunk):
+            rows = active[begin:begin + chunk]
+            cols = lo[rows, None] + offsets
+            inside = cols < hi[rows, None]
+            cols = np.minimum(cols, len(times2) - 1)
+            time_diffs = times1[rows, None] - times2[cols]
+            distances = np.sqrt(np.sum((path1.positions[rows, None, :] - path2.positions[cols]) ** 2, axis=2))
+            r, c = np.nonzero(inside & (np.abs(time_diffs) <= self.time_buffer) & (distances <= self.safety_buffer))
+            if len(r) == 0:
+                continue
+            if first_only:
+                r, c = r[:1], c[:1]
+            for result, values in zip(found, (rows[r], cols[r, c], distances[r, c], time_diffs[r, c])):
+                result.append(values)
+            if first_only:
+                break
+        return tuple(np.concatenate(values) for values in found) + (int((hi - lo).sum()),)
+
+    def group_step(self, path: Trajectory) -> float:
+        """Sampling step that separates consecutive raw conflicts of a drone1 trajectory."""
+        return max(self.time_step, path.max_step or 0.0)
+
+    def group_conflict_intervals(self, conflicts: List[Conflict], time_step: Optional[float] = None) -> List[Conflict]:
+        """
+        Group consecutive/conflicting points into single conflict events per drone pair.
+
+        Args:
+            conflicts: Raw conflicting sample pairs
+            time_step: Sampling step of the conflicts' drone1 times (defaults to the detector's)
+        """
         if not conflicts:
             return []
         # Sort by drone pair and time
@@ -49,7 +238,7 @@ class ConflictDetector:
         current_group = []
         last_time = None
         last_pair = None
-        time_gap = timedelta(seconds=self.time_step * 1.5)  # Allow a small gap
+        time_gap = timedelta(seconds=(time_step or self.time_step) * 1.5)  # Allow a small gap
         for c in conflicts:
             pair = tuple(sorted([c.drone1_id, c.drone2_id]))
             if (not current_group or pair != last_pair or (c.time - last_time) > time_gap):
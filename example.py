@@ -3,8 +3,10 @@ from datetime import datetime, timedelta
 from models import Mission, Waypoint
 from flight_path_simulator import FlightPathSimulator
 from conflict_detector import ConflictDetector
-from visualization_4d import visualize_mission_4d, visualize_paths_3d
+from airspace import Airspace
+from resolver import ConflictResolver
 import random
+import sys
 
 # def get_internal_missions(start_time: datetime) -> list:
 #     """Create test missions with random waypoints."""
@@ -87,7 +89,7 @@ def main():
     
     # Load other missions using FlightPathSimulator
     other_missions = flight_simulator.load_missions_from_file('waypoints.json', start_time)
-    missions = [drone1_mission] + other_missions
+    missions = [drone1_mission] + list(other_missions)
     
     # Simulate flight paths
     flight_paths = {}
@@ -108,8 +110,29 @@ def main():
             print(f"Closest Approach: {conflict.location}")
             print(f"Minimum Distance: {conflict.distance:.2f}m")
             print(f"Conflict Duration: {conflict.time_diff:.2f}s")
+
+    # Suggest the smallest departure delay or altitude change that clears drone1
+    if any("drone1" in (c.drone1_id, c.drone2_id) for c in conflicts):
+        airspace = Airspace(safety_buffer=conflict_detector.safety_buffer,
+                            time_buffer=conflict_detector.time_buffer, epoch=start_time)
+        airspace.commit_all(list(other_missions))
+        resolution = ConflictResolver(airspace).resolve(drone1_mission)
+        if resolution.resolved:
+            print(f"\nSuggested re-plan for drone1: delay departure by {resolution.delay:.0f}s, "
+                  f"altitude offset {resolution.altitude_offset:+.0f}m "
+                  f"({resolution.stats.candidates_evaluated} candidates in "
+                  f"{resolution.stats.elapsed_seconds * 1000:.1f}ms)")
+        else:
+            print("\nNo re-plan within the search limits clears drone1")
     
-    # Create visualizations
+    # Create visualizations; matplotlib is only imported here, and is optional
+    if '--headless' in sys.argv[1:]:
+        return
+    try:
+        from visualization_4d import visualize_mission_4d, visualize_paths_3d
+    except ImportError as error:
+        print(f"\nSkipping visualizations: {error}")
+        return
     print("\nGenerating visualizations...")
     visualize_paths_3d(missions, conflicts)  # 3D visualization
     visualize_mission_4d(flight_paths, conflicts)  # 4D visualization
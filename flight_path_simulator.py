@@ -1,19 +1,85 @@
-from typing import List, Dict, Tuple
+from typing import List, Dict, Mapping, Optional, Sequence, Tuple, Union
 import numpy as np
 from datetime import datetime, timedelta
 from models import Waypoint, DroneState, Mission
+from trajectory import Trajectory, FlightPath, as_trajectory
+from mission_store import MissionStore, is_store
+from trajectory_cache import mission_key
+from columnar import MissionBatch, MICROSECOND
+from instrumentation import NULL_METRICS
 import math
 import json
 
 class FlightPathSimulator:
-    def __init__(self, time_step: float = 0.1):
+    def __init__(self, time_step: float = 0.1, safety_buffer: Optional[float] = None,
+                 tolerance: float = 0.25, max_time_step: float = 10.0, cache=None, metrics=None):
         """
         Initialize the flight path simulator.
+
+        Passing ``safety_buffer`` switches from fixed ``time_step`` sampling to
+        adaptive sampling with samples at most ``tolerance * safety_buffer`` meters apart.
         
         Args:
-            time_step: Time step for simulation in seconds
+            time_step: Time step for simulation in seconds (fixed sampling only)
+            safety_buffer: Safety buffer of the conflict detector in meters; enables adaptive sampling
+            tolerance: Maximum sample spacing as a fraction of the safety buffer
+            max_time_step: Largest step in seconds used for slow or hovering segments
+            cache: Optional TrajectoryCache shared by simulations with these parameters
+            metrics: Optional instrumentation collector (see instrumentation.py)
         """
         self.time_step = time_step
+        self.safety_buffer = safety_buffer
+        self.tolerance = tolerance
+        self.max_time_step = max_time_step
+        self.cache = cache
+        self.metrics = metrics if metrics is not None else NULL_METRICS
+
+    @classmethod
+    def for_detector(cls, detector, tolerance: float = 0.25, max_time_step: float = 10.0,
+                     cache=None) -> 'FlightPathSimulator':
+        """
+        Build an adaptive simulator matched to a ConflictDetector.
+
+        Steps are also capped at the detector's time buffer, so every sample
+        has partner samples within the temporal tolerance.
+        """
+        if detector.time_buffer > 0:
+            max_time_step = min(max_time_step, max(detector.time_buffer, detector.time_step))
+        return cls(time_step=detector.time_step, safety_buffer=detector.safety_buffer,
+                   tolerance=tolerance, max_time_step=max_time_step, cache=cache)
+
+    @property
+    def adaptive(self) -> bool:
+        return self.safety_buffer is not None
+
+    @property
+    def sample_spacing(self) -> Optional[float]:
+        """Maximum distance in meters between consecutive adaptive samples."""
+        return self.tolerance * self.safety_buffer if self.adaptive else None
+
+    @property
+    def sampling_parameters(self) -> Tuple:
+        """Parameters that determine the samples of a simulated path, used in cache keys."""
+        if not self.adaptive:
+            return (self.time_step,)
+        return (self.time_step, self.safety_buffer, self.tolerance, self.max_time_step)
+
+    def _segment_steps(self, seg_durations: np.ndarray, seg_lengths: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Number of steps and step size in seconds for each segment."""
+        if not self.adaptive:
+            steps = np.maximum((seg_durations / self.time_step).astype(np.int64), 0)
+            return steps, np.full(len(seg_durations), self.time_step)
+        safe = np.where(seg_durations > 0, seg_durations, 1.0)
+        speeds = seg_lengths / safe
+        # Step that keeps samples sample_spacing apart at this segment's speed
+        with np.errstate(divide='ignore'):
+            target = np.where(speeds > 0, self.sample_spacing / speeds, self.max_time_step)
+        # No time_step floor: a floor would break the spacing bound on fast segments
+        target = np.minimum(target, self.max_time_step)
+        # Divide each segment evenly so its end waypoint is sampled too
+        steps = np.where(seg_durations > 0, np.ceil(seg_durations / target), 0).astype(np.int64)
+        step_sizes = np.where(steps > 0, seg_durations / np.maximum(steps, 1), target)
+        return steps, step_sizes
 
     def _compute_distances(self, positions: List[Tuple[float, float, float]]) -> List[float]:
         """Calculate distances between consecutive positions."""
@@ -46,6 +112,78 @@ class FlightPathSimulator:
             time_stamps.append(time_stamps[-1] + timedelta(seconds=t))
         return time_stamps, speed
 
+    def _interpolate_timestamps_batch(self, waypoints: np.ndarray, counts: np.ndarray, speeds: np.ndarray,
+                                      start_offsets: np.ndarray,
+                                      end_offsets: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Vectorized _interpolate_timestamps for K waypoint lists at once.
+
+        Each segment time is rounded to whole microseconds before it is
+        accumulated, as adding timedelta objects does. Distances use ``x * x``
+        where the scalar version uses ``x ** 2`` (C ``pow``), so rare results
+        differ in the last bit.
+
+        Args:
+            waypoints: Waypoint positions padded to a common length, shape (K, W, 3)
+            counts: Number of real waypoints of each list, shape (K,)
+            speeds: Requested speed of each list in m/s, shape (K,)
+            start_offsets: Start offset of each list in seconds, shape (K,)
+            end_offsets: End offset of each list in seconds (0 for none), shape (K,)
+
+        Returns:
+            Waypoint time offsets in integer microseconds from each list's start
+            time, shape (K, W), and the speed used for each list, shape (K,)
+        """
+        deltas = np.diff(waypoints, axis=1)
+        distances = np.sqrt(deltas[..., 0] ** 2 + deltas[..., 1] ** 2 + deltas[..., 2] ** 2)
+        # Padding segments past the last real waypoint have no length
+        distances[np.arange(distances.shape[1])[None, :] >= (counts - 1)[:, None]] = 0.0
+        # Running sums add left to right, like sum() over a list
+        total_distance = np.cumsum(distances, axis=1)[:, -1] if distances.shape[1] else np.zeros(len(counts))
+        total_time = np.cumsum(distances / speeds[:, None], axis=1)[:, -1] if distances.shape[1] else total_distance
+        # If end_time is specified and total_time would exceed it, reduce speed
+        mission_duration = end_offsets - start_offsets
+        slow_down = (end_offsets > start_offsets) & (total_time > mission_duration) & (total_distance > 0)
+        used = np.where(slow_down, total_distance / np.where(slow_down, mission_duration, 1.0), speeds)
+        segment_micros = np.rint(distances / used[:, None] * 1e6).astype(np.int64)
+        segment_micros[total_distance == 0] = 0
+        micros = np.concatenate((np.zeros((len(counts), 1), dtype=np.int64), np.cumsum(segment_micros, axis=1)), axis=1)
+        return micros, used
+
+    def create_missions_batch(self, drone_ids: Sequence[str], waypoint_lists: Sequence[Sequence[Tuple[float, float, float]]],
+                              start_offset: Union[float, Sequence[float]], end_offset: Union[float, Sequence[float]],
+                              speed: Union[float, Sequence[float]], global_start_time: datetime) -> MissionBatch:
+        """
+        Build many missions at once, as create_mission_from_waypoints would one by one.
+
+        Offsets and speeds may be one value for all lists or one per list.
+
+        Returns:
+            MissionBatch with ``global_start_time`` as its epoch; ``batch.mission(k)``
+            is the Mission create_mission_from_waypoints builds for list k
+        """
+        k = len(waypoint_lists)
+        counts = np.array([len(wps) for wps in waypoint_lists], dtype=np.int64)
+        width = int(counts.max()) if k else 0
+        padded = np.zeros((k, width, 3))
+        for i, wps in enumerate(waypoint_lists):
+            padded[i, :counts[i]] = wps
+            padded[i, counts[i]:] = padded[i, counts[i] - 1]
+        start_offsets = np.broadcast_to(np.asarray(start_offset, dtype=np.float64), (k,))
+        end_offsets = np.broadcast_to(np.asarray(end_offset, dtype=np.float64), (k,))
+        speeds = np.broadcast_to(np.asarray(speed, dtype=np.float64), (k,))
+        micros, used = self._interpolate_timestamps_batch(padded, counts, speeds, start_offsets, end_offsets)
+        start_micros = np.array([timedelta(seconds=float(t)) // MICROSECOND for t in start_offsets], dtype=np.int64)
+        real = np.arange(width)[None, :] < counts[:, None]
+        return MissionBatch(
+            epoch=global_start_time,
+            drone_ids=np.array(drone_ids, dtype=str),
+            offsets=np.concatenate(([0], np.cumsum(counts))).astype(np.int64),
+            positions=padded[real],
+            times=(micros + start_micros[:, None])[real] / 1e6,
+            speeds=np.repeat(used, counts)
+        )
+
     def create_mission_from_waypoints(self, drone_id: str, waypoints: List[Tuple[float, float, float]], 
                                     start_offset: float, end_offset: float, speed: float, 
                                     global_start_time: datetime) -> Mission:
@@ -61,28 +199,44 @@ class FlightPathSimulator:
             end_time=time_stamps[-1]
         )
 
-    def load_missions_from_file(self, filename: str, global_start_time: datetime) -> List[Mission]:
-        """Load missions from a JSON file and create Mission objects."""
+    def load_missions_from_file(self, filename: str, global_start_time: datetime) -> Sequence[Mission]:
+        """
+        Load missions from a JSON file and create Mission objects.
+
+        Returns:
+            A list of missions for a JSON file. For a columnar mission store
+            directory (see mission_store.py), a memory-mapped LazyMissions
+            sequence that builds each Mission when it is first accessed
+        """
+        if is_store(filename):
+            return MissionStore(filename).missions(global_start_time, self)
         with open(filename, 'r') as f:
             data = json.load(f)
             
-        missions = []
-        for drone in data['drones']:
-            drone_start_offset = drone.get('start_time', 0)
-            drone_end_offset = drone.get('end_time', 0)
-            speed = drone.get('speed', 5)
-            positions = [(wp['x'], wp['y'], wp['z']) for wp in drone['waypoints']]
-            
-            mission = self.create_mission_from_waypoints(
-                drone_id=drone['drone_id'],
-                waypoints=positions,
-                start_offset=drone_start_offset,
-                end_offset=drone_end_offset,
-                speed=speed,
-                global_start_time=global_start_time
-            )
-            missions.append(mission)
-        return missions
+        return [self.mission_from_dict(drone, global_start_time) for drone in data['drones']]
+
+    def mission_from_dict(self, drone: Dict, global_start_time: datetime) -> Mission:
+        """
+        Create a Mission from one drone entry of the waypoints.json schema.
+
+        Raises:
+            ValueError: If the speed is not positive
+        """
+        drone_start_offset = drone.get('start_time', 0)
+        drone_end_offset = drone.get('end_time', 0)
+        speed = drone.get('speed', 5)
+        if not speed > 0:
+            raise ValueError(f"speed must be positive, got {speed}")
+        positions = [(wp['x'], wp['y'], wp['z']) for wp in drone['waypoints']]
+
+        return self.create_mission_from_waypoints(
+            drone_id=drone['drone_id'],
+            waypoints=positions,
+            start_offset=drone_start_offset,
+            end_offset=drone_end_offset,
+            speed=speed,
+            global_start_time=global_start_time
+        )
 
     def interpolate_position(self, wp1: Waypoint, wp2: Waypoint, t: datetime) -> Tuple[float, float, float]:
         """Interpolate position between two waypoints at a given time."""
@@ -117,51 +271,131 @@ class FlightPathSimulator:
             return (0.0, 0.0, 0.0)
         return tuple((end - start) / time_diff for start, end in zip(start_pos, end_pos))
 
-    def simulate_flight_path(self, mission: Mission) -> Dict[datetime, Tuple[float, float, float]]:
-        """Simulate the flight path and return positions at each time step."""
-        positions = {}
-        current_time = mission.start_time
+    def simulate_flight_path(self, mission: Mission) -> Trajectory:
+        """
+        Simulate the flight path and return positions at each time step.
 
-        # Add initial position
-        positions[current_time] = (
-            mission.waypoints[0].x,
-            mission.waypoints[0].y,
-            mission.waypoints[0].z
-        )
+        All segments are interpolated in a single vectorized pass. Use
+        ``Trajectory.to_dict()`` for the legacy {datetime: (x, y, z)} view.
+        With a cache, a hit returns a trajectory sharing the cached read-only arrays.
+        """
+        if self.cache is None:
+            return self._simulate(mission)
+        with self.metrics.phase('simulate.cache_lookup'):
+            key = mission_key(mission, self.sampling_parameters)
+            cached = self.cache.get(key)
+        if cached is None:
+            cached = self.cache.put(key, self._simulate(mission))
+        else:
+            self.metrics.count('trajectory_cache_hits')
+        return Trajectory(epoch=mission.start_time, times=cached.times, positions=cached.positions,
+                          max_step=cached.max_step)
+
+    def _simulate(self, mission: Mission) -> Trajectory:
+        with self.metrics.phase('simulate.interpolate'):
+            trajectory = self._interpolate_path(mission)
+        if self.metrics.enabled:
+            self.metrics.count('missions_simulated')
+            self.metrics.count('samples_generated', len(trajectory))
+        return trajectory
+
+    def simulate_window(self, mission: Mission, start: datetime, end: datetime) -> Optional[Trajectory]:
+        """
+        Simulate only the samples of a mission between ``start`` and ``end`` (inclusive).
+
+        The samples are exactly those simulate_flight_path produces in that time
+        range, but only the steps inside the window are interpolated, so memory
+        scales with the window length rather than the mission duration.
+
+        Returns:
+            Trajectory with the mission start as its epoch (and the whole
+            mission's max_step), or None if no sample falls inside the window
+        """
+        window = ((start - mission.start_time).total_seconds(), (end - mission.start_time).total_seconds())
+        with self.metrics.phase('simulate.interpolate'):
+            trajectory = self._interpolate_path(mission, window)
+        if trajectory is None:
+            return None
+        if self.metrics.enabled:
+            self.metrics.count('samples_generated', len(trajectory))
+        return trajectory
+
+    def _window_steps(self, wp_times: np.ndarray, steps: np.ndarray, step_sizes: np.ndarray,
+                      lo: float, hi: float) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Segment index and step number of the samples near the offsets [lo, hi].
+
+        Sample j of segment k lies at ``wp_times[k] + j * step_sizes[k]``; the
+        step range is widened by one step on each side, and callers filter the
+        resulting sample times exactly.
+        """
+        starts = wp_times[:-1]
+        first = np.clip(np.floor((lo - starts) / step_sizes) - 1, 1, steps + 1).astype(np.int64)
+        stop = np.clip(np.ceil((hi - starts) / step_sizes) + 2, 1, steps + 1).astype(np.int64)
+        counts = np.maximum(stop - first, 0)
+        seg_index = np.repeat(np.arange(len(steps)), counts)
+        step_index = (np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+                      + np.repeat(first, counts))
+        return seg_index, step_index
+
+    def _interpolate_path(self, mission: Mission,
+                          window: Optional[Tuple[float, float]] = None) -> Optional[Trajectory]:
+        epoch = mission.start_time
+        wp_times = np.array([(wp.timestamp - epoch).total_seconds() for wp in mission.waypoints])
+        wp_positions = np.array([(wp.x, wp.y, wp.z) for wp in mission.waypoints], dtype=np.float64)
+
+        # Number of time steps in each segment
+        seg_durations = np.diff(wp_times)
+        seg_lengths = np.linalg.norm(np.diff(wp_positions, axis=0), axis=1)
+        steps, step_sizes = self._segment_steps(seg_durations, seg_lengths)
+
+        # Segment index and step number (1..steps) for every sample
+        if window is None:
+            seg_index = np.repeat(np.arange(len(steps)), steps)
+            step_index = np.arange(1, steps.sum() + 1) - np.repeat(np.cumsum(steps) - steps, steps)
+        else:
+            seg_index, step_index = self._window_steps(wp_times, steps, step_sizes, *window)
+        elapsed = step_index * step_sizes[seg_index]
+
+        # Offsets are kept at microsecond resolution, as with datetime keys
+        sample_times = np.round(wp_times[seg_index] + elapsed, 6)
+        ratio = (elapsed / seg_durations[seg_index])[:, None]
+        sample_positions = wp_positions[seg_index] + (wp_positions[seg_index + 1] - wp_positions[seg_index]) * ratio
+
+        times = np.concatenate(([0.0], sample_times))
+        positions = np.vstack((wp_positions[:1], sample_positions))
 
-        # Simulate between waypoints
-        for i in range(len(mission.waypoints) - 1):
-            wp1 = mission.waypoints[i]
-            wp2 = mission.waypoints[i + 1]
-            
-            # Calculate time between waypoints
-            time_diff = (wp2.timestamp - wp1.timestamp).total_seconds()
-            steps = int(time_diff / self.time_step)
-            
-            # Interpolate positions between waypoints
-            for step in range(1, steps + 1):
-                t = wp1.timestamp + timedelta(seconds=step * self.time_step)
-                x, y, z = self.interpolate_position(wp1, wp2, t)
-                positions[t] = (x, y, z)
-        
         # Add final position if not already added
-        final_time = mission.waypoints[-1].timestamp
-        if final_time not in positions:
-            positions[final_time] = (
-                mission.waypoints[-1].x,
-                mission.waypoints[-1].y,
-                mission.waypoints[-1].z
-            )
+        if window is None:
+            last_sample = times[-1]
+        else:
+            # Last sample of the whole path, computed as above
+            nonempty = np.flatnonzero(steps > 0)
+            last_sample = (np.round(wp_times[nonempty[-1:]] + steps[nonempty[-1:]] * step_sizes[nonempty[-1:]], 6)[0]
+                           if len(nonempty) else 0.0)
+        if last_sample != wp_times[-1]:
+            times = np.append(times, wp_times[-1])
+            positions = np.vstack((positions, wp_positions[-1:]))
+
+        if window is not None:
+            inside = (times >= window[0]) & (times <= window[1])
+            if not inside.any():
+                return None
+            times, positions = times[inside], positions[inside]
 
-        return positions
+        max_step = float(step_sizes[steps > 0].max()) if self.adaptive and steps.any() else None
+        return Trajectory(epoch=epoch, times=times, positions=positions, max_step=max_step)
 
-    def get_drone_state_at_time(self, flight_path: Dict[datetime, Tuple[float, float, float]], 
+    def get_drone_state_at_time(self, flight_path: Union[Trajectory, FlightPath],
                               target_time: datetime, drone_id: str) -> DroneState:
         """
         Get drone state at a specific time by interpolating between timestamps.
+
+        Lookups on a Trajectory are a binary search over its sorted time array;
+        a legacy dict is converted (and sorted) on every call.
         
         Args:
-            flight_path: Dictionary mapping timestamps to positions
+            flight_path: Trajectory or dictionary mapping timestamps to positions
             target_time: Target time
             drone_id: Identifier for the drone
             
@@ -171,35 +405,41 @@ class FlightPathSimulator:
         Raises:
             ValueError: If target time is outside flight path range
         """
-        timestamps = sorted(flight_path.keys())
-        if target_time < timestamps[0] or target_time > timestamps[-1]:
+        trajectory = as_trajectory(flight_path)
+        offset = (target_time - trajectory.epoch).total_seconds()
+        positions, velocities, valid = trajectory.interpolate(np.array([offset]))
+        if not valid[0]:
             raise ValueError(f"Target time {target_time} outside flight path range")
-        
-        # Find timestamps that bracket the target time
-        for i in range(len(timestamps) - 1):
-            if timestamps[i] <= target_time <= timestamps[i + 1]:
-                # Calculate interpolation ratio
-                time_diff = (timestamps[i + 1] - timestamps[i]).total_seconds()
-                if time_diff == 0:
-                    ratio = 0
-                else:
-                    ratio = (target_time - timestamps[i]).total_seconds() / time_diff
-                
-                # Get positions
-                pos1 = flight_path[timestamps[i]]
-                pos2 = flight_path[timestamps[i + 1]]
-                
-                # Interpolate position
-                position = tuple(p1 + (p2 - p1) * ratio for p1, p2 in zip(pos1, pos2))
-                
-                # Calculate velocity
-                velocity = self.calculate_velocity(pos1, pos2, time_diff)
-                
-                return DroneState(
-                    drone_id=drone_id,
-                    timestamp=target_time,
-                    position=position,
-                    velocity=velocity
-                )
-        
-        raise ValueError(f"Could not find appropriate timestamps for interpolation at {target_time}") 
\ No newline at end of file
+
+        return DroneState(
+            drone_id=drone_id,
+            timestamp=target_time,
+            position=tuple(positions[0].tolist()),
+            velocity=tuple(velocities[0].tolist())
+        )
+
+    def get_states_at_times(self, flight_paths: Mapping[str, Union[Trajectory, FlightPath]],
+                            drone_ids: Sequence[str], times: Sequence[datetime]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Get positions and velocities of many drones at many timestamps in one call.
+
+        Args:
+            flight_paths: Mapping of drone id to Trajectory (or legacy dict)
+            drone_ids: Drones to query
+            times: Timestamps to query
+
+        Returns:
+            positions and velocities, each of shape (len(drone_ids), len(times), 3);
+            entries outside a drone's flight path range are NaN
+        """
+        positions = np.full((len(drone_ids), len(times), 3), np.nan)
+        velocities = np.full((len(drone_ids), len(times), 3), np.nan)
+        if len(times) == 0:
+            return positions, velocities
+        reference = times[0]
+        offsets = np.array([(t - reference).total_seconds() for t in times], dtype=np.float64)
+        for k, drone_id in enumerate(drone_ids):
+            trajectory = as_trajectory(flight_paths[drone_id])
+            shift = (reference - trajectory.epoch).total_seconds()
+            positions[k], velocities[k], _ = trajectory.interpolate(offsets + shift)
+        return positions, velocities
@@ -0,0 +1,138 @@
+"""
+Optional instrumentation for the simulator and conflict detectors.
+
+Components take a ``metrics`` argument. The default, ``NULL_METRICS``, makes
+every hook a no-op: hooks sit at per-mission and per-pair granularity, never
+per sample, so the disabled path costs one attribute lookup and call.
+
+    metrics = Metrics(trace_memory=True)
+    simulator = FlightPathSimulator(time_step=0.05, metrics=metrics)
+    detector = ConflictDetector(1.0, 15.1, metrics=metrics)
+    ...
+    metrics.write('metrics.prom')   # Prometheus text format ('.json' for JSON)
+"""
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass, asdict
+from typing import Dict, Iterator, List
+import json
+import time
+import tracemalloc
+
+
+@dataclass
+class PhaseTiming:
+    """Accumulated wall time (and optionally peak traced allocation) of one phase."""
+    calls: int = 0
+    seconds: float = 0.0
+    max_seconds: float = 0.0
+    peak_bytes: int = 0
+
+
+class Metrics:
+    enabled = True
+
+    def __init__(self, namespace: str = 'uav', trace_memory: bool = False):
+        """
+        Collector of per-phase timings and counters.
+
+        Args:
+            namespace: Prefix of the exported Prometheus metric names
+            trace_memory: Record the peak traced allocation of each phase with
+                tracemalloc (adds noticeable overhead while enabled, and resets
+                tracemalloc's peak, so do not combine with other peak measurements)
+        """
+        self.namespace = namespace
+        self.trace_memory = trace_memory
+        self.phases: Dict[str, PhaseTiming] = {}
+        self.counters: Dict[str, int] = {}
+        # Running peaks of the open phases, so a nested phase does not hide its parent's peak
+        self._peaks: List[int] = []
+
+    def count(self, name: str, value: int = 1) -> None:
+        """Add ``value`` to a counter."""
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Time a block of code under ``name``."""
+        tracing = self.trace_memory
+        if tracing:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            if self._peaks:
+                self._peaks[-1] = max(self._peaks[-1], tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+            self._peaks.append(0)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            timing = self.phases.get(name)
+            if timing is None:
+                timing = self.phases[name] = PhaseTiming()
+            timing.calls += 1
+            timing.seconds += elapsed
+            timing.max_seconds = max(timing.max_seconds, elapsed)
+            if tracing:
+                peak = max(self._peaks.pop(), tracemalloc.get_traced_memory()[1])
+                timing.peak_bytes = max(timing.peak_bytes, peak)
+                if self._peaks:
+                    self._peaks[-1] = max(self._peaks[-1], peak)
+
+    def reset(self) -> None:
+        self.phases.clear()
+        self.counters.clear()
+
+    def to_dict(self) -> Dict:
+        return {'phases': {name: asdict(timing) for name, timing in self.phases.items()},
+                'counters': dict(self.counters)}
+
+    def to_prometheus(self) -> str:
+        """Render the metrics in the Prometheus text exposition format."""
+        ns = self.namespace
+        lines = []
+
+        def family(name: str, kind: str, help_text: str, samples: List[str]) -> None:
+            if samples:
+                lines.extend([f'# HELP {ns}_{name} {help_text}', f'# TYPE {ns}_{name} {kind}'] + samples)
+
+        phases = sorted(self.phases.items())
+        family('phase_seconds_total', 'counter', 'Wall time spent in each phase.',
+               [f'{ns}_phase_seconds_total{{phase="{p}"}} {t.seconds:.9g}' for p, t in phases])
+        family('phase_calls_total', 'counter', 'Number of times each phase ran.',
+               [f'{ns}_phase_calls_total{{phase="{p}"}} {t.calls}' for p, t in phases])
+        family('phase_max_seconds', 'gauge', 'Longest single run of each phase.',
+               [f'{ns}_phase_max_seconds{{phase="{p}"}} {t.max_seconds:.9g}' for p, t in phases])
+        if self.trace_memory:
+            family('phase_peak_bytes', 'gauge', 'Peak traced allocation during each phase.',
+                   [f'{ns}_phase_peak_bytes{{phase="{p}"}} {t.peak_bytes}' for p, t in phases])
+        for name, value in sorted(self.counters.items()):
+            family(f'{name}_total', 'counter', f'Total {name.replace("_", " ")}.', [f'{ns}_{name}_total {value}'])
+        return '\n'.join(lines) + '\n'
+
+    def write(self, filename: str) -> None:
+        """Write the metrics to ``filename``: JSON if it ends in .json, Prometheus text otherwise."""
+        with open(filename, 'w') as f:
+            if filename.endswith('.json'):
+                json.dump(self.to_dict(), f, indent=2)
+            else:
+                f.write(self.to_prometheus())
+
+
+class NullMetrics(Metrics):
+    """Disabled collector whose hooks do nothing."""
+    enabled = False
+
+    def __init__(self):
+        super().__init__()
+
+    def count(self, name: str, value: int = 1) -> None:
+        pass
+
+    def phase(self, name: str):
+        return _NULL_PHASE
+
+
+_NULL_PHASE = nullcontext()
+NULL_METRICS = NullMetrics()
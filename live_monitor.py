@@ -0,0 +1,415 @@
+"""
+Real-time conflict monitoring of live DroneState telemetry.
+
+The StreamMonitor keeps the latest state of every drone in a slot table and
+a moving spatial hash of their horizontal positions (the search reach is far
+larger than the altitude band drones fly in, so vertical cells would only add
+empty lookups). Each update only looks at drones in the neighbouring columns,
+extrapolates them to the update's time, and predicts
+the closest point of approach (CPA) over a short horizon from the velocity
+vectors. Predicted losses of separation are raised as ConflictReports.
+
+Telemetry is one JSON object per line:
+
+    {"drone_id": "drone7", "timestamp": "2025-01-01T00:00:12.5",
+     "position": [x, y, z], "velocity": [vx, vy, vz]}
+
+Usage:
+    python live_monitor.py --replay telemetry.jsonl
+    python live_monitor.py --listen 9000          # line-delimited JSON over TCP
+"""
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+from datetime import datetime, timedelta
+import argparse
+import asyncio
+import itertools
+import json
+import math
+import sys
+import numpy as np
+from models import DroneState, ConflictReport, ConflictSeverity
+from instrumentation import Metrics, NULL_METRICS
+
+Cell = Tuple[int, int]
+# Fields of a per-drone state tuple
+X, Y, Z, VX, VY, VZ, T = range(7)
+# Neighbourhoods at least this crowded are predicted with numpy; below it the
+# per-call overhead of numpy outweighs its per-element speed
+VECTORIZE_ABOVE = 64
+SEVERITY_RANK = {ConflictSeverity.LOW: 0, ConflictSeverity.MEDIUM: 1, ConflictSeverity.HIGH: 2}
+
+
+class StreamMonitor:
+    def __init__(self, safety_buffer: float = 2.0, horizon: float = 10.0, caution_factor: float = 2.0,
+                 urgent_time: float = 3.0, max_speed: float = 20.0, stale_after: float = 2.0,
+                 cell_size: Optional[float] = None, realert_interval: float = 5.0,
+                 metrics: Optional[Metrics] = None):
+        """
+        Streaming conflict monitor for live telemetry.
+
+        Severity of a predicted conflict:
+            HIGH: separation is already below ``safety_buffer``, or the CPA is
+                below it within ``urgent_time`` seconds
+            MEDIUM: the CPA is below ``safety_buffer`` within ``horizon`` seconds
+            LOW: the CPA is below ``caution_factor * safety_buffer`` within ``horizon``
+
+        A pair is reported when it first enters an alert, when its severity
+        rises, and every ``realert_interval`` seconds while it stays in alert.
+
+        Args:
+            safety_buffer: Minimum separation distance in meters
+            horizon: Look-ahead of the CPA prediction in seconds
+            caution_factor: Multiple of the safety buffer that raises LOW alerts
+            urgent_time: Time to CPA in seconds below which a predicted loss of separation is HIGH
+            max_speed: Expected top drone speed in m/s; sizes the spatial hash. Faster
+                drones are still handled, with a wider neighbourhood search
+            stale_after: Seconds after which a drone without updates is ignored and dropped
+            cell_size: Spatial hash cell edge in meters (defaults to the search reach at max_speed)
+            realert_interval: Seconds between repeated reports of an ongoing alert
+            metrics: Optional instrumentation collector
+        """
+        self.safety_buffer = safety_buffer
+        self.horizon = horizon
+        self.caution_distance = caution_factor * safety_buffer
+        self.urgent_time = urgent_time
+        self.max_speed = max_speed
+        self.stale_after = stale_after
+        self._fastest = max_speed
+        self.cell_size = cell_size or self._reach(max_speed)
+        self.realert_interval = realert_interval
+        self.metrics = metrics if metrics is not None else NULL_METRICS
+        self.epoch: Optional[datetime] = None
+
+        self._states: List[Optional[Tuple[float, ...]]] = []
+        self._ids: List[Optional[str]] = []
+        self._cell_of: List[Optional[Cell]] = []
+        self._slots: Dict[str, int] = {}
+        self._free: List[int] = []
+        self._cells: Dict[Cell, Set[int]] = {}
+        self._neighbourhoods: Dict[int, List[Cell]] = {}
+        self._last_expire = 0.0
+        # Ongoing alerts: (slot, slot) -> (severity, stream time of the last report)
+        self._alerts: Dict[Tuple[int, int], Tuple[ConflictSeverity, float]] = {}
+        self._partners: Dict[int, Set[int]] = {}
+        self.updates = 0
+        self.reports = 0
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def __contains__(self, drone_id: str) -> bool:
+        return drone_id in self._slots
+
+    def _reach(self, speed: float) -> float:
+        """Largest distance at which a drone moving at ``speed`` can still raise an alert."""
+        # Both drones move for the horizon, and the partner may be extrapolated up to stale_after
+        return self.caution_distance + speed * self.horizon + self._fastest * (self.horizon + self.stale_after)
+
+    def _neighbourhood(self, ring: int) -> List[Cell]:
+        offsets = self._neighbourhoods.get(ring)
+        if offsets is None:
+            span = range(-ring, ring + 1)
+            offsets = self._neighbourhoods[ring] = list(itertools.product(span, span))
+        return offsets
+
+    def _slot(self, drone_id: str) -> int:
+        slot = self._slots.get(drone_id)
+        if slot is None:
+            if self._free:
+                slot = self._free.pop()
+            else:
+                slot = len(self._states)
+                self._states.append(None)
+                self._ids.append(None)
+                self._cell_of.append(None)
+            self._slots[drone_id] = slot
+            self._ids[slot] = drone_id
+        return slot
+
+    def remove(self, drone_id: str) -> None:
+        """Forget a drone and its ongoing alerts."""
+        slot = self._slots.pop(drone_id)
+        cell = self._cell_of[slot]
+        if cell is not None:
+            members = self._cells[cell]
+            members.discard(slot)
+            if not members:
+                del self._cells[cell]
+        for partner in self._partners.pop(slot, ()):
+            self._alerts.pop((min(slot, partner), max(slot, partner)), None)
+            self._partners.get(partner, set()).discard(slot)
+        self._ids[slot] = None
+        self._cell_of[slot] = None
+        self._states[slot] = None
+        self._free.append(slot)
+
+    def expire(self, now: float) -> List[str]:
+        """Drop drones without an update for more than ``stale_after`` seconds of stream time."""
+        cutoff = now - self.stale_after
+        dropped = [self._ids[slot] for slot, state in enumerate(self._states)
+                   if state is not None and state[T] < cutoff]
+        for drone_id in dropped:
+            self.remove(drone_id)
+        self._last_expire = now
+        return dropped
+
+    def update(self, state: DroneState) -> List[ConflictReport]:
+        """
+        Ingest one telemetry update and return the conflict reports it raises.
+
+        Updates older than the drone's latest known state are ignored.
+        """
+        with self.metrics.phase('monitor.update'):
+            reports = self._update(state)
+        if self.metrics.enabled:
+            self.metrics.count('telemetry_updates')
+            self.metrics.count('conflict_reports', len(reports))
+        return reports
+
+    def _update(self, state: DroneState) -> List[ConflictReport]:
+        if self.epoch is None:
+            self.epoch = state.timestamp
+        now = (state.timestamp - self.epoch).total_seconds()
+        slot = self._slot(state.drone_id)
+        previous_state = self._states[slot]
+        if previous_state is not None and now < previous_state[T]:
+            return []
+        self.updates += 1
+        if now - self._last_expire > self.stale_after:
+            self.expire(now)
+            slot = self._slot(state.drone_id)
+
+        x, y, z = state.position
+        vx, vy, vz = state.velocity
+        own = (x, y, z, vx, vy, vz, now)
+        self._states[slot] = own
+        size = self.cell_size
+        cell = (math.floor(x / size), math.floor(y / size))
+        previous = self._cell_of[slot]
+        if cell != previous:
+            if previous is not None:
+                members = self._cells[previous]
+                members.discard(slot)
+                if not members:
+                    del self._cells[previous]
+            self._cells.setdefault(cell, set()).add(slot)
+            self._cell_of[slot] = cell
+
+        speed = math.sqrt(vx * vx + vy * vy + vz * vz)
+        if speed > self._fastest:
+            self._fastest = speed
+        ring = max(1, math.ceil(self._reach(speed) / size))
+        cx, cy = cell
+        cells = self._cells
+        candidates = []
+        for dx, dy in self._neighbourhood(ring):
+            members = cells.get((cx + dx, cy + dy))
+            if members:
+                candidates.extend(members)
+        candidates.remove(slot)
+
+        if len(candidates) >= VECTORIZE_ABOVE:
+            hits = self._predict_vectorized(own, candidates)
+        else:
+            hits = self._predict(own, candidates)
+        return self._raise(slot, state, own, hits)
+
+    def _predict(self, own: Tuple[float, ...], candidates: List[int]) -> Dict[int, Tuple[float, float, float]]:
+        """
+        Closest approach of one drone to each candidate within the horizon.
+
+        Returns:
+            {slot: (CPA distance, time to CPA, current distance)} for the
+            candidates whose CPA is within the caution distance
+        """
+        x, y, z, vx, vy, vz, now = own
+        horizon = self.horizon
+        stale_after = self.stale_after
+        caution_sq = self.caution_distance ** 2
+        states = self._states
+        hits = {}
+        for k in candidates:
+            ox, oy, oz, ovx, ovy, ovz, t = states[k]
+            age = now - t
+            if age > stale_after:
+                continue
+            # Relative position and velocity of the partner, extrapolated to now
+            rx = ox + ovx * age - x
+            ry = oy + ovy * age - y
+            rz = oz + ovz * age - z
+            wx = ovx - vx
+            wy = ovy - vy
+            wz = ovz - vz
+            closing = wx * wx + wy * wy + wz * wz
+            t_cpa = -(rx * wx + ry * wy + rz * wz) / closing if closing > 0 else 0.0
+            t_cpa = 0.0 if t_cpa < 0.0 else (horizon if t_cpa > horizon else t_cpa)
+            mx = rx + wx * t_cpa
+            my = ry + wy * t_cpa
+            mz = rz + wz * t_cpa
+            cpa_sq = mx * mx + my * my + mz * mz
+            if cpa_sq < caution_sq:
+                hits[k] = (math.sqrt(cpa_sq), t_cpa, math.sqrt(rx * rx + ry * ry + rz * rz))
+        return hits
+
+    def _predict_vectorized(self, own: Tuple[float, ...],
+                            candidates: List[int]) -> Dict[int, Tuple[float, float, float]]:
+        """Same as _predict, in numpy for crowded neighbourhoods."""
+        block = np.array([self._states[k] for k in candidates])
+        age = own[T] - block[:, T]
+        vel = block[:, VX:T]
+        rel_pos = block[:, X:VX] + vel * age[:, None] - own[X:VX]
+        rel_vel = vel - own[VX:T]
+        closing = (rel_vel * rel_vel).sum(axis=1)
+        t_cpa = np.zeros(len(candidates))
+        np.divide(-(rel_pos * rel_vel).sum(axis=1), closing, out=t_cpa, where=closing > 0)
+        np.minimum(np.maximum(t_cpa, 0.0, out=t_cpa), self.horizon, out=t_cpa)
+        miss = rel_pos + rel_vel * t_cpa[:, None]
+        cpa_sq = (miss * miss).sum(axis=1)
+        alerts = ((cpa_sq < self.caution_distance ** 2) & (age <= self.stale_after)).nonzero()[0]
+        return {candidates[k]: (math.sqrt(cpa_sq[k]), float(t_cpa[k]), math.sqrt(rel_pos[k] @ rel_pos[k]))
+                for k in alerts.tolist()}
+
+    def _severity(self, cpa_dist: float, t_cpa: float, current: float) -> ConflictSeverity:
+        if current < self.safety_buffer or (cpa_dist < self.safety_buffer and t_cpa <= self.urgent_time):
+            return ConflictSeverity.HIGH
+        if cpa_dist < self.safety_buffer:
+            return ConflictSeverity.MEDIUM
+        return ConflictSeverity.LOW
+
+    def _raise(self, slot: int, state: DroneState, own: Tuple[float, ...],
+               hits: Dict[int, Tuple[float, float, float]]) -> List[ConflictReport]:
+        now = own[T]
+        # Alerts of this drone whose partner no longer predicts a conflict are cleared
+        partners = self._partners.setdefault(slot, set())
+        for partner in partners - hits.keys():
+            self._alerts.pop((min(slot, partner), max(slot, partner)), None)
+            self._partners[partner].discard(slot)
+            partners.discard(partner)
+
+        reports = []
+        for partner, (cpa_dist, t_cpa, current) in hits.items():
+            severity = self._severity(cpa_dist, t_cpa, current)
+            key = (min(slot, partner), max(slot, partner))
+            previous = self._alerts.get(key)
+            if previous is not None and SEVERITY_RANK[severity] <= SEVERITY_RANK[previous[0]] \
+                    and now - previous[1] < self.realert_interval:
+                continue
+            self._alerts[key] = (severity, now)
+            partners.add(partner)
+            self._partners.setdefault(partner, set()).add(slot)
+            position = (own[X] + own[VX] * t_cpa, own[Y] + own[VY] * t_cpa, own[Z] + own[VZ] * t_cpa)
+            reports.append(ConflictReport(
+                drone1_id=state.drone_id,
+                drone2_id=self._ids[partner],
+                conflict_time=state.timestamp + timedelta(seconds=t_cpa),
+                conflict_position=position,
+                minimum_distance=cpa_dist,
+                severity=severity,
+                description=f"{severity.value}: predicted separation {cpa_dist:.2f}m in {t_cpa:.1f}s "
+                            f"(currently {current:.2f}m)"
+            ))
+        self.reports += len(reports)
+        return reports
+
+    def run(self, states: Iterable[DroneState],
+            on_report: Optional[Callable[[ConflictReport], None]] = None) -> List[ConflictReport]:
+        """Feed a stream of states through the monitor, returning (or handing off) every report."""
+        reports = []
+        for state in states:
+            for report in self.update(state):
+                if on_report is None:
+                    reports.append(report)
+                else:
+                    on_report(report)
+        return reports
+
+    @property
+    def active_alerts(self) -> List[Tuple[str, str, ConflictSeverity]]:
+        """Pairs currently in alert with their latest severity."""
+        return [(self._ids[a], self._ids[b], severity) for (a, b), (severity, _) in self._alerts.items()]
+
+
+def state_from_dict(data: Dict) -> DroneState:
+    return DroneState(
+        drone_id=data['drone_id'],
+        timestamp=datetime.fromisoformat(data['timestamp']),
+        position=tuple(data['position']),
+        velocity=tuple(data['velocity'])
+    )
+
+
+def state_to_dict(state: DroneState) -> Dict:
+    return {'drone_id': state.drone_id, 'timestamp': state.timestamp.isoformat(),
+            'position': list(state.position), 'velocity': list(state.velocity)}
+
+
+def report_to_dict(report: ConflictReport) -> Dict:
+    return {
+        'drone1_id': report.drone1_id,
+        'drone2_id': report.drone2_id,
+        'conflict_time': report.conflict_time.isoformat(),
+        'conflict_position': list(report.conflict_position),
+        'minimum_distance': report.minimum_distance,
+        'severity': report.severity.value,
+        'description': report.description,
+    }
+
+
+def replay_file(filename: str) -> Iterator[DroneState]:
+    """Yield the states of a recorded JSON-lines telemetry file."""
+    with open(filename, 'r') as f:
+        for line in f:
+            if line.strip():
+                yield state_from_dict(json.loads(line))
+
+
+async def monitor_connection(monitor: StreamMonitor, reader: asyncio.StreamReader,
+                             on_report: Callable[[ConflictReport], None]) -> None:
+    """Feed line-delimited JSON telemetry from one connection into the monitor."""
+    while True:
+        line = await reader.readline()
+        if not line:
+            break
+        try:
+            state = state_from_dict(json.loads(line))
+        except (ValueError, KeyError, TypeError):
+            continue
+        for report in monitor.update(state):
+            on_report(report)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Monitor live drone telemetry for conflicts')
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--replay', help='recorded JSON-lines telemetry file')
+    source.add_argument('--listen', type=int, help='TCP port to accept line-delimited JSON telemetry on')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--safety-buffer', type=float, default=2.0)
+    parser.add_argument('--horizon', type=float, default=10.0)
+    parser.add_argument('--max-speed', type=float, default=20.0)
+    args = parser.parse_args()
+
+    monitor = StreamMonitor(safety_buffer=args.safety_buffer, horizon=args.horizon, max_speed=args.max_speed)
+
+    def emit(report: ConflictReport) -> None:
+        print(json.dumps(report_to_dict(report)), flush=True)
+
+    if args.replay:
+        monitor.run(replay_file(args.replay), emit)
+        print(f"{monitor.updates} updates, {monitor.reports} reports", file=sys.stderr)
+        return
+
+    async def run():
+        server = await asyncio.start_server(lambda r, w: monitor_connection(monitor, r, emit),
+                                            args.host, args.listen)
+        async with server:
+            await server.serve_forever()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,189 @@
+"""
+Columnar on-disk mission store.
+
+A store is a directory of uncompressed ``.npy`` columns that are memory-mapped
+on open, so opening even a very large airspace costs a few page faults:
+
+    drone_ids.npy     (D,)    unicode drone identifiers
+    offsets.npy       (D+1,)  int64 row offsets of each drone's waypoints
+    waypoints.npy     (W, 3)  float64 waypoint positions of all drones
+    start_offset.npy  (D,)    float64 start offsets in seconds
+    end_offset.npy    (D,)    float64 end offsets in seconds (0 = unconstrained)
+    speed.npy         (D,)    float64 cruise speeds in m/s
+    sorted_ids.npy    (D,)    drone identifiers in sorted order
+    sorted_rows.npy   (D,)    int64 row of each sorted identifier, for O(log D) lookups
+
+Convert an existing waypoints.json with:
+
+    python mission_store.py waypoints.json waypoints.store
+"""
+from collections.abc import Mapping, Sequence
+from typing import Dict, Iterator, List
+from datetime import datetime
+import argparse
+import json
+import os
+import numpy as np
+from models import Mission
+
+COLUMNS = ('drone_ids', 'offsets', 'waypoints', 'start_offset', 'end_offset', 'speed',
+           'sorted_ids', 'sorted_rows')
+
+
+def is_store(path: str) -> bool:
+    """Return True if ``path`` is a mission store directory."""
+    return os.path.isdir(path) and os.path.exists(os.path.join(path, 'offsets.npy'))
+
+
+class MissionStore:
+    def __init__(self, path: str, mmap: bool = True):
+        """
+        Open a mission store.
+
+        Args:
+            path: Store directory
+            mmap: Memory-map the columns instead of reading them into memory
+        """
+        self.path = path
+        mode = 'r' if mmap else None
+        for name in COLUMNS:
+            setattr(self, name, np.load(os.path.join(path, f'{name}.npy'), mmap_mode=mode))
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def index_of(self, drone_id: str) -> int:
+        """
+        Row of a drone in the store.
+
+        Raises:
+            KeyError: If the drone is not in the store
+        """
+        k = int(np.searchsorted(self.sorted_ids, drone_id))
+        if k == len(self.sorted_ids) or self.sorted_ids[k] != drone_id:
+            raise KeyError(drone_id)
+        return int(self.sorted_rows[k])
+
+    def positions(self, i: int) -> np.ndarray:
+        """Waypoint positions of the i-th drone, as a view into the mapped column."""
+        return self.waypoints[self.offsets[i]:self.offsets[i + 1]]
+
+    def mission(self, i: int, global_start_time: datetime, simulator) -> Mission:
+        """Build the i-th drone's Mission exactly as the JSON loader would."""
+        return simulator.create_mission_from_waypoints(
+            drone_id=str(self.drone_ids[i]),
+            waypoints=[tuple(p) for p in self.positions(i).tolist()],
+            start_offset=float(self.start_offset[i]),
+            end_offset=float(self.end_offset[i]),
+            speed=float(self.speed[i]),
+            global_start_time=global_start_time
+        )
+
+    def missions(self, global_start_time: datetime, simulator) -> 'LazyMissions':
+        """Sequence of all missions, materialized on first access."""
+        return LazyMissions(self, global_start_time, simulator)
+
+    @staticmethod
+    def write(path: str, data: Dict) -> None:
+        """Write missions in the waypoints.json schema ({'drones': [...]}) as a store."""
+        drones = data['drones']
+        os.makedirs(path, exist_ok=True)
+        counts = [len(d['waypoints']) for d in drones]
+        drone_ids = np.array([d['drone_id'] for d in drones], dtype=str)
+        order = np.argsort(drone_ids, kind='stable')
+        columns = {
+            'drone_ids': drone_ids,
+            'offsets': np.concatenate(([0], np.cumsum(counts))).astype(np.int64),
+            'waypoints': np.array([(wp['x'], wp['y'], wp['z']) for d in drones for wp in d['waypoints']],
+                                  dtype=np.float64).reshape(-1, 3),
+            # Same defaults as FlightPathSimulator.load_missions_from_file
+            'start_offset': np.array([d.get('start_time', 0) for d in drones], dtype=np.float64),
+            'end_offset': np.array([d.get('end_time', 0) for d in drones], dtype=np.float64),
+            'speed': np.array([d.get('speed', 5) for d in drones], dtype=np.float64),
+            'sorted_ids': drone_ids[order],
+            'sorted_rows': order.astype(np.int64),
+        }
+        for name, column in columns.items():
+            np.save(os.path.join(path, f'{name}.npy'), column)
+
+    @classmethod
+    def from_json(cls, filename: str, path: str) -> 'MissionStore':
+        """Convert a waypoints.json file into a store and open it."""
+        with open(filename, 'r') as f:
+            cls.write(path, json.load(f))
+        return cls(path)
+
+
+class LazyMissions(Sequence):
+    """Read-only sequence of a store's missions that builds each Mission on first access."""
+
+    def __init__(self, store: MissionStore, global_start_time: datetime, simulator):
+        self.store = store
+        self.global_start_time = global_start_time
+        self.simulator = simulator
+        self._missions: Dict[int, Mission] = {}
+
+    def __len__(self) -> int:
+        return len(self.store)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[k] for k in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        if i not in self._missions:
+            self._missions[i] = self.store.mission(i, self.global_start_time, self.simulator)
+        return self._missions[i]
+
+    def __add__(self, other) -> List[Mission]:
+        return list(self) + list(other)
+
+    def __radd__(self, other) -> List[Mission]:
+        return list(other) + list(self)
+
+    def get(self, drone_id: str) -> Mission:
+        """Mission of a drone by id."""
+        return self[self.store.index_of(drone_id)]
+
+    @property
+    def materialized(self) -> int:
+        """Number of missions built so far."""
+        return len(self._missions)
+
+    def flight_paths(self) -> 'LazyFlightPaths':
+        """Mapping of drone id to trajectory, simulated on first access."""
+        return LazyFlightPaths(self)
+
+
+class LazyFlightPaths(Mapping):
+    """Mapping of drone id to simulated Trajectory that simulates each mission on first access."""
+
+    def __init__(self, missions: LazyMissions):
+        self.missions = missions
+        self._paths = {}
+
+    def __getitem__(self, drone_id: str):
+        if drone_id not in self._paths:
+            self._paths[drone_id] = self.missions.simulator.simulate_flight_path(self.missions.get(drone_id))
+        return self._paths[drone_id]
+
+    def __iter__(self) -> Iterator[str]:
+        return (str(d) for d in self.missions.store.drone_ids)
+
+    def __len__(self) -> int:
+        return len(self.missions)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Convert a waypoints.json file into a columnar mission store')
+    parser.add_argument('source', help='waypoints.json file')
+    parser.add_argument('store', help='output store directory')
+    args = parser.parse_args()
+    store = MissionStore.from_json(args.source, args.store)
+    print(f"Wrote {len(store)} missions ({len(store.waypoints)} waypoints) to {args.store}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,10 +1,12 @@
 from dataclasses import dataclass
-from typing import List, Tuple
+from typing import Dict, List, Tuple
 from datetime import datetime
 from enum import Enum
 import numpy as np
 
 class ConflictSeverity(Enum):
+    LOW = "LOW"
+    MEDIUM = "MEDIUM"
     HIGH = "HIGH"
 
 @dataclass
@@ -47,3 +49,83 @@ class Conflict:
     location: Tuple[float, float, float]
     distance: float  # in meters
     time_diff: float  # in seconds
+
+
+def conflict_to_dict(conflict: Conflict) -> Dict:
+    """JSON-ready form of a conflict, as reported by the service and the CLI."""
+    return {
+        'drone1_id': conflict.drone1_id,
+        'drone2_id': conflict.drone2_id,
+        'start_time': conflict.time.isoformat(),
+        'location': list(conflict.location),
+        'minimum_distance': conflict.distance,
+        'duration': conflict.time_diff,
+    }
+
+
+# Slotted, immutable variants of the models above. They hold the same fields,
+# without a per-instance __dict__, and convert losslessly with from_model/to_model.
+
+@dataclass(frozen=True)
+class FrozenWaypoint:
+    __slots__ = ('x', 'y', 'z', 'timestamp', 'speed')
+    x: float
+    y: float
+    z: float
+    timestamp: datetime
+    speed: float
+
+    def __reduce__(self):
+        return self.__class__, (self.x, self.y, self.z, self.timestamp, self.speed)
+
+    @classmethod
+    def from_model(cls, waypoint: Waypoint) -> 'FrozenWaypoint':
+        return cls(waypoint.x, waypoint.y, waypoint.z, waypoint.timestamp, waypoint.speed)
+
+    def to_model(self) -> Waypoint:
+        return Waypoint(x=self.x, y=self.y, z=self.z, timestamp=self.timestamp, speed=self.speed)
+
+
+@dataclass(frozen=True)
+class FrozenMission:
+    __slots__ = ('drone_id', 'waypoints', 'start_time', 'end_time')
+    drone_id: str
+    waypoints: Tuple[FrozenWaypoint, ...]
+    start_time: datetime
+    end_time: datetime
+
+    def __reduce__(self):
+        return self.__class__, (self.drone_id, self.waypoints, self.start_time, self.end_time)
+
+    @classmethod
+    def from_model(cls, mission: Mission) -> 'FrozenMission':
+        return cls(mission.drone_id, tuple(FrozenWaypoint.from_model(wp) for wp in mission.waypoints),
+                   mission.start_time, mission.end_time)
+
+    def to_model(self) -> Mission:
+        return Mission(drone_id=self.drone_id, waypoints=[wp.to_model() for wp in self.waypoints],
+                       start_time=self.start_time, end_time=self.end_time)
+
+
+@dataclass(frozen=True)
+class FrozenConflict:
+    __slots__ = ('drone1_id', 'drone2_id', 'time', 'location', 'distance', 'time_diff')
+    drone1_id: str
+    drone2_id: str
+    time: datetime
+    location: Tuple[float, float, float]
+    distance: float
+    time_diff: float
+
+    def __reduce__(self):
+        return self.__class__, (self.drone1_id, self.drone2_id, self.time, self.location, self.distance,
+                                self.time_diff)
+
+    @classmethod
+    def from_model(cls, conflict: Conflict) -> 'FrozenConflict':
+        return cls(conflict.drone1_id, conflict.drone2_id, conflict.time, tuple(conflict.location),
+                   conflict.distance, conflict.time_diff)
+
+    def to_model(self) -> Conflict:
+        return Conflict(drone1_id=self.drone1_id, drone2_id=self.drone2_id, time=self.time,
+                        location=self.location, distance=self.distance, time_diff=self.time_diff)
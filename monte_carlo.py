@@ -0,0 +1,365 @@
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+import os
+import time
+import numpy as np
+from models import Mission, ConflictSeverity
+from analytic_detector import MissionSegments, segment_pair_separation, PAIR_BLOCK
+from broad_phase import BroadPhaseIndex
+from instrumentation import Metrics, NULL_METRICS
+
+# Per-process state set up by _init_worker
+_worker = {}
+
+# Normal quantile of the two-sided 95% confidence interval used for early stopping
+Z_95 = 1.959963984540054
+
+
+@dataclass
+class TimingJitter:
+    """
+    Timing perturbations drawn independently for every mission and realization.
+
+    A mission departs ``delay`` seconds late and flies its route at ``factor``
+    times the planned speed, so a waypoint planned ``t`` seconds after the
+    departure is reached ``delay + t / factor`` seconds after the planned one.
+    Positions are unchanged.
+
+    Attributes:
+        delay_mean: Mean departure delay in seconds
+        delay_sigma: Standard deviation of the departure delay in seconds
+        speed_sigma: Standard deviation of the speed factor around 1
+        truncate: Draws are clipped to this many standard deviations
+    """
+    delay_mean: float = 0.0
+    delay_sigma: float = 10.0
+    speed_sigma: float = 0.05
+    truncate: float = 3.0
+
+    def __post_init__(self):
+        if self.delay_sigma < 0 or self.speed_sigma < 0 or self.truncate < 0:
+            raise ValueError("jitter deviations must be non-negative")
+        if self.speed_sigma * self.truncate >= 1:
+            raise ValueError("speed_sigma * truncate must be below 1, so every speed factor is positive")
+
+    def sample(self, rng: np.random.Generator, realizations: int, missions: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Departure delays and speed factors, each of shape (realizations, missions)."""
+        limit = self.truncate
+        delays = self.delay_mean + self.delay_sigma * np.clip(rng.standard_normal((realizations, missions)),
+                                                              -limit, limit)
+        factors = 1.0 + self.speed_sigma * np.clip(rng.standard_normal((realizations, missions)), -limit, limit)
+        return delays, factors
+
+    def max_shift(self, duration: float) -> float:
+        """Largest time shift of any point of a mission lasting ``duration`` seconds."""
+        slowest = 1.0 - self.speed_sigma * self.truncate
+        fastest = 1.0 + self.speed_sigma * self.truncate
+        delay = abs(self.delay_mean) + self.delay_sigma * self.truncate
+        return delay + duration * max(1.0 / slowest - 1.0, 1.0 - 1.0 / fastest)
+
+
+@dataclass
+class ConflictProbability:
+    """
+    Estimated conflict probability of one drone pair.
+
+    Attributes:
+        drone1_id: First drone, in mission order
+        drone2_id: Second drone
+        probability: Fraction of realizations with a conflict
+        conflicts: Number of realizations with a conflict
+        realizations: Number of realizations evaluated
+        half_width: Half-width of the 95% Wilson confidence interval of the probability
+        min_distance: Smallest separation over all realizations in meters
+        severity: Severity graded from the probability
+    """
+    drone1_id: str
+    drone2_id: str
+    probability: float
+    conflicts: int
+    realizations: int
+    half_width: float
+    min_distance: float
+    severity: ConflictSeverity
+
+
+@dataclass
+class MonteCarloStats:
+    """Statistics of the last Monte Carlo run."""
+    drone_pairs: int = 0
+    segment_pairs: int = 0
+    realizations: int = 0
+    chunks: int = 0
+    elapsed_seconds: float = 0.0
+    converged: bool = False
+    stop_reason: str = ''
+
+    @property
+    def realizations_per_second(self) -> float:
+        return self.realizations / self.elapsed_seconds if self.elapsed_seconds > 0 else 0.0
+
+
+def wilson_half_width(conflicts: np.ndarray, realizations: int, z: float = Z_95) -> np.ndarray:
+    """Half-width of the Wilson score interval of ``conflicts / realizations``."""
+    p = conflicts / realizations
+    z2 = z * z
+    return z * np.sqrt(p * (1 - p) / realizations + z2 / (4 * realizations ** 2)) / (1 + z2 / realizations)
+
+
+def _init_worker(state: Dict[str, np.ndarray], jitter: TimingJitter, params: Tuple[float, float]):
+    _worker['state'] = state
+    _worker['jitter'] = jitter
+    _worker['params'] = params
+
+
+def _run_chunk(seed: np.random.SeedSequence, realizations: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Evaluate a chunk of realizations in a worker."""
+    return simulate_chunk(_worker['state'], _worker['jitter'], *_worker['params'], seed, realizations)
+
+
+def simulate_chunk(state: Dict[str, np.ndarray], jitter: TimingJitter, safety_buffer: float, time_buffer: float,
+                   seed: np.random.SeedSequence, realizations: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Draw a chunk of realizations and find the drone pairs in conflict in each.
+
+    Every realization retimes all missions at once; separations of the
+    candidate segment pairs are then solved in closed form, vectorized over
+    realizations and segment pairs.
+
+    Args:
+        state: Segment table and candidate segment pairs built by MonteCarloConflictDetector
+        jitter: Timing perturbation distribution
+        safety_buffer: Minimum separation distance in meters
+        time_buffer: Temporal tolerance in seconds
+        seed: Seed of this chunk's random stream
+        realizations: Number of realizations to draw
+
+    Returns:
+        Number of realizations with a conflict per drone pair, shape (P,), and
+        the smallest separation over the chunk per drone pair, shape (P,)
+    """
+    rng = np.random.default_rng(seed)
+    delays, factors = jitter.sample(rng, realizations, len(state['departure']))
+    departure, mission = state['departure'], state['mission']
+    first, second, pair = state['first'], state['second'], state['pair']
+    pairs = int(state['pairs'])
+    # Segment times and velocities of every mission in every realization, shape (R, S)
+    shift = departure[mission] + delays[:, mission]
+    scale = factors[:, mission]
+    t0 = shift + (state['t0'] - departure[mission]) / scale
+    t1 = shift + (state['t1'] - departure[mission]) / scale
+
+    in_conflict = np.zeros((realizations, pairs), dtype=bool)
+    min_distance = np.full(pairs, np.inf)
+    step = max(1, PAIR_BLOCK // realizations)
+    for begin in range(0, len(first), step):
+        a, b = first[begin:begin + step], second[begin:begin + step]
+        owner = np.broadcast_to(pair[begin:begin + step], (realizations, len(a))).ravel()
+        rows = np.repeat(np.arange(realizations), len(a))
+        t0a, t1a, t0b, t1b = t0[:, a].ravel(), t1[:, a].ravel(), t0[:, b].ravel(), t1[:, b].ravel()
+        overlap = np.maximum(t0a, t0b - time_buffer) <= np.minimum(t1a, t1b + time_buffer)
+        if not overlap.any():
+            continue
+        columns = np.broadcast_to(np.arange(len(a)), (realizations, len(a))).ravel()[overlap]
+        rows, owner = rows[overlap], owner[overlap]
+        seg_a, seg_b = a[columns], b[columns]
+        distances, _ = segment_pair_separation(
+            t0a[overlap], t1a[overlap], state['p0'][seg_a], state['velocity'][seg_a] * scale[rows, seg_a][:, None],
+            t0b[overlap], t1b[overlap], state['p0'][seg_b], state['velocity'][seg_b] * scale[rows, seg_b][:, None],
+            time_buffer)
+        np.minimum.at(min_distance, owner, distances)
+        hits = distances <= safety_buffer
+        in_conflict[rows[hits], owner[hits]] = True
+    return in_conflict.sum(axis=0), min_distance
+
+
+class MonteCarloConflictDetector:
+    def __init__(self, safety_buffer: float = 2.0, time_buffer: float = 2.0,
+                 jitter: Optional[TimingJitter] = None, cell_size: float = 25.0, time_cell: float = 10.0,
+                 severity_thresholds: Tuple[float, float] = (0.1, 0.5), workers: Optional[int] = None,
+                 metrics: Optional[Metrics] = None):
+        """
+        Uncertainty-aware conflict checks by Monte Carlo over timing jitter.
+
+        Each realization draws a departure delay and a speed factor for every
+        mission (see TimingJitter) and checks all missions with the exact
+        piecewise-linear model of AnalyticConflictDetector. A drone pair's
+        conflict probability is the fraction of realizations in which it
+        conflicts anywhere. Candidate segment pairs come from the broad phase
+        with the time buffer grown by the largest possible shifts, so no pair
+        that conflicts in some realization is missed.
+
+        Realizations are drawn in chunks with independent seeded streams and
+        spread over a process pool. Sampling stops at the first of: every
+        pair's 95% confidence interval is narrower than ``tolerance`` on each
+        side, ``max_realizations`` are done, or ``max_seconds`` have passed.
+
+        Args:
+            safety_buffer: Minimum separation distance in meters
+            time_buffer: Temporal tolerance in seconds
+            jitter: Timing perturbation distribution (defaults to TimingJitter())
+            cell_size: Spatial grid cell edge in meters for the broad phase
+            time_cell: Temporal grid cell length in seconds for the broad phase
+            severity_thresholds: Probabilities from which a pair is MEDIUM and HIGH; below is LOW
+            workers: Number of worker processes (defaults to the CPU count; 1 runs in-process)
+            metrics: Optional instrumentation collector
+        """
+        self.safety_buffer = safety_buffer
+        self.time_buffer = time_buffer
+        self.jitter = jitter or TimingJitter()
+        self.cell_size = cell_size
+        self.time_cell = time_cell
+        self.severity_thresholds = severity_thresholds
+        self.workers = workers or os.cpu_count() or 1
+        self.metrics = metrics if metrics is not None else NULL_METRICS
+        self.stats = MonteCarloStats()
+
+    def severity(self, probability: float) -> ConflictSeverity:
+        """Severity of a conflict with the given probability."""
+        medium, high = self.severity_thresholds
+        if probability >= high:
+            return ConflictSeverity.HIGH
+        if probability >= medium:
+            return ConflictSeverity.MEDIUM
+        return ConflictSeverity.LOW
+
+    def _prepare(self, missions: List[Mission]) -> Tuple[Dict[str, np.ndarray], List[Tuple[str, str]]]:
+        """Segment table of all missions and the segment pairs that may conflict in some realization."""
+        epoch = min(m.start_time for m in missions)
+        segments = [MissionSegments.from_mission(m, epoch) for m in missions]
+        longest = max(float(s.t1[-1] - s.t0[0]) for s in segments)
+        index = BroadPhaseIndex.from_missions(missions, safety_buffer=self.safety_buffer,
+                                              time_buffer=self.time_buffer + 2 * self.jitter.max_shift(longest),
+                                              cell_size=self.cell_size, time_cell=self.time_cell, epoch=epoch)
+        candidates = index.candidate_pairs()
+        offsets = np.concatenate(([0], np.cumsum([len(s) for s in segments])))
+        position = {m.drone_id: k for k, m in enumerate(missions)}
+        drone_pairs = list(candidates)
+        first, second, pair = [], [], []
+        for k, (id1, id2) in enumerate(drone_pairs):
+            for seg1, seg2 in candidates[(id1, id2)]:
+                first.append(offsets[position[id1]] + seg1)
+                second.append(offsets[position[id2]] + seg2)
+                pair.append(k)
+        state = {
+            'departure': np.array([s.t0[0] for s in segments]),
+            'mission': np.repeat(np.arange(len(segments)), np.diff(offsets)),
+            't0': np.concatenate([s.t0 for s in segments]),
+            't1': np.concatenate([s.t1 for s in segments]),
+            'p0': np.concatenate([s.p0 for s in segments]),
+            'velocity': np.concatenate([s.velocity for s in segments]),
+            'first': np.array(first, dtype=np.int64),
+            'second': np.array(second, dtype=np.int64),
+            'pair': np.array(pair, dtype=np.int64),
+            'pairs': np.int64(len(drone_pairs)),
+        }
+        return state, drone_pairs
+
+    def conflict_probabilities(self, missions: List[Mission], max_realizations: int = 10000,
+                               tolerance: float = 0.02, max_seconds: Optional[float] = None,
+                               chunk_size: int = 200, min_realizations: int = 400,
+                               seed: int = 0) -> List[ConflictProbability]:
+        """
+        Estimate the conflict probability of every drone pair.
+
+        Args:
+            missions: Missions to check
+            max_realizations: Largest number of realizations
+            tolerance: Stop once every pair's confidence interval half-width is at most this
+            max_seconds: Stop submitting chunks after this many seconds (no limit when None)
+            chunk_size: Realizations per pool task
+            min_realizations: Realizations drawn before the tolerance is checked
+            seed: Seed of the realization streams; chunk k always uses the k-th spawned stream
+
+        Returns:
+            Pairs that conflicted in at least one realization, most probable first
+        """
+        started = time.perf_counter()
+        self.stats = MonteCarloStats()
+        if len(missions) < 2:
+            self.stats.stop_reason = 'no pairs'
+            return []
+        with self.metrics.phase('monte_carlo.prepare'):
+            state, drone_pairs = self._prepare(missions)
+        self.stats.drone_pairs = len(drone_pairs)
+        self.stats.segment_pairs = len(state['pair'])
+        if not drone_pairs:
+            self.stats.converged = True
+            self.stats.stop_reason = 'no pairs'
+            return []
+
+        conflicts = np.zeros(len(drone_pairs), dtype=np.int64)
+        min_distance = np.full(len(drone_pairs), np.inf)
+        streams = np.random.SeedSequence(seed)
+        deadline = None if max_seconds is None else started + max_seconds
+        done = submitted = 0
+
+        def stop_reason() -> Optional[str]:
+            if done >= min(min_realizations, max_realizations) and \
+                    wilson_half_width(conflicts, done).max() <= tolerance:
+                return 'converged'
+            if submitted >= max_realizations:
+                return 'max_realizations'
+            if deadline is not None and time.perf_counter() >= deadline:
+                return 'max_seconds'
+            return None
+
+        def next_chunk() -> Tuple[np.random.SeedSequence, int]:
+            nonlocal submitted
+            size = min(chunk_size, max_realizations - submitted)
+            submitted += size
+            self.stats.chunks += 1
+            return streams.spawn(1)[0], size
+
+        params = (self.safety_buffer, self.time_buffer)
+        reason = None
+        with self.metrics.phase('monte_carlo.realizations'):
+            if self.workers <= 1:
+                while reason is None:
+                    chunk_seed, size = next_chunk()
+                    chunk_conflicts, chunk_min = simulate_chunk(state, self.jitter, *params, chunk_seed, size)
+                    conflicts += chunk_conflicts
+                    np.minimum(min_distance, chunk_min, out=min_distance)
+                    done += size
+                    reason = stop_reason()
+            else:
+                with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                         initargs=(state, self.jitter, params)) as pool:
+                    # Keep two chunks in flight per worker and fold results in as they arrive
+                    pending = {}
+                    while True:
+                        while reason is None and len(pending) < 2 * self.workers:
+                            chunk_seed, size = next_chunk()
+                            pending[pool.submit(_run_chunk, chunk_seed, size)] = size
+                            reason = stop_reason()
+                        if not pending:
+                            break
+                        finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                        for future in finished:
+                            chunk_conflicts, chunk_min = future.result()
+                            conflicts += chunk_conflicts
+                            np.minimum(min_distance, chunk_min, out=min_distance)
+                            done += pending.pop(future)
+                        if reason is None:
+                            reason = stop_reason()
+
+        stats = self.stats
+        stats.realizations = done
+        stats.converged = bool(wilson_half_width(conflicts, done).max() <= tolerance)
+        stats.stop_reason = reason
+        stats.elapsed_seconds = time.perf_counter() - started
+        if self.metrics.enabled:
+            self.metrics.count('monte_carlo_realizations', done)
+            self.metrics.count('segment_pairs_compared', done * stats.segment_pairs)
+
+        half_widths = wilson_half_width(conflicts, done)
+        results = [
+            ConflictProbability(drone1_id=id1, drone2_id=id2, probability=float(conflicts[k] / done),
+                                conflicts=int(conflicts[k]), realizations=done,
+                                half_width=float(half_widths[k]), min_distance=float(min_distance[k]),
+                                severity=self.severity(conflicts[k] / done))
+            for k, (id1, id2) in enumerate(drone_pairs) if conflicts[k] > 0
+        ]
+        results.sort(key=lambda r: (-r.probability, tuple(sorted([r.drone1_id, r.drone2_id]))))
+        return results
@@ -0,0 +1,254 @@
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from datetime import datetime, timedelta
+import json
+import math
+import numpy as np
+from models import Mission
+from analytic_detector import MissionSegments
+from broad_phase import Cell
+
+Point = Tuple[float, float, float]
+
+
+@dataclass
+class OccupancyStats:
+    """Size of an occupancy grid."""
+    drones: int = 0
+    cells: int = 0
+    cell_entries: int = 0
+    max_cell_occupancy: int = 0
+
+
+@dataclass(eq=False)
+class DensityMap:
+    """
+    Per-column occupancy of an airspace over a time window, for heatmaps and capacity planning.
+
+    Column (i, j) covers x in [origin[0] + i * cell_size, origin[0] + (i + 1) * cell_size)
+    and likewise for y.
+
+    Attributes:
+        cell_size: Column edge in meters
+        origin: (x, y) of the lower corner of column (0, 0)
+        drones: Distinct drones that entered each column during the window, shape (nx, ny)
+        peak: Largest number of drones in one voxel of the column during one time bucket, shape (nx, ny)
+        start: Window start (None when unbounded)
+        end: Window end (None when unbounded)
+    """
+    cell_size: float
+    origin: Tuple[float, float]
+    drones: np.ndarray
+    peak: np.ndarray
+    start: Optional[datetime] = None
+    end: Optional[datetime] = None
+
+    @property
+    def extent(self) -> Tuple[float, float, float, float]:
+        """(x min, x max, y min, y max) of the map in meters."""
+        nx, ny = self.drones.shape
+        x0, y0 = self.origin
+        return x0, x0 + nx * self.cell_size, y0, y0 + ny * self.cell_size
+
+    def to_dict(self) -> Dict:
+        return {
+            'cell_size': self.cell_size,
+            'origin': list(self.origin),
+            'start': self.start.isoformat() if self.start else None,
+            'end': self.end.isoformat() if self.end else None,
+            'drones': self.drones.tolist(),
+            'peak': self.peak.tolist(),
+        }
+
+    def save(self, path: str) -> None:
+        """Write the map as JSON."""
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f)
+
+
+class OccupancyGrid:
+    def __init__(self, cell_size: float = 50.0, time_bucket: float = 10.0, epoch: Optional[datetime] = None):
+        """
+        Sparse 4D occupancy of an airspace: (voxel, time bucket) -> drone ids.
+
+        Each mission is walked segment by segment, and a drone is entered in
+        exactly the voxels its straight path passes through during each time
+        bucket. Only occupied cells are stored, and every drone keeps the set
+        of its cells, so missions are inserted, replaced and removed without
+        rebuilding, and queries touch only the cells they cover.
+
+        Args:
+            cell_size: Voxel edge in meters
+            time_bucket: Time bucket length in seconds
+            epoch: Start of time bucket 0 (defaults to the first mission's start)
+        """
+        if cell_size <= 0 or time_bucket <= 0:
+            raise ValueError("cell_size and time_bucket must be positive")
+        self.cell_size = cell_size
+        self.time_bucket = time_bucket
+        self.epoch = epoch
+        self._grid: Dict[Cell, Set[str]] = {}
+        self._cells: Dict[str, Set[Cell]] = {}
+        self._entry_count = 0
+
+    def __len__(self) -> int:
+        return len(self._cells)
+
+    def __contains__(self, drone_id: str) -> bool:
+        return drone_id in self._cells
+
+    @property
+    def drone_ids(self) -> List[str]:
+        return list(self._cells.keys())
+
+    @property
+    def stats(self) -> OccupancyStats:
+        return OccupancyStats(drones=len(self._cells), cells=len(self._grid), cell_entries=self._entry_count,
+                              max_cell_occupancy=max((len(v) for v in self._grid.values()), default=0))
+
+    def bucket(self, time: datetime) -> int:
+        """Time bucket holding ``time``."""
+        return math.floor((time - self.epoch).total_seconds() / self.time_bucket)
+
+    def bucket_start(self, bucket: int) -> datetime:
+        """Start time of a time bucket."""
+        return self.epoch + timedelta(seconds=bucket * self.time_bucket)
+
+    def cell_of(self, point: Point, time: datetime) -> Cell:
+        """Cell holding a point at a time."""
+        size = self.cell_size
+        return (math.floor(point[0] / size), math.floor(point[1] / size), math.floor(point[2] / size),
+                self.bucket(time))
+
+    def mission_cells(self, mission: Mission) -> Set[Cell]:
+        """Cells a mission passes through."""
+        if self.epoch is None:
+            self.epoch = mission.start_time
+        segments = MissionSegments.from_mission(mission, self.epoch)
+        size, bucket = self.cell_size, self.time_bucket
+        cells = set()
+        for t0, t1, p0, velocity in zip(segments.t0, segments.t1, segments.p0, segments.velocity):
+            duration = t1 - t0
+            p1 = p0 + velocity * duration
+            # Times along the segment where it crosses a voxel face or a bucket boundary
+            breaks = [np.array([0.0, duration])]
+            for axis in range(3):
+                if velocity[axis] != 0:
+                    lo, hi = sorted((p0[axis], p1[axis]))
+                    faces = np.arange(math.floor(lo / size) + 1, math.floor(hi / size) + 1) * size
+                    breaks.append((faces - p0[axis]) / velocity[axis])
+            buckets = np.arange(math.floor(t0 / bucket) + 1, math.floor(t1 / bucket) + 1) * bucket
+            breaks.append(buckets - t0)
+            knots = np.unique(np.clip(np.concatenate(breaks), 0.0, duration))
+            # The midpoint of each piece lies in the one cell the whole piece occupies
+            mids = 0.5 * (knots[:-1] + knots[1:]) if len(knots) > 1 else knots
+            voxels = np.floor((p0 + velocity * mids[:, None]) / size).astype(np.int64)
+            times = np.floor((t0 + mids) / bucket).astype(np.int64)
+            cells.update(zip(*voxels.T.tolist(), times.tolist()))
+        return cells
+
+    def insert(self, mission: Mission) -> None:
+        """Add a mission, replacing any mission with the same drone id."""
+        if mission.drone_id in self._cells:
+            self.remove(mission.drone_id)
+        cells = self.mission_cells(mission)
+        for cell in cells:
+            self._grid.setdefault(cell, set()).add(mission.drone_id)
+        self._cells[mission.drone_id] = cells
+        self._entry_count += len(cells)
+
+    def remove(self, drone_id: str) -> None:
+        """Remove a mission from the grid."""
+        cells = self._cells.pop(drone_id, ())
+        for cell in cells:
+            occupants = self._grid[cell]
+            occupants.discard(drone_id)
+            if not occupants:
+                del self._grid[cell]
+        self._entry_count -= len(cells)
+
+    def occupants(self, cell: Cell) -> Set[str]:
+        """Drones in one cell."""
+        return set(self._grid.get(cell, ()))
+
+    def cells(self, drone_id: str) -> Set[Cell]:
+        """Cells occupied by one drone."""
+        return set(self._cells.get(drone_id, ()))
+
+    def query(self, lo: Point, hi: Point, start: datetime, end: datetime) -> Set[str]:
+        """
+        Drones occupying the box [lo, hi] at some time in [start, end], at cell resolution.
+
+        Every cell overlapping the box and window is visited; when that is more
+        cells than the grid holds, the occupied cells are scanned instead.
+        """
+        if self.epoch is None:
+            return set()
+        first = self.cell_of(lo, start)
+        last = self.cell_of(hi, end)
+        ranges = [range(first[d], last[d] + 1) for d in range(4)]
+        found: Set[str] = set()
+        if math.prod(len(r) for r in ranges) <= len(self._grid):
+            grid = self._grid
+            for i in ranges[0]:
+                for j in ranges[1]:
+                    for k in ranges[2]:
+                        for b in ranges[3]:
+                            occupants = grid.get((i, j, k, b))
+                            if occupants:
+                                found |= occupants
+        else:
+            for cell, occupants in self._grid.items():
+                if all(first[d] <= cell[d] <= last[d] for d in range(4)):
+                    found |= occupants
+        return found
+
+    def density(self, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                altitude: Optional[Tuple[float, float]] = None) -> DensityMap:
+        """
+        Per-column occupancy over a time window and altitude band.
+
+        Args:
+            start: Window start (unbounded when None)
+            end: Window end (unbounded when None)
+            altitude: (min, max) altitude in meters (all altitudes when None)
+
+        Returns:
+            DensityMap covering the occupied columns
+        """
+        first_bucket = -math.inf if start is None or self.epoch is None else self.bucket(start)
+        last_bucket = math.inf if end is None or self.epoch is None else self.bucket(end)
+        first_layer, last_layer = -math.inf, math.inf
+        if altitude is not None:
+            first_layer = math.floor(altitude[0] / self.cell_size)
+            last_layer = math.floor(altitude[1] / self.cell_size)
+        columns: Dict[Tuple[int, int], Set[str]] = {}
+        peaks: Dict[Tuple[int, int], int] = {}
+        for (i, j, k, b), occupants in self._grid.items():
+            if first_bucket <= b <= last_bucket and first_layer <= k <= last_layer:
+                columns.setdefault((i, j), set()).update(occupants)
+                peaks[(i, j)] = max(peaks.get((i, j), 0), len(occupants))
+        if not columns:
+            empty = np.zeros((0, 0), dtype=np.int64)
+            return DensityMap(self.cell_size, (0.0, 0.0), empty, empty.copy(), start, end)
+        keys = np.array(list(columns))
+        i0, j0 = keys.min(axis=0)
+        shape = tuple(keys.max(axis=0) - (i0, j0) + 1)
+        drones = np.zeros(shape, dtype=np.int64)
+        peak = np.zeros(shape, dtype=np.int64)
+        for (i, j), occupants in columns.items():
+            drones[i - i0, j - j0] = len(occupants)
+            peak[i - i0, j - j0] = peaks[(i, j)]
+        return DensityMap(self.cell_size, (float(i0 * self.cell_size), float(j0 * self.cell_size)),
+                          drones, peak, start, end)
+
+    @classmethod
+    def from_missions(cls, missions: Iterable[Mission], **kwargs) -> 'OccupancyGrid':
+        """Build a grid over a list of missions."""
+        missions = list(missions)
+        grid = cls(**kwargs)
+        if grid.epoch is None and missions:
+            grid.epoch = min(m.start_time for m in missions)
+        for mission in missions:
+            grid.insert(mission)
+        return grid
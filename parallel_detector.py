@@ -0,0 +1,136 @@
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+from typing import Dict, List, Optional, Tuple, Union
+from datetime import datetime
+import os
+import numpy as np
+from models import Mission, Conflict
+from trajectory import Trajectory, FlightPath, as_trajectory, common_epoch
+from conflict_detector import ConflictDetector
+from instrumentation import Metrics
+
+# Per-process state set up by _init_worker
+_worker = {}
+
+
+def _init_worker(shm_name: str, total: int, offsets: List[int], epochs: List[datetime],
+                 max_steps: List[Optional[float]], drone_ids: List[str], params: Tuple[float, float, float]):
+    """Attach to the shared trajectory block and build zero-copy trajectory views."""
+    shm = SharedMemory(name=shm_name)
+    times = np.ndarray((total,), dtype=np.float64, buffer=shm.buf)
+    positions = np.ndarray((total, 3), dtype=np.float64, buffer=shm.buf, offset=total * 8)
+    _worker['shm'] = shm  # keep the mapping alive
+    _worker['ids'] = drone_ids
+    _worker['trajectories'] = [
+        Trajectory(epoch=epochs[k], times=times[offsets[k]:offsets[k + 1]],
+                   positions=positions[offsets[k]:offsets[k + 1]], max_step=max_steps[k])
+        for k in range(len(drone_ids))
+    ]
+    _worker['detector'] = ConflictDetector(*params)
+
+
+def _check_pairs(pairs: List[Tuple[int, int]], epoch: datetime) -> Tuple[List[Conflict], List[int], int]:
+    """
+    Detect and group the conflicts of a shard of drone pairs.
+
+    Returns:
+        Grouped conflicts, sample pairs compared for each drone pair and the number of raw conflicts
+    """
+    detector = _worker['detector']
+    ids = _worker['ids']
+    trajectories = _worker['trajectories']
+    grouped = []
+    compared = []
+    raw_count = 0
+    for i, j in pairs:
+        raw = detector.check_pair_table(ids[i], trajectories[i], ids[j], trajectories[j], epoch)
+        grouped.extend(raw.group_intervals(detector.group_step(trajectories[i])).to_conflicts())
+        compared.append(detector.last_pairs_compared)
+        raw_count += len(raw)
+    return grouped, compared, raw_count
+
+
+class ParallelConflictDetector(ConflictDetector):
+    def __init__(self, safety_buffer: float = 2.0, time_buffer: float = 2.0, time_step: float = 0.05,
+                 cell_size: Optional[float] = None, time_cell: float = 10.0,
+                 workers: Optional[int] = None, shards_per_worker: int = 4, metrics: Optional[Metrics] = None):
+        """
+        Conflict detector that shards drone pairs across a process pool.
+
+        Trajectories are copied once into a shared memory block that every
+        worker maps, so no sample data is pickled per task. Results are
+        identical to the serial ConflictDetector.
+
+        Args:
+            safety_buffer: Minimum separation distance in meters
+            time_buffer: Temporal tolerance in seconds
+            time_step: Sampling time step of the flight paths in seconds
+            cell_size: Spatial grid cell edge in meters; enables broad-phase pair pruning when set
+            time_cell: Temporal grid cell length in seconds for the broad phase
+            workers: Number of worker processes (defaults to the CPU count)
+            shards_per_worker: Number of load-balanced shards handed to each worker
+            metrics: Optional instrumentation collector (worker-side phases are timed as one pool phase)
+        """
+        super().__init__(safety_buffer, time_buffer, time_step, cell_size, time_cell, metrics)
+        self.workers = workers or os.cpu_count() or 1
+        self.shards_per_worker = shards_per_worker
+
+    def _shard(self, pairs: List[Tuple[int, int]], sizes: List[int]) -> List[List[Tuple[int, int]]]:
+        """Split pairs into shards of similar cost, largest pairs first."""
+        shard_count = min(len(pairs), self.workers * self.shards_per_worker)
+        shards = [[] for _ in range(shard_count)]
+        loads = [0] * shard_count
+        for i, j in sorted(pairs, key=lambda p: sizes[p[0]] * sizes[p[1]], reverse=True):
+            k = loads.index(min(loads))
+            shards[k].append((i, j))
+            loads[k] += sizes[i] * sizes[j]
+        return [s for s in shards if s]
+
+    def detect_conflicts(self, missions: List[Mission],
+                         flight_paths: Dict[str, Union[Trajectory, FlightPath]]) -> List[Conflict]:
+        """Detect conflicts between all missions using a process pool."""
+        candidates = self._candidates(missions)
+        if self.workers <= 1 or len(candidates) < 2:
+            # Serial path over the same candidates, so the broad phase runs once
+            trajectories, epoch = self._prepare(missions, flight_paths)
+            return self._sort_events(list(self._iter_pairs(candidates, trajectories, epoch)))
+
+        drone_ids = [m.drone_id for m in missions]
+        position = {drone_id: k for k, drone_id in enumerate(drone_ids)}
+        trajectories = [as_trajectory(flight_paths[drone_id]) for drone_id in drone_ids]
+        epoch = common_epoch(trajectories)
+        sizes = [len(t) for t in trajectories]
+        offsets = np.concatenate(([0], np.cumsum(sizes))).tolist()
+        total = offsets[-1]
+        pairs = [(position[m1.drone_id], position[m2.drone_id]) for m1, m2 in candidates]
+
+        shm = SharedMemory(create=True, size=max(total * 4 * 8, 1))
+        try:
+            times = np.ndarray((total,), dtype=np.float64, buffer=shm.buf)
+            positions = np.ndarray((total, 3), dtype=np.float64, buffer=shm.buf, offset=total * 8)
+            for k, trajectory in enumerate(trajectories):
+                times[offsets[k]:offsets[k + 1]] = trajectory.times
+                positions[offsets[k]:offsets[k + 1]] = trajectory.positions
+            del times, positions
+
+            params = (self.safety_buffer, self.time_buffer, self.time_step)
+            shards = self._shard(pairs, sizes)
+            with self.metrics.phase('detect.pool'):
+                with ProcessPoolExecutor(max_workers=min(self.workers, len(shards)), initializer=_init_worker,
+                                         initargs=(shm.name, total, offsets, [t.epoch for t in trajectories],
+                                                   [t.max_step for t in trajectories], drone_ids, params)) as pool:
+                    results = list(pool.map(_check_pairs, shards, [epoch] * len(shards)))
+        finally:
+            shm.close()
+            shm.unlink()
+
+        # Same ordering as group_conflict_intervals over all raw conflicts
+        grouped = [c for shard, _, _ in results for c in shard]
+        compared = {pair: count for shard, (_, counts, _) in zip(shards, results) for pair, count in zip(shard, counts)}
+        self.last_pairs_compared = compared[pairs[-1]]
+        if self.metrics.enabled:
+            self.metrics.count('sample_pairs_compared', sum(compared.values()))
+            self.metrics.count('raw_conflicts', sum(raw_count for _, _, raw_count in results))
+            self.metrics.count('conflict_events', len(grouped))
+        grouped.sort(key=lambda c: (tuple(sorted([c.drone1_id, c.drone2_id])), c.time))
+        return grouped
@@ -0,0 +1,151 @@
+from dataclasses import dataclass, field
+from typing import List, Optional, Sequence, Tuple
+from datetime import datetime, timedelta
+import math
+import time
+from models import Waypoint, Mission, Conflict
+from airspace import Airspace
+
+
+@dataclass
+class ResolutionStats:
+    """Search statistics of one resolve() call."""
+    candidates_evaluated: int = 0
+    candidates_skipped: int = 0
+    residents_checked: int = 0
+    elapsed_seconds: float = 0.0
+
+    @property
+    def candidates_per_second(self) -> float:
+        return self.candidates_evaluated / self.elapsed_seconds if self.elapsed_seconds > 0 else 0.0
+
+
+@dataclass
+class Resolution:
+    """
+    Outcome of resolving a rejected mission.
+
+    Attributes:
+        original: Mission as submitted
+        mission: Conflict-free modified mission, or None if no candidate cleared
+        delay: Departure delay of the modified mission in seconds
+        altitude_offset: Altitude offset of the modified mission in meters
+        conflicts: Conflicts of the original mission with the residents
+        stats: Search statistics
+    """
+    original: Mission
+    mission: Optional[Mission]
+    delay: float
+    altitude_offset: float
+    conflicts: List[Conflict]
+    stats: ResolutionStats = field(default_factory=ResolutionStats)
+
+    @property
+    def resolved(self) -> bool:
+        return self.mission is not None
+
+
+def shift_mission(mission: Mission, delay: float = 0.0, altitude_offset: float = 0.0) -> Mission:
+    """Copy of a mission departing ``delay`` seconds later and flying ``altitude_offset`` meters higher."""
+    shift = timedelta(seconds=delay)
+    return Mission(
+        drone_id=mission.drone_id,
+        waypoints=[Waypoint(x=wp.x, y=wp.y, z=wp.z + altitude_offset, timestamp=wp.timestamp + shift, speed=wp.speed)
+                   for wp in mission.waypoints],
+        start_time=mission.start_time + shift,
+        end_time=mission.end_time + shift
+    )
+
+
+class ConflictResolver:
+    def __init__(self, airspace: Airspace, max_delay: float = 600.0, delay_step: float = 5.0,
+                 max_altitude_offset: float = 50.0, altitude_step: float = 10.0, combine: bool = True,
+                 min_altitude: float = 0.0, max_altitude: Optional[float] = None):
+        """
+        Strategic re-planner that moves a rejected mission in time or altitude until it is clear.
+
+        Candidates are ranked by cost in steps, ``delay / delay_step +
+        |altitude_offset| / altitude_step``, and evaluated cheapest first, so the
+        first clear candidate is the smallest change. At equal cost a pure delay
+        is tried before an altitude change, and climbing before descending.
+        Each candidate is checked against the airspace's persistent broad-phase
+        index and precomputed resident segments, stopping at its first conflict,
+        instead of re-running detection over all missions.
+
+        Args:
+            airspace: Airspace holding the approved missions to resolve against
+            max_delay: Largest departure delay in seconds
+            delay_step: Departure delay increment in seconds
+            max_altitude_offset: Largest altitude offset in meters, up or down
+            altitude_step: Altitude layer spacing in meters
+            combine: Also try delays combined with altitude offsets
+            min_altitude: Lowest altitude a modified mission may fly at
+            max_altitude: Highest altitude a modified mission may fly at (None for no limit)
+        """
+        self.airspace = airspace
+        self.max_delay = max_delay
+        self.delay_step = delay_step
+        self.max_altitude_offset = max_altitude_offset
+        self.altitude_step = altitude_step
+        self.combine = combine
+        self.min_altitude = min_altitude
+        self.max_altitude = max_altitude
+
+    def candidates(self) -> List[Tuple[float, float]]:
+        """(delay, altitude offset) candidates in search order, excluding the unmodified mission."""
+        delays = [k * self.delay_step for k in range(int(math.floor(self.max_delay / self.delay_step + 1e-9)) + 1)]
+        layers = int(math.floor(self.max_altitude_offset / self.altitude_step + 1e-9))
+        offsets = [0.0] + [sign * k * self.altitude_step for k in range(1, layers + 1) for sign in (1, -1)]
+        ranked = []
+        for d, delay in enumerate(delays):
+            for a, offset in enumerate(offsets):
+                if (d == 0 and a == 0) or (d > 0 and a > 0 and not self.combine):
+                    continue
+                cost = d + (a + 1) // 2
+                ranked.append((cost, a > 0, a, d, delay, offset))
+        ranked.sort()
+        return [(delay, offset) for *_, delay, offset in ranked]
+
+    def _within_limits(self, mission: Mission, offset: float, delay: float, latest_end: Optional[datetime]) -> bool:
+        altitudes = [wp.z + offset for wp in mission.waypoints]
+        if min(altitudes) < self.min_altitude:
+            return False
+        if self.max_altitude is not None and max(altitudes) > self.max_altitude:
+            return False
+        return latest_end is None or mission.end_time + timedelta(seconds=delay) <= latest_end
+
+    def resolve(self, mission: Mission, latest_end: Optional[datetime] = None,
+                candidates: Optional[Sequence[Tuple[float, float]]] = None) -> Resolution:
+        """
+        Find the smallest delay and/or altitude offset that clears a mission.
+
+        Args:
+            mission: Mission to resolve (a resident with the same drone id is ignored)
+            latest_end: Optional time the modified mission must finish by
+            candidates: Optional (delay, altitude offset) pairs to try in order,
+                instead of the resolver's own ranking
+
+        Returns:
+            Resolution with the modified mission (the original one if it is
+            already clear) and search statistics
+        """
+        started = time.perf_counter()
+        stats = ResolutionStats()
+        conflicts = self.airspace.check(mission)
+        if not conflicts:
+            stats.elapsed_seconds = time.perf_counter() - started
+            return Resolution(mission, mission, 0.0, 0.0, conflicts, stats)
+
+        for delay, offset in (candidates if candidates is not None else self.candidates()):
+            if not self._within_limits(mission, offset, delay, latest_end):
+                stats.candidates_skipped += 1
+                continue
+            candidate = shift_mission(mission, delay, offset)
+            clear = self.airspace.is_clear(candidate)
+            stats.candidates_evaluated += 1
+            stats.residents_checked += self.airspace.stats.drone_pairs_candidate
+            if clear:
+                stats.elapsed_seconds = time.perf_counter() - started
+                return Resolution(mission, candidate, delay, offset, conflicts, stats)
+        stats.elapsed_seconds = time.perf_counter() - started
+        return Resolution(mission, None, 0.0, 0.0, conflicts, stats)
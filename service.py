@@ -0,0 +1,319 @@
+"""
+Long-running deconfliction service.
+
+Loads the approved missions once, keeps them warm in an Airspace, and serves
+mission checks over a small HTTP/JSON API built on asyncio (standard library
+only). Concurrent requests are queued and flushed in batches that run on a
+detection thread, off the event loop: each run of consecutive checks in a
+batch is served by one batched detection pass, and submits and removals are
+applied in arrival order in between.
+
+Endpoints (request bodies use one drone entry of the waypoints.json schema):
+    POST   /check               check a mission against the airspace
+    POST   /submit              check a mission and commit it if it is clear
+    DELETE /missions/<drone_id> remove a committed mission
+    GET    /health              liveness and airspace size
+    GET    /stats               request, batch and latency counters
+
+Usage:
+    python service.py --waypoints waypoints.json --port 8080
+"""
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Deque, Dict, List, Optional, Tuple
+from datetime import datetime
+import argparse
+import asyncio
+import itertools
+import json
+import time
+from models import Mission, Conflict, conflict_to_dict
+from flight_path_simulator import FlightPathSimulator
+from airspace import Airspace
+
+STATUS_TEXT = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+               500: 'Internal Server Error'}
+
+
+@dataclass
+class ServiceStats:
+    """Counters exposed on /stats."""
+    requests: int = 0
+    checks: int = 0
+    submits: int = 0
+    batches: int = 0
+    largest_batch: int = 0
+    detection_seconds: float = 0.0
+    # Latencies of the most recent requests only
+    latencies_ms: Deque[float] = field(default_factory=lambda: deque(maxlen=10000))
+
+    def to_dict(self) -> Dict:
+        latencies = sorted(self.latencies_ms)
+
+        def percentile(p: float) -> Optional[float]:
+            if not latencies:
+                return None
+            return latencies[min(len(latencies) - 1, int(p * len(latencies)))]
+
+        return {
+            'requests': self.requests,
+            'checks': self.checks,
+            'submits': self.submits,
+            'batches': self.batches,
+            'largest_batch': self.largest_batch,
+            'mean_batch': (self.checks + self.submits) / self.batches if self.batches else 0.0,
+            'detection_seconds': self.detection_seconds,
+            'latency_ms': {'p50': percentile(0.50), 'p90': percentile(0.90), 'p99': percentile(0.99)},
+        }
+
+
+class DeconflictionService:
+    def __init__(self, airspace: Airspace, simulator: FlightPathSimulator, global_start_time: datetime,
+                 max_batch: int = 64, batch_window: float = 0.001):
+        """
+        Initialize the service.
+
+        Args:
+            airspace: Warm airspace holding the approved missions
+            simulator: Simulator used to build missions from request bodies
+            global_start_time: Time that request start/end offsets are relative to
+            max_batch: Largest number of requests processed in one detection pass
+            batch_window: Seconds to wait for more requests before flushing a batch
+        """
+        self.airspace = airspace
+        self.simulator = simulator
+        self.global_start_time = global_start_time
+        self.max_batch = max_batch
+        self.batch_window = batch_window
+        self.stats = ServiceStats()
+        self._queue: Optional[asyncio.Queue] = None
+        self._batcher: Optional[asyncio.Task] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    async def start(self) -> None:
+        self._queue = asyncio.Queue()
+        # One detection thread: the airspace is only touched from it while the service runs
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='detection')
+        self._batcher = asyncio.create_task(self._run_batches())
+
+    async def stop(self) -> None:
+        if self._batcher is not None:
+            self._batcher.cancel()
+            try:
+                await self._batcher
+            except asyncio.CancelledError:
+                pass
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+
+    async def _enqueue(self, kind: str, payload):
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((kind, payload, future))
+        return await future
+
+    async def check(self, mission: Mission, commit: bool = False) -> Tuple[List[Conflict], bool]:
+        """Queue a mission for the next batch and wait for its conflicts and commit status."""
+        return await self._enqueue('submit' if commit else 'check', mission)
+
+    async def remove(self, drone_id: str) -> Mission:
+        """
+        Queue the removal of a committed mission and wait for it to be applied.
+
+        Raises:
+            KeyError: If no mission with this drone id is resident
+        """
+        return await self._enqueue('remove', drone_id)
+
+    async def _run_batches(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.batch_window
+            while len(batch) < self.max_batch:
+                if not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+                    continue
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            start = time.perf_counter()
+            outcomes = await loop.run_in_executor(self._executor, self._process_batch,
+                                                  [(kind, payload) for kind, payload, _ in batch])
+            self.stats.detection_seconds += time.perf_counter() - start
+            self.stats.batches += 1
+            self.stats.largest_batch = max(self.stats.largest_batch, len(batch))
+            for (_, _, future), outcome in zip(batch, outcomes):
+                if future.done():
+                    continue
+                if isinstance(outcome, Exception):
+                    future.set_exception(outcome)
+                else:
+                    future.set_result(outcome)
+
+    def _process_batch(self, batch: List[Tuple[str, object]]) -> List:
+        """
+        Apply a batch of queued requests in arrival order; runs on the detection thread.
+
+        Each run of consecutive checks goes through one check_many pass, and
+        each submit or removal is applied where it arrived, so a check sees
+        exactly the requests queued before it.
+
+        Returns:
+            The result of each request, or the exception it raised
+        """
+        outcomes = []
+        for kind, run in itertools.groupby(batch, key=lambda request: request[0]):
+            payloads = [payload for _, payload in run]
+            if kind == 'check':
+                try:
+                    outcomes.extend((conflicts, False) for conflicts in self.airspace.check_many(payloads))
+                except Exception:
+                    # Retry one by one so only the failing requests get the error
+                    outcomes.extend(self._check_each(payloads))
+                continue
+            for payload in payloads:
+                try:
+                    if kind == 'submit':
+                        conflicts = self.airspace.check_and_commit(payload)
+                        outcomes.append((conflicts, not conflicts))
+                    else:
+                        outcomes.append(self.airspace.remove(payload))
+                except Exception as exc:
+                    outcomes.append(exc)
+        return outcomes
+
+    def _check_each(self, missions: List[Mission]) -> List:
+        outcomes = []
+        for mission in missions:
+            try:
+                outcomes.append((self.airspace.check(mission), False))
+            except Exception as exc:
+                outcomes.append(exc)
+        return outcomes
+
+    async def handle(self, method: str, path: str, body: bytes) -> Tuple[int, Dict]:
+        """Route one HTTP request and return (status, JSON body)."""
+        self.stats.requests += 1
+        if method == 'GET' and path == '/health':
+            return 200, {'status': 'ok', 'missions': len(self.airspace)}
+        if method == 'GET' and path == '/stats':
+            return 200, self.stats.to_dict()
+        if path.startswith('/missions/'):
+            if method != 'DELETE':
+                return 405, {'error': 'use DELETE'}
+            drone_id = path[len('/missions/'):]
+            try:
+                await self.remove(drone_id)
+            except KeyError:
+                return 404, {'error': f'unknown drone {drone_id}'}
+            return 200, {'removed': drone_id}
+        if path in ('/check', '/submit'):
+            if method != 'POST':
+                return 405, {'error': 'use POST'}
+            try:
+                mission = self.simulator.mission_from_dict(json.loads(body), self.global_start_time)
+            except (ValueError, KeyError, TypeError, IndexError) as exc:
+                return 400, {'error': f'invalid mission: {exc}'}
+            commit = path == '/submit'
+            started = time.perf_counter()
+            conflicts, committed = await self.check(mission, commit)
+            self.stats.latencies_ms.append((time.perf_counter() - started) * 1000)
+            if commit:
+                self.stats.submits += 1
+            else:
+                self.stats.checks += 1
+            return 200, {'drone_id': mission.drone_id, 'clear': not conflicts, 'committed': committed,
+                         'conflicts': [conflict_to_dict(c) for c in conflicts]}
+        return 404, {'error': f'no route for {method} {path}'}
+
+    async def serve_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Serve HTTP/1.1 requests on one keep-alive connection."""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, path, version = request_line.decode('latin-1').split()
+                except ValueError:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get('content-length', 0)))
+                try:
+                    status, payload = await self.handle(method, path, body)
+                except Exception as exc:
+                    status, payload = 500, {'error': str(exc)}
+                data = json.dumps(payload).encode()
+                keep_alive = headers.get('connection', '').lower() != 'close' and version == 'HTTP/1.1'
+                writer.write(f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}\r\n"
+                             f"Content-Type: application/json\r\nContent-Length: {len(data)}\r\n"
+                             f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode() + data)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+
+def build_service(waypoints: str, safety_buffer: float = 1.0, time_buffer: float = 15.1,
+                  cell_size: float = 100.0, time_cell: float = 30.0, global_start_time: Optional[datetime] = None,
+                  max_batch: int = 64, batch_window: float = 0.001) -> DeconflictionService:
+    """Load the approved missions once and build a warm service around them."""
+    global_start_time = global_start_time or datetime.now()
+    simulator = FlightPathSimulator()
+    airspace = Airspace(safety_buffer=safety_buffer, time_buffer=time_buffer, cell_size=cell_size,
+                        time_cell=time_cell, epoch=global_start_time)
+    airspace.commit_all(list(simulator.load_missions_from_file(waypoints, global_start_time)))
+    return DeconflictionService(airspace, simulator, global_start_time, max_batch, batch_window)
+
+
+async def serve(service: DeconflictionService, host: str = '127.0.0.1', port: int = 8080) -> asyncio.AbstractServer:
+    """Start the batcher and the HTTP server."""
+    await service.start()
+    return await asyncio.start_server(service.serve_connection, host, port)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run the deconfliction service')
+    parser.add_argument('--waypoints', default='waypoints.json', help='approved missions (JSON file or mission store)')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--safety-buffer', type=float, default=1.0)
+    parser.add_argument('--time-buffer', type=float, default=15.1)
+    parser.add_argument('--cell-size', type=float, default=100.0)
+    parser.add_argument('--time-cell', type=float, default=30.0)
+    parser.add_argument('--max-batch', type=int, default=64)
+    parser.add_argument('--batch-window-ms', type=float, default=1.0)
+    args = parser.parse_args()
+
+    service = build_service(args.waypoints, args.safety_buffer, args.time_buffer, args.cell_size, args.time_cell,
+                            max_batch=args.max_batch, batch_window=args.batch_window_ms / 1000)
+
+    async def run():
+        server = await serve(service, args.host, args.port)
+        print(f"Serving {len(service.airspace)} missions on http://{args.host}:{args.port} "
+              f"(start time {service.global_start_time.isoformat()})")
+        async with server:
+            await server.serve_forever()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
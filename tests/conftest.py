@@ -0,0 +1,30 @@
+import os
+import sys
+from datetime import datetime
+import pytest
+
+# The modules live at the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flight_path_simulator import FlightPathSimulator  # noqa: E402
+from benchmarks.scenarios import ScenarioConfig, build_missions  # noqa: E402
+
+START_TIME = datetime(2025, 1, 1)
+
+
+@pytest.fixture(scope='session')
+def simulator():
+    return FlightPathSimulator()
+
+
+@pytest.fixture(scope='session')
+def dense_missions(simulator):
+    """A small, crowded airspace in which several drone pairs conflict."""
+    config = ScenarioConfig(drones=40, waypoints=6, density=200.0, start_window=120.0, seed=3)
+    return build_missions(config, START_TIME, simulator)
+
+
+def event_key(conflict):
+    """Comparable form of a conflict event, tolerant to last-bit float differences."""
+    return (conflict.drone1_id, conflict.drone2_id, conflict.time, tuple(round(v, 6) for v in conflict.location),
+            round(conflict.distance, 6), round(conflict.time_diff, 6))
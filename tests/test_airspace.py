@@ -0,0 +1,47 @@
+import pytest
+from models import Mission
+from airspace import Airspace
+from benchmarks.scenarios import ScenarioConfig, build_missions
+from conftest import START_TIME
+
+
+@pytest.fixture(scope='module')
+def residents(simulator):
+    return build_missions(ScenarioConfig(drones=80, waypoints=5, density=400.0, seed=1), START_TIME, simulator)
+
+
+@pytest.fixture(scope='module')
+def candidates(simulator, residents):
+    missions = build_missions(ScenarioConfig(drones=40, waypoints=5, density=400.0, seed=101), START_TIME, simulator)
+    missions = [Mission(f'candidate{k}', m.waypoints, m.start_time, m.end_time) for k, m in enumerate(missions)]
+    # Re-plans of residents are checked without their committed version
+    missions += residents[:3]
+    # A single waypoint is a stationary point in time
+    waypoint = residents[5].waypoints[1]
+    missions.append(Mission('hover', [waypoint], waypoint.timestamp, waypoint.timestamp))
+    return missions
+
+
+@pytest.mark.parametrize('sampled', [False, True])
+def test_check_many_matches_check(simulator, residents, candidates, sampled):
+    airspace = Airspace(safety_buffer=5.0, time_buffer=5.0, cell_size=50.0, time_cell=10.0, epoch=START_TIME,
+                        simulator=simulator if sampled else None)
+    airspace.commit_all(residents)
+    expected = [airspace.check(mission) for mission in candidates]
+    assert any(expected)
+    assert airspace.check_many(candidates) == expected
+
+
+def test_check_many_after_commit_and_remove(residents, candidates):
+    airspace = Airspace(safety_buffer=5.0, time_buffer=5.0, cell_size=50.0, time_cell=10.0, epoch=START_TIME)
+    airspace.commit_all(residents)
+    airspace.check_many(candidates)
+    # The batched query must see changes made after its grid snapshot was built
+    airspace.commit(candidates[0])
+    airspace.remove(residents[10].drone_id)
+    assert airspace.check_many(candidates[1:]) == [airspace.check(m) for m in candidates[1:]]
+
+
+def test_check_many_edge_cases(simulator, candidates):
+    assert Airspace().check_many([]) == []
+    assert Airspace(epoch=START_TIME).check_many(candidates[:2]) == [[], []]
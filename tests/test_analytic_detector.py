@@ -0,0 +1,82 @@
+from datetime import timedelta
+import numpy as np
+import pytest
+from models import Mission, Waypoint
+from analytic_detector import AnalyticConflictDetector, MissionSegments
+from conftest import START_TIME
+
+SAFETY_BUFFER = 5.0
+TIME_BUFFER = 2.0
+# Grid step of the brute-force reference in seconds
+STEP = 0.01
+
+
+def make_mission(drone_id, points, offsets):
+    waypoints = [Waypoint(x=p[0], y=p[1], z=p[2], timestamp=START_TIME + timedelta(seconds=t), speed=0.0)
+                 for p, t in zip(points, offsets)]
+    return Mission(drone_id, waypoints, waypoints[0].timestamp, waypoints[-1].timestamp)
+
+
+def positions(segments, t):
+    """Piecewise-linear positions of a mission at offsets ``t`` inside its time span."""
+    times = np.append(segments.t0, segments.t1[-1])
+    end = segments.p0[-1] + segments.velocity[-1] * (segments.t1[-1] - segments.t0[-1])
+    points = np.vstack((segments.p0, end))
+    return np.stack([np.interp(t, times, points[:, d]) for d in range(3)], axis=-1)
+
+
+def brute_separation(seg1, seg2):
+    """Grid times of the first mission and, for each, its distance to the second within the time buffer."""
+    t = np.arange(seg1.t0[0], seg1.t1[-1] + STEP / 2, STEP)
+    shifts = np.arange(-TIME_BUFFER, TIME_BUFFER + STEP / 2, STEP)
+    u = t[:, None] + shifts
+    valid = (u >= seg2.t0[0]) & (u <= seg2.t1[-1])
+    gaps = np.linalg.norm(positions(seg1, t)[:, None, :] - positions(seg2, np.clip(u, seg2.t0[0], seg2.t1[-1])),
+                          axis=2)
+    return t, np.where(valid, gaps, np.inf).min(axis=1)
+
+
+def random_pair(rng):
+    missions = []
+    for k in range(2):
+        points = rng.uniform(0, 40, (4, 3))
+        offsets = rng.uniform(0, 5) + np.cumsum(np.concatenate(([0], rng.uniform(4, 12, 3))))
+        missions.append(make_mission(f'drone{k}', points, offsets))
+    return missions
+
+
+CRAFTED = [
+    # Head-on crossing
+    [make_mission('a', [(0, 0, 10), (100, 0, 10)], [0, 10]), make_mission('b', [(100, 0, 10), (0, 0, 10)], [0, 10])],
+    # A hovering drone passed at 3 m
+    [make_mission('a', [(50, 3, 10), (50, 3, 10)], [0, 20]), make_mission('b', [(0, 0, 10), (100, 0, 10)], [5, 15])],
+    # Two drones hovering at the same point, 1.5 s apart (inside the time buffer) and 2.5 s apart (outside)
+    [make_mission('a', [(5, 5, 10), (5, 5, 10)], [0, 10]), make_mission('b', [(5, 5, 10), (5, 5, 10)], [11.5, 20])],
+    [make_mission('a', [(5, 5, 10), (5, 5, 10)], [0, 10]), make_mission('b', [(5, 5, 10), (5, 5, 10)], [12.5, 20])],
+]
+
+
+@pytest.mark.parametrize('pair', CRAFTED + [random_pair(np.random.default_rng(seed)) for seed in range(20)])
+def test_check_pair_matches_brute_force(pair):
+    seg1, seg2 = (MissionSegments.from_mission(m, START_TIME) for m in pair)
+    events = AnalyticConflictDetector(SAFETY_BUFFER, TIME_BUFFER).check_pair(seg1, seg2)
+    t, gaps = brute_separation(seg1, seg2)
+    speed = max(np.linalg.norm(seg1.velocity, axis=1).max(), np.linalg.norm(seg2.velocity, axis=1).max())
+    # The grid can miss the true minimum by up to the distance flown in one step
+    slack = speed * STEP + 1e-9
+
+    intervals = [((e.time - START_TIME).total_seconds(), (e.time - START_TIME).total_seconds() + e.time_diff)
+                 for e in events]
+    inside = np.zeros(len(t), dtype=bool)
+    for start, end in intervals:
+        inside |= (t >= start - STEP) & (t <= end + STEP)
+    # Every clear conflict on the grid lies in a reported interval
+    assert np.all(inside[gaps <= SAFETY_BUFFER - slack])
+    for event, (start, end) in zip(events, intervals):
+        assert event.distance <= SAFETY_BUFFER + 1e-9
+        in_event = (t >= start) & (t <= end)
+        if in_event.any():
+            # The reported closest approach is the grid's minimum inside the interval, up to the grid error
+            assert gaps[in_event].min() == pytest.approx(event.distance, abs=slack)
+    if not events:
+        assert gaps.min() > SAFETY_BUFFER - slack
@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+from models import Conflict
+from conflict_detector import ConflictDetector
+from parallel_detector import ParallelConflictDetector
+from windowed_detector import WindowedConflictDetector
+from trajectory import as_trajectory, common_epoch
+from instrumentation import Metrics
+from conftest import event_key
+
+SAFETY_BUFFER = 5.0
+TIME_BUFFER = 5.0
+
+
+@pytest.fixture(scope='module')
+def missions(dense_missions):
+    return dense_missions[:20]
+
+
+@pytest.fixture(scope='module')
+def flight_paths(simulator, missions):
+    return {m.drone_id: simulator.simulate_flight_path(m) for m in missions}
+
+
+@pytest.fixture(scope='module')
+def reference(simulator, missions, flight_paths):
+    """The original serial algorithm: every sample pair of every drone pair, then interval grouping."""
+    detector = ConflictDetector(SAFETY_BUFFER, TIME_BUFFER, simulator.time_step)
+    trajectories = [as_trajectory(flight_paths[m.drone_id]) for m in missions]
+    epoch = common_epoch(trajectories)
+    events = []
+    for i, path1 in enumerate(trajectories):
+        for j in range(i + 1, len(trajectories)):
+            path2 = trajectories[j]
+            time_diffs = path1.offsets_from(epoch)[:, None] - path2.offsets_from(epoch)[None, :]
+            distances = np.sqrt(np.sum((path1.positions[:, None, :] - path2.positions[None, :, :]) ** 2, axis=2))
+            raw = [Conflict(missions[i].drone_id, missions[j].drone_id, path1.to_datetime(path1.times[r]),
+                            tuple(path1.positions[r].tolist()), distances[r, c], time_diffs[r, c])
+                   for r, c in zip(*np.nonzero((np.abs(time_diffs) <= TIME_BUFFER) & (distances <= SAFETY_BUFFER)))]
+            events.extend(detector.group_conflict_intervals(raw, detector.group_step(path1)))
+    events.sort(key=lambda c: (tuple(sorted([c.drone1_id, c.drone2_id])), c.time))
+    assert events
+    return [event_key(c) for c in events]
+
+
+@pytest.mark.parametrize('cell_size', [None, 20.0])
+def test_sampled_detector_matches_reference(simulator, missions, flight_paths, reference, cell_size):
+    detector = ConflictDetector(SAFETY_BUFFER, TIME_BUFFER, simulator.time_step, cell_size=cell_size)
+    assert [event_key(c) for c in detector.detect_conflicts(missions, flight_paths)] == reference
+
+
+def test_parallel_detector_matches_serial_with_same_counters(simulator, missions, flight_paths, reference):
+    serial_metrics, parallel_metrics = Metrics(), Metrics()
+    ConflictDetector(SAFETY_BUFFER, TIME_BUFFER, simulator.time_step,
+                     metrics=serial_metrics).detect_conflicts(missions, flight_paths)
+    detector = ParallelConflictDetector(SAFETY_BUFFER, TIME_BUFFER, simulator.time_step, workers=2,
+                                        metrics=parallel_metrics)
+    assert [event_key(c) for c in detector.detect_conflicts(missions, flight_paths)] == reference
+    assert parallel_metrics.counters == serial_metrics.counters
+
+
+def test_windowed_detector_matches_reference(simulator, missions, reference):
+    detector = ConflictDetector(SAFETY_BUFFER, TIME_BUFFER, simulator.time_step)
+    windowed = WindowedConflictDetector(simulator, detector, window=30.0)
+    assert [event_key(c) for c in windowed.detect_conflicts(missions)] == reference
+    assert windowed.stats.windows > 1
@@ -0,0 +1,11 @@
+from analytic_detector import AnalyticConflictDetector
+from monte_carlo import MonteCarloConflictDetector, TimingJitter
+
+
+def test_zero_jitter_matches_analytic_detector(dense_missions):
+    detector = MonteCarloConflictDetector(10.0, 2.0, TimingJitter(delay_sigma=0.0, speed_sigma=0.0), workers=1)
+    results = detector.conflict_probabilities(dense_missions, max_realizations=3, min_realizations=1, chunk_size=3)
+    conflicts = AnalyticConflictDetector(10.0, 2.0).detect_conflicts(dense_missions)
+    assert conflicts
+    assert {(r.drone1_id, r.drone2_id) for r in results} == {(c.drone1_id, c.drone2_id) for c in conflicts}
+    assert all(r.probability == 1.0 for r in results)
@@ -0,0 +1,22 @@
+from airspace import Airspace
+from what_if import WhatIfEvaluator
+from benchmarks.scenarios import ScenarioConfig, build_missions
+from conftest import START_TIME
+
+
+def test_verdicts_match_airspace_check(simulator):
+    residents = build_missions(ScenarioConfig(drones=100, waypoints=6, density=300.0, seed=2), START_TIME, simulator)
+    candidates = build_missions(ScenarioConfig(drones=60, waypoints=6, density=300.0, seed=102), START_TIME, simulator)
+    airspace = Airspace(safety_buffer=5.0, time_buffer=2.0, epoch=START_TIME)
+    airspace.commit_all(residents)
+    expected = [not airspace.check(m) for m in candidates]
+    assert not all(expected) and any(expected)
+
+    result = WhatIfEvaluator(residents, safety_buffer=5.0, time_buffer=2.0).evaluate_missions(candidates)
+    assert result.clear.tolist() == expected
+    # A candidate in conflict names a resident it conflicts with
+    for k, clear in enumerate(expected):
+        if not clear:
+            conflicts = airspace.check(candidates[k])
+            assert result.closest_resident[k] in {c.drone2_id for c in conflicts} | {c.drone1_id for c in conflicts}
+            assert result.min_separation[k] <= min(c.distance for c in conflicts) + 1e-6
@@ -0,0 +1,108 @@
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple, Union
+from datetime import datetime, timedelta
+import numpy as np
+
+FlightPath = Dict[datetime, Tuple[float, float, float]]
+
+
+@dataclass(eq=False)
+class Trajectory:
+    """
+    Compact sampled flight path.
+
+    Attributes:
+        epoch: Reference time that the sample offsets are measured from
+        times: Sorted float64 array of sample offsets in seconds, shape (N,)
+        positions: float64 array of sample positions (x, y, z), shape (N, 3)
+        max_step: Largest sampling step in seconds if it exceeds the nominal time step
+            (set by adaptive sampling), otherwise None
+    """
+    epoch: datetime
+    times: np.ndarray
+    positions: np.ndarray
+    max_step: Optional[float] = None
+
+    def __post_init__(self):
+        self.times = np.ascontiguousarray(self.times, dtype=np.float64)
+        self.positions = np.ascontiguousarray(self.positions, dtype=np.float64).reshape(-1, 3)
+        if len(self.times) != len(self.positions):
+            raise ValueError("Trajectory times and positions must have the same length")
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    @property
+    def start_time(self) -> datetime:
+        return self.to_datetime(self.times[0])
+
+    @property
+    def end_time(self) -> datetime:
+        return self.to_datetime(self.times[-1])
+
+    def to_datetime(self, offset: float) -> datetime:
+        """Convert a sample offset in seconds to an absolute datetime."""
+        return self.epoch + timedelta(seconds=float(offset))
+
+    def offsets_from(self, epoch: datetime) -> np.ndarray:
+        """Return the sample times as offsets in seconds from another epoch."""
+        if epoch == self.epoch:
+            return self.times
+        return self.times + (self.epoch - epoch).total_seconds()
+
+    def interpolate(self, offsets: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Interpolate positions and velocities at many time offsets with a binary search.
+
+        A query that falls exactly on a sample uses the segment that ends there,
+        like the original linear scan did.
+
+        Args:
+            offsets: Query times in seconds from this trajectory's epoch, shape (T,)
+
+        Returns:
+            positions (T, 3), velocities (T, 3) and a boolean mask (T,) of queries
+            inside the trajectory's time range; positions and velocities are NaN elsewhere
+        """
+        offsets = np.asarray(offsets, dtype=np.float64)
+        times = self.times
+        valid = (offsets >= times[0]) & (offsets <= times[-1])
+        if len(times) == 1:
+            positions = np.repeat(self.positions, len(offsets), axis=0)
+            velocities = np.zeros_like(positions)
+        else:
+            i = np.clip(np.searchsorted(times, offsets, side='left') - 1, 0, len(times) - 2)
+            time_diff = times[i + 1] - times[i]
+            safe = np.where(time_diff > 0, time_diff, 1.0)
+            ratio = np.where(time_diff > 0, (offsets - times[i]) / safe, 0.0)[:, None]
+            delta = self.positions[i + 1] - self.positions[i]
+            positions = self.positions[i] + delta * ratio
+            velocities = np.where((time_diff > 0)[:, None], delta / safe[:, None], 0.0)
+        positions[~valid] = np.nan
+        velocities[~valid] = np.nan
+        return positions, velocities, valid
+
+    def to_dict(self) -> FlightPath:
+        """Return the legacy {datetime: (x, y, z)} view of this trajectory."""
+        return {self.to_datetime(t): tuple(p) for t, p in zip(self.times.tolist(), self.positions.tolist())}
+
+    @classmethod
+    def from_dict(cls, flight_path: FlightPath) -> 'Trajectory':
+        """Build a trajectory from a legacy {datetime: (x, y, z)} flight path."""
+        timestamps = sorted(flight_path.keys())
+        epoch = timestamps[0]
+        times = np.array([(t - epoch).total_seconds() for t in timestamps], dtype=np.float64)
+        positions = np.array([flight_path[t] for t in timestamps], dtype=np.float64)
+        return cls(epoch=epoch, times=times, positions=positions)
+
+
+def as_trajectory(flight_path: Union[Trajectory, FlightPath]) -> Trajectory:
+    """Accept either a Trajectory or a legacy flight path dict and return a Trajectory."""
+    if isinstance(flight_path, Trajectory):
+        return flight_path
+    return Trajectory.from_dict(flight_path)
+
+
+def common_epoch(trajectories: List[Trajectory]) -> datetime:
+    """Earliest epoch among the given trajectories, used to align their time axes."""
+    return min(t.epoch for t in trajectories)
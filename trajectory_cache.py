@@ -0,0 +1,168 @@
+from collections import OrderedDict
+from dataclasses import dataclass, asdict
+from typing import Dict, Optional, Sequence
+from datetime import timedelta
+import hashlib
+import os
+import tempfile
+import numpy as np
+from models import Mission
+from trajectory import Trajectory
+
+# Bump when simulate_flight_path changes its output, so stale disk entries are never reused
+CACHE_VERSION = 1
+
+
+@dataclass
+class CacheStats:
+    """Counters of a TrajectoryCache."""
+    hits: int = 0
+    disk_hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    entries: int = 0
+    bytes: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.disk_hits + self.misses
+        return (self.hits + self.disk_hits) / lookups if lookups else 0.0
+
+    def to_dict(self) -> Dict:
+        return dict(asdict(self), hit_rate=self.hit_rate)
+
+
+def mission_key(mission: Mission, sampling: Sequence[float]) -> str:
+    """
+    Content hash of a mission's waypoints, timestamps and sampling parameters.
+
+    Timestamps are hashed as microsecond offsets from the mission start, since
+    simulated trajectories are stored relative to that start: a mission that
+    only departs at a different time maps to the same key.
+
+    Args:
+        mission: Mission to hash
+        sampling: Simulator parameters that affect the samples (time step and
+            adaptive settings)
+
+    Returns:
+        Hex digest identifying the simulated trajectory
+    """
+    start = mission.start_time
+    offsets = np.array([(wp.timestamp - start) // timedelta(microseconds=1) for wp in mission.waypoints],
+                       dtype=np.int64)
+    positions = np.array([(wp.x, wp.y, wp.z) for wp in mission.waypoints], dtype=np.float64)
+    digest = hashlib.sha1(repr((CACHE_VERSION, tuple(sampling))).encode())
+    digest.update(offsets.tobytes())
+    digest.update(positions.tobytes())
+    return digest.hexdigest()
+
+
+class TrajectoryCache:
+    def __init__(self, max_bytes: int = 256 * 2 ** 20, directory: Optional[str] = None):
+        """
+        Content-addressed cache of simulated trajectories.
+
+        Entries live in an in-memory LRU tier bounded by ``max_bytes`` of sample
+        data. With ``directory`` set, every entry is also written to disk as an
+        ``.npz`` file, and memory misses fall back to it, so unchanged missions
+        are not re-simulated across runs or after eviction. Cached arrays are
+        read-only and shared between the trajectories returned for the same key.
+
+        Args:
+            max_bytes: Budget of the in-memory tier in bytes of times and positions
+            directory: Optional on-disk tier, created if missing
+        """
+        self.max_bytes = max_bytes
+        self.directory = directory
+        self.stats = CacheStats()
+        self._entries: 'OrderedDict[str, Trajectory]' = OrderedDict()
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries or (self.directory is not None and os.path.exists(self._path(key)))
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f'{key}.npz')
+
+    @staticmethod
+    def _size(trajectory: Trajectory) -> int:
+        return trajectory.times.nbytes + trajectory.positions.nbytes
+
+    def get(self, key: str) -> Optional[Trajectory]:
+        """
+        Look up a trajectory, refreshing its LRU position.
+
+        The returned trajectory's epoch is whatever it was stored with; callers
+        rebind it to the mission being simulated.
+        """
+        trajectory = self._entries.get(key)
+        if trajectory is not None:
+            self._entries.move_to_end(key)
+            self.stats.hits += 1
+            return trajectory
+        trajectory = self._load(key)
+        if trajectory is None:
+            self.stats.misses += 1
+            return None
+        self.stats.disk_hits += 1
+        self._remember(key, trajectory)
+        return trajectory
+
+    def put(self, key: str, trajectory: Trajectory) -> Trajectory:
+        """Store a trajectory under ``key`` and return the cached (read-only) copy."""
+        trajectory.times.setflags(write=False)
+        trajectory.positions.setflags(write=False)
+        self._remember(key, trajectory)
+        if self.directory is not None and not os.path.exists(self._path(key)):
+            self._save(key, trajectory)
+        return trajectory
+
+    def clear(self) -> None:
+        """Drop the in-memory tier; the disk tier is kept."""
+        self._entries.clear()
+        self.stats.entries = 0
+        self.stats.bytes = 0
+
+    def _remember(self, key: str, trajectory: Trajectory) -> None:
+        size = self._size(trajectory)
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self.stats.bytes -= self._size(self._entries.pop(key))
+        self._entries[key] = trajectory
+        self.stats.bytes += size
+        while self.stats.bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.stats.bytes -= self._size(evicted)
+            self.stats.evictions += 1
+        self.stats.entries = len(self._entries)
+
+    def _save(self, key: str, trajectory: Trajectory) -> None:
+        # Write to a temporary file first so concurrent readers never see a partial entry
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix='.npz')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.savez(f, times=trajectory.times, positions=trajectory.positions,
+                         max_step=np.nan if trajectory.max_step is None else trajectory.max_step)
+            os.replace(tmp, self._path(key))
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    def _load(self, key: str) -> Optional[Trajectory]:
+        if self.directory is None:
+            return None
+        try:
+            with np.load(self._path(key)) as data:
+                times, positions, max_step = data['times'], data['positions'], float(data['max_step'])
+        except (OSError, KeyError, ValueError):
+            return None
+        times.setflags(write=False)
+        positions.setflags(write=False)
+        return Trajectory(epoch=None, times=times, positions=positions,
+                          max_step=None if np.isnan(max_step) else max_step)
@@ -1,19 +1,122 @@
-import matplotlib.pyplot as plt
-from mpl_toolkits.mplot3d import Axes3D
+import colorsys
 import numpy as np
-from datetime import datetime
-from typing import Dict, List, Tuple
-from matplotlib.colors import Normalize
-from matplotlib.lines import Line2D
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+# Visualization is an optional extra; the detection core never imports this module
+try:
+    import matplotlib.pyplot as plt
+    from mpl_toolkits.mplot3d import Axes3D
+    from mpl_toolkits.mplot3d.art3d import Line3DCollection
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.colors import Normalize, to_rgba
+    from matplotlib.figure import Figure
+    from matplotlib.lines import Line2D
+    from PIL import Image
+except ImportError as error:
+    raise ImportError("visualization_4d needs the optional visualization dependencies: "
+                      "pip install -r requirements-viz.txt") from error
 from models import Mission, Conflict
+from trajectory import Trajectory, FlightPath, as_trajectory
+from occupancy import DensityMap
+
+# Colors of the first drones after the highlighted one, as in the original plots
+DRONE_PALETTE = ['deepskyblue', 'limegreen', 'orange', 'purple', 'brown']
+TAB10 = ['#1f77b4', '#ff7f0e', '#2ca02c', '#d62728', '#9467bd',
+         '#8c564b', '#e377c2', '#7f7f7f', '#bcbd22', '#17becf']
+GOLDEN_RATIO = 0.618033988749895
+
+
+def distinct_colors(n: int, palette: Sequence = TAB10) -> List:
+    """
+    ``n`` distinguishable colors: the palette first, then hues spaced by the golden ratio.
+
+    Saturation and value alternate between bands so neighbouring hues of a
+    large fleet still differ. Pure red is skipped; it marks the highlighted
+    drone and conflicts.
+    """
+    colors = list(palette[:n])
+    for k in range(n - len(colors)):
+        hue = 0.06 + 0.88 * ((k * GOLDEN_RATIO) % 1.0)
+        band = k % 3
+        colors.append(colorsys.hsv_to_rgb(hue, (0.9, 0.6, 0.75)[band], (0.85, 0.95, 0.65)[band]))
+    return colors
+
+
+def drone_colors(drone_ids: Sequence[str], highlight: Optional[str] = 'drone1') -> Dict[str, object]:
+    """Color of every drone; the highlighted drone is red."""
+    others = [drone_id for drone_id in drone_ids if drone_id != highlight]
+    colors = dict(zip(others, distinct_colors(len(others), DRONE_PALETTE)))
+    if highlight in drone_ids:
+        colors[highlight] = 'red'
+    return colors
+
+
+def decimate_path(points: np.ndarray, tolerance: float) -> np.ndarray:
+    """
+    Ramer-Douglas-Peucker simplification of a polyline.
+
+    Args:
+        points: Polyline vertices, shape (N, 3)
+        tolerance: Largest allowed distance of a dropped vertex from the simplified line
+
+    Returns:
+        Sorted indices of the kept vertices, always including the first and last
+    """
+    n = len(points)
+    if n <= 2 or tolerance <= 0:
+        return np.arange(n)
+    keep = np.zeros(n, dtype=bool)
+    keep[0] = keep[-1] = True
+    tolerance_sq = tolerance * tolerance
+    stack = [(0, n - 1)]
+    while stack:
+        lo, hi = stack.pop()
+        if hi - lo < 2:
+            continue
+        start = points[lo]
+        chord = points[hi] - start
+        offsets = points[lo + 1:hi] - start
+        length_sq = float(chord @ chord)
+        if length_sq > 0:
+            # Distance to the chord segment, so back-tracking paths are kept too
+            along = np.clip(offsets @ chord / length_sq, 0.0, 1.0)
+            offsets = offsets - along[:, None] * chord
+        distances_sq = np.einsum('ij,ij->i', offsets, offsets)
+        k = int(np.argmax(distances_sq))
+        if distances_sq[k] > tolerance_sq:
+            mid = lo + 1 + k
+            keep[mid] = True
+            stack.append((lo, mid))
+            stack.append((mid, hi))
+    return np.flatnonzero(keep)
+
 
 class Visualization4D:
-    def __init__(self):
-        self.fig = plt.figure(figsize=(12, 8))
+    def __init__(self, offscreen: bool = False, figsize: Tuple[float, float] = (12, 8), dpi: float = 100):
+        """
+        Args:
+            offscreen: Render on an Agg canvas that never opens a window, so
+                figures can be saved on machines without a display
+            figsize: Figure size in inches
+            dpi: Resolution of the figure in dots per inch
+        """
+        self.offscreen = offscreen
+        if offscreen:
+            self.fig = Figure(figsize=figsize, dpi=dpi)
+            FigureCanvasAgg(self.fig)
+        else:
+            self.fig = plt.figure(figsize=figsize, dpi=dpi)
         self.ax = self.fig.add_subplot(111, projection='3d')
-        
-    def visualize_4d(self, flight_paths: Dict[str, Dict[datetime, Tuple[float, float, float]]],
-                    conflicts: List):
+
+    def _finish(self, filename: Optional[str]) -> None:
+        """Save the figure to ``filename``, or show it interactively."""
+        if filename is not None:
+            self.fig.savefig(filename)
+        elif not self.offscreen:
+            plt.show()
+
+    def visualize_4d(self, flight_paths: Dict[str, Union[Trajectory, FlightPath]],
+                    conflicts: List, filename: Optional[str] = None):
         """
         Clean 4D visualization:
         - Drone1: scatter points colored by time (hot colormap), line in red
@@ -22,35 +125,25 @@ class Visualization4D:
         - Legend inside plot
         - Large fonts
         - Start points indicated subtly
+
+        Every sample is drawn; use render() for large fleets.
         """
         self.ax.clear()
-        
+        trajectories = {drone_id: as_trajectory(path) for drone_id, path in flight_paths.items()}
+
         # Get time range for color normalization
-        all_times = []
-        for path in flight_paths.values():
-            all_times.extend(list(path.keys()))
-        time_min = min(all_times)
-        time_max = max(all_times)
+        time_min = min(t.start_time for t in trajectories.values())
+        time_max = max(t.end_time for t in trajectories.values())
         time_norm = Normalize(vmin=time_min.timestamp(), vmax=time_max.timestamp())
-        
-        # Assign colors for fixed drones
-        drone_colors = {
-            'drone2': 'deepskyblue',
-            'drone3': 'limegreen',
-            'drone4': 'orange',
-            'drone5': 'purple',
-            'drone6': 'brown'
-        }
-        
+
+        # Assign a distinct color to every drone
+        colors = drone_colors(list(trajectories))
+
         # Plot each drone's path
-        for drone_id, path in flight_paths.items():
-            times = list(path.keys())
-            positions = list(path.values())
-            x = np.array([p[0] for p in positions])
-            y = np.array([p[1] for p in positions])
-            z = np.array([p[2] for p in positions])
-            time_values = np.array([t.timestamp() for t in times])
-            
+        for drone_id, path in trajectories.items():
+            x, y, z = path.positions.T
+            time_values = path.epoch.timestamp() + path.times
+
             if drone_id == "drone1":
                 # Scatter points colored by time
                 scatter = self.ax.scatter(x, y, z, c=time_values, cmap='hot', norm=time_norm, s=30, label='Drone 1')
@@ -59,12 +152,12 @@ class Visualization4D:
                 # Subtle start point
                 self.ax.scatter([x[0]], [y[0]], [z[0]], c='black', marker='o', s=60, alpha=0.4, label=None)
             else:
-                color = drone_colors.get(drone_id, 'gray')
+                color = colors[drone_id]
                 self.ax.plot(x, y, z, color=color, alpha=0.7, label=f'{drone_id}')
                 self.ax.scatter(x, y, z, color=color, s=15)
                 # Subtle start point
                 self.ax.scatter([x[0]], [y[0]], [z[0]], c='black', marker='o', s=60, alpha=0.4, label=None)
-        
+
         # Plot conflicts
         if conflicts:
             conflict_x = [c.location[0] for c in conflicts]
@@ -72,61 +165,287 @@ class Visualization4D:
             conflict_z = [c.location[2] for c in conflicts]
             self.ax.scatter(conflict_x, conflict_y, conflict_z,
                             c='red', marker='*', s=120, edgecolor='black', linewidth=1.2, label='Conflict Point(s)')
-        
+
         # Add colorbar for drone1
         mappable = plt.cm.ScalarMappable(norm=time_norm, cmap='hot')
-        cbar = plt.colorbar(mappable, ax=self.ax, pad=0.1)
+        cbar = self.fig.colorbar(mappable, ax=self.ax, pad=0.1)
         cbar.set_label('Time (Drone 1)', fontsize=12)
-        
+
         # Labels and title
         self.ax.set_xlabel('X (m)', fontsize=12)
         self.ax.set_ylabel('Y (m)', fontsize=12)
         self.ax.set_zlabel('Z (m)', fontsize=12)
         self.ax.set_title('4D Mission Visualization\n(Color = Time for Drone 1)', fontsize=15, pad=20)
-        
+
         # Custom legend
-        legend_elements = [
-            Line2D([0], [0], color='red', lw=2, label='Drone 1'),
-            Line2D([0], [0], color='deepskyblue', lw=2, label='Drone 2'),
-            Line2D([0], [0], color='limegreen', lw=2, label='Drone 3'),
-            Line2D([0], [0], color='orange', lw=2, label='Drone 4'),
-            Line2D([0], [0], color='purple', lw=2, label='Drone 5'),
-            Line2D([0], [0], color='brown', lw=2, label='Drone 6'),
-            Line2D([0], [0], marker='*', color='w', markerfacecolor='red', markeredgecolor='black', markersize=15, lw=0, label=f'Conflict Point(s) ({len(conflicts)})'),
-            Line2D([0], [0], marker='o', color='w', markerfacecolor='black', alpha=0.4, markersize=10, lw=0, label='Start Point')
-        ]
-        self.ax.legend(handles=legend_elements, loc='upper left', fontsize=11)
-        
-        plt.tight_layout()
-        plt.show()
-
-def visualize_mission_4d(flight_paths: Dict[str, Dict[datetime, Tuple[float, float, float]]],
+        self.ax.legend(handles=self._legend_handles(colors, len(conflicts)), loc='upper left', fontsize=11)
+
+        self.fig.tight_layout()
+        self._finish(filename)
+
+    def _legend_handles(self, colors: Dict[str, object], conflict_count: int, highlight: Optional[str] = 'drone1',
+                        max_entries: int = 8) -> List[Line2D]:
+        """Legend entries for the highlighted drone, up to ``max_entries`` others and the markers."""
+        handles = []
+        if highlight in colors:
+            handles.append(Line2D([0], [0], color='red', lw=2, label=highlight.replace('drone', 'Drone ')))
+        others = [drone_id for drone_id in colors if drone_id != highlight]
+        for drone_id in others[:max_entries]:
+            handles.append(Line2D([0], [0], color=colors[drone_id], lw=2, label=drone_id.replace('drone', 'Drone ')))
+        if len(others) > max_entries:
+            handles.append(Line2D([0], [0], color='gray', lw=2, label=f'+{len(others) - max_entries} more drones'))
+        handles.append(Line2D([0], [0], marker='*', color='w', markerfacecolor='red', markeredgecolor='black',
+                              markersize=15, lw=0, label=f'Conflict Point(s) ({conflict_count})'))
+        handles.append(Line2D([0], [0], marker='o', color='w', markerfacecolor='black', alpha=0.4, markersize=10,
+                              lw=0, label='Start Point'))
+        return handles
+
+    def _decimated_segments(self, trajectories: Dict[str, Trajectory], tolerance_px: float,
+                            lo: np.ndarray, span: np.ndarray,
+                            start: datetime) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+        """Line segments (K, 2, 3) and segment midpoint times in seconds from ``start`` of each decimated trajectory."""
+        # The 3D box scales every axis to the same size on screen, so the tolerance
+        # is applied to coordinates normalized by each axis' range
+        tolerance = tolerance_px / (min(self.fig.get_size_inches()) * self.fig.dpi)
+        segments = {}
+        for drone_id, path in trajectories.items():
+            keep = decimate_path((path.positions - lo) / span, tolerance)
+            points = path.positions[keep]
+            times = (path.epoch - start).total_seconds() + path.times[keep]
+            if len(points) < 2:
+                points = np.vstack((points, points))
+                times = np.concatenate((times, times))
+            segments[drone_id] = (np.stack((points[:-1], points[1:]), axis=1), (times[:-1] + times[1:]) / 2)
+        return segments
+
+    @staticmethod
+    def _bounds(trajectories: Dict[str, Trajectory]) -> Tuple[np.ndarray, np.ndarray]:
+        lo = np.min([t.positions.min(axis=0) for t in trajectories.values()], axis=0)
+        hi = np.max([t.positions.max(axis=0) for t in trajectories.values()], axis=0)
+        return lo, hi
+
+    def _draw_paths(self, trajectories: Dict[str, Trajectory], colors: Dict[str, object], tolerance_px: float,
+                    highlight: Optional[str], alpha: float = 0.7) -> Optional[Line3DCollection]:
+        """
+        Draw all decimated paths as one Line3DCollection (plus one for the highlighted drone).
+
+        Returns:
+            The highlighted drone's collection, colored by seconds since the
+            first departure, or None
+        """
+        lo, hi = self._bounds(trajectories)
+        span = np.where(hi > lo, hi - lo, 1.0)
+        start = min(t.start_time for t in trajectories.values())
+        segments = self._decimated_segments(trajectories, tolerance_px, lo, span, start)
+        others = [drone_id for drone_id in trajectories if drone_id != highlight]
+        if others:
+            lines = np.concatenate([segments[drone_id][0] for drone_id in others])
+            rgba = np.concatenate([np.repeat([to_rgba(colors[drone_id])], len(segments[drone_id][0]), axis=0)
+                                   for drone_id in others])
+            self.ax.add_collection3d(Line3DCollection(lines, colors=rgba, linewidths=0.8, alpha=alpha))
+        highlighted = None
+        if highlight in segments:
+            lines, times = segments[highlight]
+            highlighted = Line3DCollection(lines, cmap='hot', linewidths=2.0)
+            highlighted.set_array(times)
+            self.ax.add_collection3d(highlighted)
+        # Collections do not autoscale the axes
+        pad = 0.02 * span
+        self.ax.set_xlim(lo[0] - pad[0], hi[0] + pad[0])
+        self.ax.set_ylim(lo[1] - pad[1], hi[1] + pad[1])
+        self.ax.set_zlim(lo[2] - pad[2], hi[2] + pad[2])
+        return highlighted
+
+    def _draw_density(self, density: DensityMap, floor: float, cmap: str = 'YlOrRd'):
+        """
+        Draw a density map as a heatmap on the plane z = ``floor``; empty columns stay transparent.
+
+        Returns:
+            Mappable for a colorbar, or None if the map is empty
+        """
+        values = density.drones
+        if values.size == 0:
+            return None
+        nx, ny = values.shape
+        x0, x1, y0, y1 = density.extent
+        X, Y = np.meshgrid(np.linspace(x0, x1, nx + 1), np.linspace(y0, y1, ny + 1), indexing='ij')
+        mappable = plt.cm.ScalarMappable(norm=Normalize(0, max(int(values.max()), 1)), cmap=cmap)
+        # plot_surface colors each quad by its lower corner, so pad the colors to the vertex grid
+        colors = np.zeros((nx + 1, ny + 1, 4))
+        colors[:nx, :ny] = mappable.to_rgba(values)
+        colors[:nx, :ny, 3] = np.where(values > 0, 0.8, 0.0)
+        self.ax.plot_surface(X, Y, np.full(X.shape, floor), facecolors=colors, rstride=1, cstride=1,
+                             shade=False, linewidth=0, antialiased=False)
+        return mappable
+
+    def _label_axes(self, title: str) -> None:
+        self.ax.set_xlabel('X (m)', fontsize=12)
+        self.ax.set_ylabel('Y (m)', fontsize=12)
+        self.ax.set_zlabel('Z (m)', fontsize=12)
+        self.ax.set_title(title, fontsize=15, pad=20)
+
+    def render(self, flight_paths: Dict[str, Union[Trajectory, FlightPath]], conflicts: List,
+               filename: Optional[str] = None, tolerance_px: float = 1.0, highlight: Optional[str] = 'drone1',
+               max_legend: int = 8, density: Optional[DensityMap] = None):
+        """
+        Fast 4D rendering for large fleets.
+
+        Each trajectory is decimated to ``tolerance_px`` pixels, and all paths
+        are drawn as a single Line3DCollection instead of one line and one
+        scatter per drone. The highlighted drone's path is colored by time.
+        A density map, if given, is drawn as a heatmap under the paths.
+
+        Args:
+            flight_paths: Mapping of drone id to Trajectory (or legacy dict)
+            conflicts: Conflicts to mark
+            filename: Save to this file (PNG, SVG, PDF, ...) instead of showing the figure
+            tolerance_px: Largest on-screen deviation of the decimated paths in pixels
+            highlight: Drone drawn in red and colored by time (None for no highlight)
+            max_legend: Largest number of individual drones listed in the legend
+            density: OccupancyGrid.density() map of drones per column to draw on the floor
+        """
+        self.ax.clear()
+        trajectories = {drone_id: as_trajectory(path) for drone_id, path in flight_paths.items()}
+        colors = drone_colors(list(trajectories), highlight)
+        highlighted = self._draw_paths(trajectories, colors, tolerance_px, highlight)
+
+        starts = np.array([t.positions[0] for t in trajectories.values()])
+        self.ax.scatter(starts[:, 0], starts[:, 1], starts[:, 2], c='black', marker='o', s=20, alpha=0.4)
+        if conflicts:
+            locations = np.array([c.location for c in conflicts])
+            self.ax.scatter(locations[:, 0], locations[:, 1], locations[:, 2],
+                            c='red', marker='*', s=120, edgecolor='black', linewidth=1.2)
+        if highlighted is not None:
+            cbar = self.fig.colorbar(highlighted, ax=self.ax, pad=0.1)
+            start = min(t.start_time for t in trajectories.values())
+            cbar.set_label(f'Time ({highlight}), s since {start:%H:%M:%S}', fontsize=12)
+        if density is not None:
+            heatmap = self._draw_density(density, self.ax.get_zlim()[0])
+            if heatmap is not None:
+                cbar = self.fig.colorbar(heatmap, ax=self.ax, pad=0.02, shrink=0.6)
+                cbar.set_label('Drones per column', fontsize=12)
+
+        self._label_axes(f'4D Mission Visualization ({len(trajectories)} drones)')
+        self.ax.legend(handles=self._legend_handles(colors, len(conflicts), highlight, max_legend),
+                       loc='upper left', fontsize=9)
+        self._finish(filename)
+
+    def animate(self, flight_paths: Dict[str, Union[Trajectory, FlightPath]], conflicts: List, filename: str,
+                frames: int = 120, fps: int = 12, tolerance_px: float = 1.0,
+                highlight: Optional[str] = 'drone1') -> int:
+        """
+        Render a time-slider animation: faint decimated paths with every drone's
+        current position, and conflicts appearing as their time is reached.
+
+        The view is fixed, so the paths and axes are drawn once and each frame
+        only blits the moving markers onto a copy of that background.
+
+        Args:
+            flight_paths: Mapping of drone id to Trajectory (or legacy dict)
+            conflicts: Conflicts to mark
+            filename: Output file in an animated format Pillow can write (.gif, .webp, .png)
+            frames: Number of frames spanning the whole time range
+            fps: Frames per second
+            tolerance_px: Largest on-screen deviation of the decimated paths in pixels
+            highlight: Drone drawn in red (None for no highlight)
+
+        Returns:
+            Number of frames written
+        """
+        self.ax.clear()
+        trajectories = {drone_id: as_trajectory(path) for drone_id, path in flight_paths.items()}
+        drone_ids = list(trajectories)
+        colors = drone_colors(drone_ids, highlight)
+        self._draw_paths(trajectories, colors, tolerance_px, highlight, alpha=0.25)
+        self._label_axes(f'4D Mission Visualization ({len(trajectories)} drones)')
+
+        start = min(t.start_time for t in trajectories.values())
+        end = max(t.end_time for t in trajectories.values())
+        offsets = np.linspace(0.0, (end - start).total_seconds(), frames)
+        # Positions of every drone at every frame, NaN while it is not flying
+        positions = np.stack([t.interpolate(offsets + (start - t.epoch).total_seconds())[0]
+                              for t in trajectories.values()])
+        rgba = np.array([to_rgba(colors[drone_id]) for drone_id in drone_ids])
+        conflict_offsets = np.array([(c.time - start).total_seconds() for c in conflicts])
+        conflict_locations = np.array([c.location for c in conflicts]).reshape(-1, 3)
+
+        canvas = self.fig.canvas
+        clock = self.fig.text(0.02, 0.02, '', fontsize=12, animated=True)
+        canvas.draw()
+        background = canvas.copy_from_bbox(self.fig.bbox)
+        images = []
+        for frame in range(frames):
+            canvas.restore_region(background)
+            current = positions[:, frame]
+            flying = ~np.isnan(current[:, 0])
+            seen = conflict_offsets <= offsets[frame]
+            markers = []
+            if flying.any():
+                markers.append(self.ax.scatter(current[flying, 0], current[flying, 1], current[flying, 2],
+                                               c=rgba[flying], s=12, depthshade=False, animated=True))
+            if seen.any():
+                markers.append(self.ax.scatter(conflict_locations[seen, 0], conflict_locations[seen, 1],
+                                               conflict_locations[seen, 2], c='red', marker='*', s=120,
+                                               edgecolor='black', linewidth=1.2, animated=True))
+            for artist in markers:
+                # Axes3D.draw projects its collections; drawing one directly must project it first
+                artist.do_3d_projection()
+                self.ax.draw_artist(artist)
+                artist.remove()
+            clock.set_text(f'{start + timedelta(seconds=float(offsets[frame])):%H:%M:%S}  '
+                           f'{int(flying.sum())} flying, {int(seen.sum())} conflicts')
+            self.fig.draw_artist(clock)
+            images.append(Image.fromarray(np.asarray(canvas.buffer_rgba())).convert('RGB'))
+        clock.remove()
+        if filename.lower().endswith('.gif'):
+            # One shared palette (fast octree from the first frame, which holds the
+            # whole background) instead of quantizing every frame separately
+            palette = images[0].quantize(colors=255, method=2)
+            images = [image.quantize(palette=palette, dither=0) for image in images]
+        images[0].save(filename, save_all=True, append_images=images[1:], duration=int(1000 / fps), loop=0)
+        return len(images)
+
+
+def visualize_mission_4d(flight_paths: Dict[str, Union[Trajectory, FlightPath]],
                         conflicts: List):
     viz = Visualization4D()
     viz.visualize_4d(flight_paths, conflicts)
 
+
+def render_mission_4d(flight_paths: Dict[str, Union[Trajectory, FlightPath]], conflicts: List, filename: str,
+                      **kwargs):
+    """Render the fast 4D view offscreen to an image file (works without a display)."""
+    Visualization4D(offscreen=True).render(flight_paths, conflicts, filename, **kwargs)
+
+
+def animate_mission_4d(flight_paths: Dict[str, Union[Trajectory, FlightPath]], conflicts: List, filename: str,
+                       **kwargs):
+    """Render a time-slider animation offscreen to an animated .gif, .webp or .png file."""
+    Visualization4D(offscreen=True).animate(flight_paths, conflicts, filename, **kwargs)
+
+
 def visualize_paths_3d(missions: List[Mission], conflicts: List[Conflict]):
     """Create a 3D visualization of the flight paths and conflicts."""
     fig = plt.figure(figsize=(10, 8))
     ax = fig.add_subplot(111, projection='3d')
-    
+
     # Create a color cycle that can handle any number of missions
-    colors = plt.cm.tab10(np.linspace(0, 1, len(missions)))
-    
+    colors = distinct_colors(len(missions))
+
     # Plot each mission's path
     for i, mission in enumerate(missions):
         x = [wp.x for wp in mission.waypoints]
         y = [wp.y for wp in mission.waypoints]
         z = [wp.z for wp in mission.waypoints]
         ax.plot(x, y, z, color=colors[i], label=f'Drone {mission.drone_id}')
-    
+
     # Plot conflicts
     for conflict in conflicts:
         x, y, z = conflict.location
         ax.scatter(x, y, z, c='red', marker='*', s=100)
-    
+
     ax.set_xlabel('X (m)')
     ax.set_ylabel('Y (m)')
     ax.set_zlabel('Z (m)')
     ax.legend()
-    plt.show() 
\ No newline at end of file
+    plt.show()
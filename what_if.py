@@ -0,0 +1,219 @@
+from dataclasses import dataclass
+from typing import Iterator, Optional, Sequence, Tuple, Union
+from datetime import datetime
+import numpy as np
+from models import Mission
+from columnar import MissionBatch
+from analytic_detector import MissionSegments, segment_pair_separation, PAIR_BLOCK
+from flight_path_simulator import FlightPathSimulator
+
+
+@dataclass(eq=False)
+class _SegmentTable:
+    """Flat segments of many missions; ``owner`` is the mission index of each segment."""
+    owner: np.ndarray
+    t0: np.ndarray
+    t1: np.ndarray
+    p0: np.ndarray
+    velocity: np.ndarray
+
+    def take(self, rows: np.ndarray) -> '_SegmentTable':
+        return _SegmentTable(self.owner[rows], self.t0[rows], self.t1[rows], self.p0[rows], self.velocity[rows])
+
+    def position(self, rows: np.ndarray, t: np.ndarray) -> np.ndarray:
+        """Positions of segments ``rows`` at offsets ``t`` inside them, shape (P, 3)."""
+        return self.p0[rows] + self.velocity[rows] * (t - self.t0[rows])[:, None]
+
+
+@dataclass(eq=False)
+class WhatIfResult:
+    """
+    Verdicts of a batch of candidate missions.
+
+    Attributes:
+        batch: The evaluated candidates
+        clear: Whether each candidate stays more than ``safety_buffer`` from every resident, shape (K,)
+        min_separation: Smallest time-buffered separation from any resident in meters
+            (inf if no resident flies within ``time_buffer`` of it), shape (K,)
+        closest_resident: Drone id of the resident at that separation ('' if none), shape (K,)
+        closest_time: Candidate time of the closest approach in seconds from the batch
+            epoch (NaN if none), shape (K,)
+    """
+    batch: MissionBatch
+    clear: np.ndarray
+    min_separation: np.ndarray
+    closest_resident: np.ndarray
+    closest_time: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.clear)
+
+    def mission(self, k: int) -> Mission:
+        """Build the Mission of candidate k."""
+        return self.batch.mission(k)
+
+
+class WhatIfEvaluator:
+    def __init__(self, residents: Sequence[Mission], safety_buffer: float = 2.0, time_buffer: float = 2.0,
+                 simulator: Optional[FlightPathSimulator] = None, epoch: Optional[datetime] = None):
+        """
+        Evaluate many candidate variants of a flight against the same resident missions in one array pass.
+
+        Residents are flattened once into a segment table sorted by start time.
+        Every candidate segment is paired with the resident segments within
+        ``time_buffer`` of it in time, and separations are solved in closed
+        form with the same piecewise-linear model as AnalyticConflictDetector,
+        vectorized over all pairs. A pair's bounding-box gap bounds its
+        separation from below and any time-aligned point pair bounds it from
+        above, so pairs that cannot hold a candidate's minimum are dropped
+        before the exact pass.
+
+        Args:
+            residents: Approved missions the candidates are checked against
+            safety_buffer: Minimum separation distance in meters
+            time_buffer: Temporal tolerance in seconds
+            simulator: Simulator used to time candidate waypoint lists
+            epoch: Reference time for the shared time axis (defaults to the earliest resident start)
+        """
+        self.safety_buffer = safety_buffer
+        self.time_buffer = time_buffer
+        self.simulator = simulator or FlightPathSimulator()
+        self.epoch = epoch or min((m.start_time for m in residents), default=datetime(1970, 1, 1))
+        self.resident_ids = np.array([m.drone_id for m in residents], dtype=str)
+        segments = [MissionSegments.from_mission(m, self.epoch) for m in residents]
+        if segments:
+            owner = np.concatenate([np.full(len(s), i) for i, s in enumerate(segments)])
+            table = _SegmentTable(owner, np.concatenate([s.t0 for s in segments]),
+                                  np.concatenate([s.t1 for s in segments]),
+                                  np.concatenate([s.p0 for s in segments]),
+                                  np.concatenate([s.velocity for s in segments]))
+        else:
+            empty = np.zeros(0)
+            table = _SegmentTable(np.zeros(0, dtype=np.int64), empty, empty, np.zeros((0, 3)),
+                                  np.zeros((0, 3)))
+        self._residents = table.take(np.argsort(table.t0, kind='stable'))
+        self._max_duration = float((table.t1 - table.t0).max()) if len(table.t0) else 0.0
+
+    def evaluate_waypoints(self, waypoint_lists: Sequence[Sequence[Tuple[float, float, float]]],
+                           start_offset: Union[float, Sequence[float]], end_offset: Union[float, Sequence[float]],
+                           speed: Union[float, Sequence[float]], global_start_time: datetime,
+                           drone_id: str = 'candidate') -> WhatIfResult:
+        """
+        Time K candidate waypoint lists in one vectorized pass and evaluate them.
+
+        Arguments follow FlightPathSimulator.create_mission_from_waypoints, with
+        offsets and speeds given once for all lists or once per list. Candidate
+        k is named ``f'{drone_id}{k}'``.
+        """
+        batch = self.simulator.create_missions_batch([f'{drone_id}{k}' for k in range(len(waypoint_lists))],
+                                                     waypoint_lists, start_offset, end_offset, speed,
+                                                     global_start_time)
+        return self.evaluate(batch)
+
+    def evaluate_missions(self, missions: Sequence[Mission]) -> WhatIfResult:
+        """Evaluate already timed candidate missions."""
+        return self.evaluate(MissionBatch.from_missions(missions))
+
+    def _candidate_segments(self, batch: MissionBatch) -> _SegmentTable:
+        """Segments of every candidate, as MissionSegments.from_mission builds them, in candidate order."""
+        counts = np.diff(batch.offsets)
+        owner = np.repeat(np.arange(len(batch)), counts)
+        ends = np.repeat(batch.offsets[1:], counts)
+        rows = np.arange(len(owner))
+        # A segment starts at every waypoint but the last; a single waypoint is a stationary point
+        starts = rows[(rows + 1 < ends) | (counts[owner] == 1)]
+        stops = np.minimum(starts + 1, ends[starts] - 1)
+        shift = (batch.epoch - self.epoch).total_seconds()
+        t0 = batch.times[starts] + shift
+        t1 = batch.times[stops] + shift
+        durations = t1 - t0
+        safe = np.where(durations > 0, durations, 1.0)
+        velocity = np.where((durations > 0)[:, None],
+                            (batch.positions[stops] - batch.positions[starts]) / safe[:, None], 0.0)
+        return _SegmentTable(owner[starts], t0, t1, batch.positions[starts], velocity)
+
+    def _blocks(self, counts: np.ndarray, owner: np.ndarray) -> Iterator[Tuple[int, int]]:
+        """Ranges of candidate segments holding whole candidates and about PAIR_BLOCK pairs each."""
+        total = np.concatenate(([0], np.cumsum(counts)))
+        # Segment index where each candidate starts, and the end of the last one
+        bounds = np.concatenate(([0], np.flatnonzero(np.diff(owner)) + 1, [len(owner)]))
+        pairs = total[bounds]
+        k = 0
+        while k < len(bounds) - 1:
+            stop = max(int(np.searchsorted(pairs, pairs[k] + PAIR_BLOCK, side='right')) - 1, k + 1)
+            yield int(bounds[k]), int(bounds[stop])
+            k = stop
+
+    def _separation(self, candidates: _SegmentTable, residents: _SegmentTable, a: np.ndarray,
+                    b: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """segment_pair_separation of candidate segments ``a`` and resident segments ``b``."""
+        return segment_pair_separation(candidates.t0[a], candidates.t1[a], candidates.p0[a], candidates.velocity[a],
+                                       residents.t0[b], residents.t1[b], residents.p0[b], residents.velocity[b],
+                                       self.time_buffer)
+
+    def evaluate(self, batch: MissionBatch) -> WhatIfResult:
+        """
+        Evaluate a batch of candidate missions against the residents.
+
+        Returns:
+            WhatIfResult with one verdict and minimum separation per candidate
+        """
+        size = len(batch)
+        min_separation = np.full(size, np.inf)
+        closest = np.full(size, -1, dtype=np.int64)
+        closest_time = np.full(size, np.nan)
+        candidates = self._candidate_segments(batch)
+        residents = self._residents
+        tb = self.time_buffer
+
+        # Resident segments that may overlap each candidate segment within time_buffer
+        lo = np.searchsorted(residents.t0, candidates.t0 - tb - self._max_duration, side='left')
+        hi = np.searchsorted(residents.t0, candidates.t1 + tb, side='right')
+        counts = hi - lo
+        for begin, end in self._blocks(counts, candidates.owner):
+            block_counts = counts[begin:end]
+            a = np.repeat(np.arange(begin, end), block_counts)
+            b = (np.arange(block_counts.sum()) - np.repeat(np.cumsum(block_counts) - block_counts, block_counts)
+                 + np.repeat(lo[begin:end], block_counts))
+            # Exact time overlap, as AnalyticConflictDetector.segment_pair_conflict requires
+            lo_t = np.maximum(candidates.t0[a], residents.t0[b] - tb)
+            hi_t = np.minimum(candidates.t1[a], residents.t1[b] + tb)
+            overlap = lo_t <= hi_t
+            a, b, lo_t, hi_t = a[overlap], b[overlap], lo_t[overlap], hi_t[overlap]
+            if len(a) == 0:
+                continue
+            owner = candidates.owner[a]
+
+            # Resident times within time_buffer of the candidate times [lo_t, hi_t]
+            t0b, t1b = residents.t0[b], residents.t1[b]
+            start_a, end_a = candidates.position(a, lo_t), candidates.position(a, hi_t)
+            start_b = residents.position(b, np.maximum(t0b, lo_t - tb))
+            end_b = residents.position(b, np.minimum(t1b, hi_t + tb))
+            # Lower bound: gap between the bounding boxes of those two sub-segments
+            gap = np.maximum(np.maximum(np.minimum(start_b, end_b) - np.maximum(start_a, end_a),
+                                        np.minimum(start_a, end_a) - np.maximum(start_b, end_b)), 0.0)
+            lower = np.sqrt(np.einsum('ij,ij->i', gap, gap))
+            # Upper bound: the separation at the start, middle and end of the overlap,
+            # each compared with the admissible resident time closest to it
+            offset = np.stack([candidates.position(a, t) - residents.position(
+                b, np.clip(t, np.maximum(t0b, t - tb), np.minimum(t1b, t + tb)))
+                for t in (lo_t, 0.5 * (lo_t + hi_t), hi_t)])
+            upper = np.sqrt(np.einsum('kij,kij->ki', offset, offset).min(axis=0))
+            firsts = np.flatnonzero(np.concatenate(([True], owner[1:] != owner[:-1])))
+            bound = np.full(size, np.inf)
+            bound[owner[firsts]] = np.minimum.reduceat(upper, firsts)
+            # The slack covers rounding of the closed-form separations
+            keep = lower <= bound[owner] * (1 + 1e-9) + 1e-9
+            a, b, owner = a[keep], b[keep], owner[keep]
+
+            distances, times = self._separation(candidates, residents, a, b)
+            order = np.lexsort((distances, owner))
+            first = order[np.concatenate(([True], np.diff(owner[order]) != 0))]
+            min_separation[owner[first]] = distances[first]
+            closest[owner[first]] = residents.owner[b[first]]
+            closest_time[owner[first]] = times[first]
+
+        ids = np.concatenate((self.resident_ids, np.array([''], dtype=str)))
+        shift = (batch.epoch - self.epoch).total_seconds()
+        return WhatIfResult(batch=batch, clear=min_separation > self.safety_buffer, min_separation=min_separation,
+                            closest_resident=ids[closest], closest_time=closest_time - shift)
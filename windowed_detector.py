@@ -0,0 +1,223 @@
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Tuple
+from datetime import datetime, timedelta
+import bisect
+import numpy as np
+from models import Mission, Conflict
+from trajectory import Trajectory
+from flight_path_simulator import FlightPathSimulator
+from conflict_detector import ConflictDetector
+from columnar import ConflictTable, MICROSECOND, to_microseconds
+from instrumentation import Metrics
+
+
+@dataclass
+class WindowStats:
+    """Statistics of the last windowed detection pass."""
+    windows: int = 0
+    samples_generated: int = 0
+    peak_active_missions: int = 0
+    peak_samples: int = 0
+
+    @property
+    def peak_bytes(self) -> int:
+        """Peak bytes of sample arrays (times and positions) held at once."""
+        return self.peak_samples * 4 * 8
+
+
+@dataclass
+class _OpenEvent:
+    """Grouped event of one drone pair that a later window may still extend."""
+    event: ConflictTable  # one row, times relative to the drone1 trajectory's epoch
+    start: int  # microseconds from that epoch
+    end: int
+    gap: int  # largest gap in microseconds between raw conflicts of one event
+
+
+def clip_mission(mission: Mission, timestamps: List[datetime], start: datetime, end: datetime) -> Mission:
+    """
+    The waypoints of a mission whose segments overlap [start, end].
+
+    Args:
+        mission: Mission to clip
+        timestamps: The mission's waypoint timestamps, in order
+        start: Window start
+        end: Window end
+
+    Returns:
+        Mission holding the waypoints from the last one at or before ``start``
+        to the first one at or after ``end``
+    """
+    # At least one segment, so the broad phase indexes the mission
+    lo = max(min(bisect.bisect_right(timestamps, start) - 1, len(timestamps) - 2), 0)
+    hi = min(bisect.bisect_left(timestamps, end) + 1, len(timestamps))
+    waypoints = mission.waypoints[lo:hi]
+    return Mission(drone_id=mission.drone_id, waypoints=waypoints,
+                   start_time=waypoints[0].timestamp, end_time=waypoints[-1].timestamp)
+
+
+class WindowedConflictDetector:
+    def __init__(self, simulator: FlightPathSimulator, detector: ConflictDetector, window: float = 600.0,
+                 metrics: Optional[Metrics] = None):
+        """
+        Time-windowed detection pipeline for long-duration missions.
+
+        The shared time axis is cut into windows of ``window`` seconds. For each
+        window only the missions active in it are simulated, and only over the
+        window grown by ``time_buffer`` on each side, so every sample pair that
+        could conflict with a drone1 sample inside the window is present. Raw
+        conflicts are assigned to the window holding their drone1 sample,
+        grouped, and events that touch a window edge are carried over and merged
+        with the next window's events. Sample arrays are released after each
+        window, so peak memory scales with the window length instead of the
+        total airspace-hours.
+
+        Results are identical to simulating every mission in full and running
+        ``detector.detect_conflicts``.
+
+        Args:
+            simulator: Simulator producing the flight path samples
+            detector: Detector providing the thresholds, broad phase and pair scan
+            window: Window length in seconds
+            metrics: Optional instrumentation collector (defaults to the detector's)
+        """
+        if window <= 0:
+            raise ValueError("window must be positive")
+        self.simulator = simulator
+        self.detector = detector
+        self.window = window
+        self.metrics = metrics if metrics is not None else detector.metrics
+        self.stats = WindowStats()
+
+    def windows(self, missions: List[Mission]) -> Iterator[Tuple[datetime, datetime]]:
+        """Consecutive [start, end) windows covering all missions."""
+        if not missions:
+            return
+        start = min(m.start_time for m in missions)
+        end = max(m.end_time for m in missions)
+        step = timedelta(seconds=self.window)
+        while start <= end:
+            yield start, start + step
+            start += step
+
+    def detect_conflicts(self, missions: List[Mission]) -> List[Conflict]:
+        """Detect and group conflicts, ordered like ConflictDetector.detect_conflicts."""
+        grouped = list(self.iter_conflicts(missions))
+        with self.metrics.phase('detect.sort'):
+            grouped.sort(key=lambda c: (tuple(sorted([c.drone1_id, c.drone2_id])), c.time))
+        return grouped
+
+    def iter_conflicts(self, missions: List[Mission]) -> Iterator[Conflict]:
+        """
+        Yield grouped conflict events as soon as no later window can extend them.
+
+        Events come out roughly in time order, window by window.
+        """
+        self.stats = WindowStats()
+        if not missions:
+            return
+        metrics = self.metrics
+        detector = self.detector
+        buffer = timedelta(seconds=detector.time_buffer + 1e-3)
+        epoch = min(m.start_time for m in missions)
+        order = {m.drone_id: k for k, m in enumerate(missions)}
+        pending = sorted(missions, key=lambda m: m.start_time)
+        admitted = 0
+        timestamps: Dict[str, List[datetime]] = {}
+        active: List[Mission] = []
+        open_events: Dict[Tuple[str, str], _OpenEvent] = {}
+
+        for window_start, window_end in self.windows(missions):
+            lo, hi = window_start - buffer, window_end + buffer
+            # Admit missions that have started and retire the ones that have ended
+            while admitted < len(pending) and pending[admitted].start_time <= hi:
+                mission = pending[admitted]
+                timestamps[mission.drone_id] = [wp.timestamp for wp in mission.waypoints]
+                active.append(mission)
+                admitted += 1
+            for mission in active:
+                if mission.end_time < lo:
+                    del timestamps[mission.drone_id]
+            active = [m for m in active if m.end_time >= lo]
+            # Keep the detector's pair order, which decides drone1 of every event
+            active.sort(key=lambda m: order[m.drone_id])
+
+            with metrics.phase('detect.prepare'):
+                trajectories = {}
+                for mission in active:
+                    trajectory = self.simulator.simulate_window(mission, lo, hi)
+                    if trajectory is not None:
+                        trajectories[mission.drone_id] = trajectory
+            clipped = [clip_mission(m, timestamps[m.drone_id], lo, hi) for m in active
+                       if m.drone_id in trajectories]
+            samples = sum(len(t) for t in trajectories.values())
+            self._record(len(trajectories), samples)
+
+            window_bounds = ((window_start - epoch) // MICROSECOND, (window_end - epoch) // MICROSECOND)
+            for mission1, mission2 in detector._candidates(clipped):
+                pair = (mission1.drone_id, mission2.drone_id)
+                path1, path2 = trajectories[pair[0]], trajectories[pair[1]]
+                with metrics.phase('detect.narrow_phase'):
+                    raw = self._window_conflicts(pair, path1, path2, epoch, window_bounds)
+                with metrics.phase('detect.grouping'):
+                    events = raw.group_intervals(detector.group_step(path1))
+                if metrics.enabled:
+                    metrics.count('sample_pairs_compared', detector.last_pairs_compared)
+                    metrics.count('raw_conflicts', len(raw))
+                if len(events):
+                    yield from self._merge(pair, events, path1, open_events)
+            del trajectories
+
+            # Events more than the grouping gap before the next window are final
+            for pair in list(open_events):
+                open_event = open_events[pair]
+                if (window_end - open_event.event.epoch) // MICROSECOND - open_event.end > open_event.gap:
+                    yield from self._close(open_events.pop(pair))
+        for pair in list(open_events):
+            yield from self._close(open_events.pop(pair))
+
+    def _record(self, missions: int, samples: int) -> None:
+        stats = self.stats
+        stats.windows += 1
+        stats.samples_generated += samples
+        stats.peak_active_missions = max(stats.peak_active_missions, missions)
+        stats.peak_samples = max(stats.peak_samples, samples)
+
+    def _window_conflicts(self, pair: Tuple[str, str], path1: Trajectory, path2: Trajectory, epoch: datetime,
+                          window_bounds: Tuple[int, int]) -> ConflictTable:
+        """Raw conflicts of a pair whose drone1 sample lies inside the window."""
+        raw = self.detector.check_pair_table(pair[0], path1, pair[1], path2, epoch)
+        micros = to_microseconds(raw.times) + (path1.epoch - epoch) // MICROSECOND
+        return raw.take((micros >= window_bounds[0]) & (micros < window_bounds[1]))
+
+    def _merge(self, pair: Tuple[str, str], events: ConflictTable, path1: Trajectory,
+               open_events: Dict[Tuple[str, str], _OpenEvent]) -> Iterator[Conflict]:
+        """
+        Merge a window's events of a pair with its open event, and yield the closed ones.
+
+        The last event stays open, since the next window may extend it.
+        """
+        gap = timedelta(seconds=self.detector.group_step(path1) * 1.5) // MICROSECOND
+        starts = to_microseconds(events.times)
+        ends = starts + to_microseconds(events.time_diffs)
+        current = open_events.pop(pair, None)
+        for k in range(len(events)):
+            event = _OpenEvent(events.take(slice(k, k + 1)), int(starts[k]), int(ends[k]), gap)
+            if current is not None and event.start - current.end <= gap:
+                # Same grouping rule as group_intervals: keep the first closest approach
+                closest = current.event if current.event.distances[0] <= event.event.distances[0] else event.event
+                merged = ConflictTable(epoch=current.event.epoch, drone_ids=current.event.drone_ids,
+                                       drone1=current.event.drone1, drone2=current.event.drone2,
+                                       times=current.event.times, locations=closest.locations,
+                                       distances=closest.distances,
+                                       time_diffs=np.array([(event.end - current.start) / 1e6]))
+                current = _OpenEvent(merged, current.start, event.end, gap)
+                continue
+            if current is not None:
+                yield from self._close(current)
+            current = event
+        open_events[pair] = current
+
+    @staticmethod
+    def _close(open_event: _OpenEvent) -> List[Conflict]:
+        return open_event.event.to_conflicts()